@@ -17,18 +17,22 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
 from io import open
+import importlib
 import logging
+import sys
 
 from fontTools.misc.py23 import tostr
 
-from glyphsLib.builder import to_ufos
-from glyphsLib.interpolation import interpolate, build_designspace
+# classes has to come before writer, which it imports.
+from glyphsLib.classes import __all__ as __all_classes__
+from glyphsLib.classes import *
 from glyphsLib.parser import load, loads
 from glyphsLib.writer import dump, dumps
 from glyphsLib.util import write_ufo
+from glyphsLib.fontdiff import diff
 
-from glyphsLib.classes import __all__ as __all_classes__
-from glyphsLib.classes import *
+# The name diff had before it became the function itself
+diff_fonts = diff
 
 __version__ = "2.0.1.dev0"
 
@@ -38,14 +42,49 @@ __version__ = "2.0.1.dev0"
 # https://bugs.python.org/issue21720
 __all__ = [tostr(s) for s in [
     "build_masters", "build_instances", "load_to_ufos",
-    "load", "loads", "dump", "dumps",
+    "load", "loads", "dump", "dumps", "diff", "diff_fonts",
  ] + __all_classes__]
 
 logger = logging.getLogger(__name__)
 
+# Names that are imported on first use, with their modules. The builder and
+# interpolation modules import defcon, MutatorMath and much of fontTools,
+# which programs that only read and write .glyphs files do not need.
+# Module-level __getattr__ needs Python 3.7 (PEP 562); older versions
+# import them right away.
+_LAZY_ATTRIBUTES = {
+    "builder": ("glyphsLib.builder", None),
+    "interpolation": ("glyphsLib.interpolation", None),
+    "glyphdata": ("glyphsLib.glyphdata", None),
+    "to_ufos": ("glyphsLib.builder", "to_ufos"),
+    "to_glyphs": ("glyphsLib.builder", "to_glyphs"),
+    "interpolate": ("glyphsLib.interpolation", "interpolate"),
+    "build_designspace": ("glyphsLib.interpolation", "build_designspace"),
+}
+
+
+def __getattr__(name):
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+    value = importlib.import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    from glyphsLib.builder import to_ufos, to_glyphs
+    from glyphsLib.interpolation import interpolate, build_designspace
+
 
 def load_to_ufos(file_or_path, include_instances=False, family_name=None,
-                 propagate_anchors=True):
+                 propagate_anchors=True, glyph_data=None, lazy=False,
+                 workers=1, master_dir=None, incremental=False,
+                 glyph_workers=1, streaming=False):
     """Load an unpacked .glyphs object to UFO objects."""
 
     if hasattr(file_or_path, 'read'):
@@ -54,13 +93,19 @@ def load_to_ufos(file_or_path, include_instances=False, family_name=None,
         with open(file_or_path, 'r', encoding='utf-8') as ifile:
             font = load(ifile)
     logger.info('Loading to UFOs')
+    from glyphsLib.builder import to_ufos
     return to_ufos(font, include_instances=include_instances,
                    family_name=family_name,
-                   propagate_anchors=propagate_anchors)
+                   propagate_anchors=propagate_anchors,
+                   glyph_data=glyph_data, lazy=lazy, workers=workers,
+                   master_dir=master_dir, incremental=incremental,
+                   glyph_workers=glyph_workers, streaming=streaming)
 
 
 def build_masters(filename, master_dir, designspace_instance_dir=None,
-                  family_name=None, propagate_anchors=True):
+                  family_name=None, propagate_anchors=True, glyph_data=None,
+                  workers=1, incremental=False, glyph_workers=1,
+                  streaming=False):
     """Write and return UFOs from the masters defined in a .glyphs file.
 
     Args:
@@ -69,28 +114,45 @@ def build_masters(filename, master_dir, designspace_instance_dir=None,
             written alongside the master UFOs though no instances will be built.
         family_name: If provided, the master UFOs will be given this name and
             only instances with this name will be included in the designspace.
+        glyph_data: Paths of custom GlyphData XML files to use over the
+            built-in glyph data.
+        workers: Number of processes that build and write masters in
+            parallel.
+        incremental: If True, update the masters written by the last build
+            in master_dir, only rebuilding the glyphs that changed since.
+        glyph_workers: Number of processes that build the glyphs of each
+            master in parallel, instead of workers.
+        streaming: If True, write the glyphs of each master one by one as
+            they are built, without building the whole UFO in memory.
 
     Returns:
         A list of master UFOs, and if designspace_instance_dir is provided, a
         path to a designspace and a list of (path, data) tuples with instance
         paths from the designspace and respective data from the Glyphs source.
+
+    The masters are written one by one as soon as each is built, so only one
+    of them is in memory at a time. The returned UFOs are opened from the
+    written files and load their glyphs on demand.
     """
 
+    from glyphsLib.interpolation import build_designspace
+
     ufos, instance_data = load_to_ufos(
         filename, include_instances=True, family_name=family_name,
-        propagate_anchors=propagate_anchors)
+        propagate_anchors=propagate_anchors, glyph_data=glyph_data,
+        workers=workers, master_dir=master_dir, incremental=incremental,
+        glyph_workers=glyph_workers, streaming=streaming)
     if designspace_instance_dir is not None:
         designspace_path, instance_data = build_designspace(
-            ufos, master_dir, designspace_instance_dir, instance_data)
+            ufos, master_dir, designspace_instance_dir, instance_data,
+            write_masters=False)
         return ufos, designspace_path, instance_data
-    else:
-        for ufo in ufos:
-            write_ufo(ufo, master_dir)
-        return ufos
+    return ufos
 
 
 def build_instances(filename, master_dir, instance_dir, family_name=None,
-                    propagate_anchors=True, round_geometry=True):
+                    propagate_anchors=True, round_geometry=True,
+                    glyph_data=None):
     """Write and return UFOs from the instances defined in a .glyphs file.
 
     Args:
@@ -98,11 +160,15 @@ def build_instances(filename, master_dir, instance_dir, family_name=None,
         instance_dir: Directory where instances are written.
         family_name: If provided, the master UFOs will be given this name and
             only instances with this name will be built.
+        glyph_data: Paths of custom GlyphData XML files to use over the
+            built-in glyph data.
     """
 
+    from glyphsLib.interpolation import interpolate
+
     master_ufos, instance_data = load_to_ufos(
         filename, include_instances=True, family_name=family_name,
-        propagate_anchors=propagate_anchors)
+        propagate_anchors=propagate_anchors, glyph_data=glyph_data)
     instance_ufos = interpolate(
         master_ufos, master_dir, instance_dir, instance_data,
         round_geometry=round_geometry)
@@ -43,6 +43,24 @@ def parse_options(args):
                              "(default: %(const)s)")
     parser.add_argument("-R", "--no-round", action="store_false",
                         help="Round geometry to integers")
+    parser.add_argument("--glyph-data", metavar="GLYPHDATA", action="append",
+                        help="Custom GlyphData XML file to use over the "
+                             "built-in glyph data. Can be given several "
+                             "times; later files take precedence.")
+    parser.add_argument("-j", "--jobs", metavar="JOBS", type=int, default=1,
+                        help="Build masters in JOBS processes in parallel. "
+                             "(default: %(default)s)")
+    parser.add_argument("--glyph-jobs", metavar="JOBS", type=int, default=1,
+                        help="Build the glyphs of each master in JOBS "
+                             "processes in parallel, instead of --jobs. "
+                             "(default: %(default)s)")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Only rebuild the master glyphs that changed "
+                             "since the last build into MASTERS.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write the glyphs of each master to MASTERS "
+                             "as they are built, instead of building the "
+                             "whole master in memory first.")
     options = parser.parse_args(args)
     return options
 
@@ -51,10 +69,16 @@ def main(args=None):
     opt = parse_options(args)
     if opt.glyphs is not None:
         if opt.instances is None:
-            glyphsLib.build_masters(opt.glyphs, opt.masters)
+            glyphsLib.build_masters(opt.glyphs, opt.masters,
+                                    glyph_data=opt.glyph_data,
+                                    workers=opt.jobs,
+                                    glyph_workers=opt.glyph_jobs,
+                                    incremental=opt.incremental,
+                                    streaming=opt.stream)
         else:
             glyphsLib.build_instances(opt.glyphs, opt.masters, opt.instances,
-                                      round_geometry=opt.no_round)
+                                      round_geometry=opt.no_round,
+                                      glyph_data=opt.glyph_data)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
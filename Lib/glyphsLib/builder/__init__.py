@@ -23,7 +23,9 @@ logger = logging.getLogger(__name__)
 
 
 def to_ufos(font, include_instances=False, family_name=None,
-            propagate_anchors=True, ufo_module=defcon):
+            propagate_anchors=True, ufo_module=defcon, glyph_data=None,
+            lazy=False, workers=1, master_dir=None, incremental=False,
+            glyph_workers=1, streaming=False):
     """Take .glyphs file data and load it into UFOs.
 
     Takes in data as Glyphs.app-compatible classes, as documented at
@@ -33,14 +35,60 @@ def to_ufos(font, include_instances=False, family_name=None,
 
     If family_name is provided, the master UFOs will be given this name and
     only instances with this name will be returned.
+
+    If glyph_data is provided, glyph properties such as production names and
+    categories are looked up in it instead of the built-in glyph data. It is
+    either the result of glyphdata.load_glyph_data or the paths of custom
+    GlyphData XML files to load with it.
+
+    If lazy is True, returns an iterator that builds the master UFOs one at
+    a time (see UFOBuilder.iter_masters) instead of a list.
+
+    If master_dir is provided, each master is written there as soon as it
+    is built, and the UFOs returned are opened from the written files. If
+    workers is greater than 1 as well, the masters are built and written in
+    that many processes in parallel. workers greater than 1 without
+    master_dir is a ValueError: sending unwritten UFOs back from the
+    processes would cost about as much as building the UFOs.
+
+    If glyph_workers is greater than 1, the glyphs of each master are built
+    in that many processes in parallel instead, also for a single master,
+    and read back into its UFO here. It can't be combined with workers.
+    With defcon, reading the glyphs back costs about as much as building
+    them, so it only helps with a ufo_module that reads glyphs cheaply.
+
+    If incremental is True, master_dir must be provided: the masters written
+    there by the last build are updated, and only the glyphs that changed
+    since are built again.
+
+    If streaming is True, master_dir must be provided: the glyphs of each
+    master are written there one by one as they are built, rather than
+    building the whole UFO in memory and saving it. It can't be combined
+    with incremental or glyph_workers.
     """
     builder = UFOBuilder(
         font,
         ufo_module=ufo_module,
         family_name=family_name,
-        propagate_anchors=propagate_anchors)
+        propagate_anchors=propagate_anchors,
+        glyph_data=glyph_data)
 
-    result = list(builder.masters)
+    if lazy:
+        result = builder.iter_masters(workers=workers, master_dir=master_dir,
+                                      incremental=incremental,
+                                      glyph_workers=glyph_workers,
+                                      streaming=streaming)
+    elif (master_dir is not None or workers > 1 or incremental or
+            glyph_workers > 1 or streaming):
+        # iter_masters rejects workers, incremental and streaming without
+        # master_dir
+        result = list(builder.iter_masters(workers=workers,
+                                           master_dir=master_dir,
+                                           incremental=incremental,
+                                           glyph_workers=glyph_workers,
+                                           streaming=streaming))
+    else:
+        result = list(builder.masters)
 
     if include_instances:
         return result, builder.instance_data
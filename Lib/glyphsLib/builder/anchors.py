@@ -21,12 +21,20 @@ from fontTools.misc.transform import Transform
 __all__ = ['to_ufo_propagate_font_anchors']
 
 
-def to_ufo_propagate_font_anchors(self, ufo):
-    """Copy anchors from parent glyphs' components to the parent."""
-
-    processed = set()
-    for glyph in ufo:
-        _propagate_glyph_anchors(ufo, glyph, processed)
+def to_ufo_propagate_font_anchors(self, ufo, glyph_names=None):
+    """Copy anchors from parent glyphs' components to the parent.
+
+    If glyph_names is given, anchors are only propagated to these glyphs,
+    and the other glyphs are taken to have theirs already.
+    """
+
+    if glyph_names is None:
+        processed = set()
+        glyph_names = ufo.keys()
+    else:
+        processed = set(ufo.keys()).difference(glyph_names)
+    for glyph_name in glyph_names:
+        _propagate_glyph_anchors(ufo, ufo[glyph_name], processed)
 
 
 def _propagate_glyph_anchors(ufo, parent, processed):
@@ -15,15 +15,32 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
+import importlib
 import logging
+import multiprocessing
 
 import defcon
+from ufoLib.glifLib import readGlyphFromString, writeGlyphToString
 
 logger = logging.getLogger(__name__)
 
 from glyphsLib import classes
+from glyphsLib.util import write_ufo
 from .constants import PUBLIC_PREFIX, GLYPHS_PREFIX
+from .custom_params import normalize_custom_param_name
+
+
+# What UFOBuilder computes once for all masters: the kerning groups, the
+# layers of each master by master ID, the associated layers of each master
+# and the glyph order.
+_MastersPrelude = namedtuple('_MastersPrelude', [
+    'kerning_groups', 'master_layers', 'supplementary_layer_data',
+    'glyph_order'])
+
+# The number of glyphs a worker process builds at a time, see
+# UFOBuilder._merge_glyph_chunks.
+GLYPH_CHUNK_SIZE = 200
 
 
 class UFOBuilder(object):
@@ -33,7 +50,8 @@ class UFOBuilder(object):
                  font,
                  ufo_module=defcon,
                  family_name=None,
-                 propagate_anchors=True):
+                 propagate_anchors=True,
+                 glyph_data=None):
         """Create a builder that goes from Glyphs to UFO + designspace.
 
         Keyword arguments:
@@ -44,6 +62,10 @@ class UFOBuilder(object):
         family_name -- if provided, the master UFOs will be given this name and
                        only instances with this name will be returned.
         propagate_anchors -- set to False to prevent anchor propagation
+        glyph_data -- glyph data to look up glyph properties in, instead of
+                      the built-in data: the result of
+                      glyphdata.load_glyph_data, or the paths of custom
+                      GlyphData XML files to load with it.
         """
         self.font = font
         self.ufo_module = ufo_module
@@ -55,6 +77,15 @@ class UFOBuilder(object):
         # The MutatorMath Designspace object that will be built (if requested).
         self._designspace = None
 
+        # The GlyphData properties of all glyphs, by glyph name (see
+        # glyph_info).
+        self._glyph_infos = None
+        if glyph_data is not None and not hasattr(glyph_data,
+                                                  'PRODUCTION_NAMES'):
+            from glyphsLib import glyphdata
+            glyph_data = glyphdata.load_glyph_data(glyph_data)
+        self.glyph_data = glyph_data
+
         # check that source was generated with at least stable version 2.3
         # https://github.com/googlei18n/glyphsLib/pull/65#issuecomment-237158140
         if int(font.appVersion) < 895:
@@ -86,37 +117,118 @@ class UFOBuilder(object):
     def masters(self):
         """Get an iterator over master UFOs that match the given family_name.
         """
-        if self._ufos:
-            return self._ufos.values()
-        kerning_groups = {}
-
-        # stores background data from "associated layers"
-        supplementary_layer_data = []
-
-        # TODO(jamesgk) maybe create one font at a time to reduce memory usage
-        # TODO: (jany) in the future, return a lazy iterator that builds UFOs
-        #     on demand.
-        self.to_ufo_font_attributes(self.family_name)
-
-        # get the 'glyphOrder' custom parameter as stored in the lib.plist.
-        # We assume it's the same for all ufos.
-        first_ufo = next(iter(self._ufos.values()))
-        glyphOrder_key = PUBLIC_PREFIX + 'glyphOrder'
-        if glyphOrder_key in first_ufo.lib:
-            glyph_order = first_ufo.lib[glyphOrder_key]
-        else:
-            glyph_order = []
-        sorted_glyphset = set(glyph_order)
+        if not self._ufos:
+            for ufo in self.iter_masters():
+                self._ufos[ufo.lib[GLYPHS_PREFIX + 'fontMasterID']] = ufo
+        return self._ufos.values()
 
+    def iter_masters(self, workers=1, master_dir=None, incremental=False,
+                     glyph_workers=1, streaming=False):
+        """Build the master UFOs one by one, yielding each when it is done.
+
+        Unlike `masters`, the builder keeps no reference to the yielded UFOs,
+        so a caller that saves and drops each of them holds only one master
+        in memory at a time. What all masters share, like the kerning groups
+        and the glyph order, is computed once up front.
+
+        If master_dir is given, each master is written there as soon as it is
+        built, and the UFOs yielded are opened from the written files. Then,
+        with workers > 1, the masters are built and written in that many
+        processes in parallel, and yielded in the order of the masters in the
+        font. workers > 1 without master_dir is a ValueError: sending the
+        built UFOs back from the worker processes would cost about as much
+        as building them.
+
+        With glyph_workers > 1, the masters are built one after the other,
+        but the glyphs of each master are built in chunks in that many
+        processes in parallel, and merged into its UFO here (see
+        _merge_glyph_chunks). It can't be combined with workers > 1.
+
+        With incremental as well, the masters in master_dir are updated
+        rather than written afresh: only the glyphs whose sources changed
+        since the last build are rebuilt and written again (see
+        builder.incremental). This needs a defcon-compatible ufo_module.
+
+        With streaming, the glyphs of each master are written to master_dir
+        one by one as they are built, without building the UFO in memory
+        first (see builder.streaming). It can't be combined with incremental
+        or glyph_workers > 1.
+        """
+        if incremental and master_dir is None:
+            raise ValueError('Incremental builds need a master_dir')
+        if workers > 1 and master_dir is None:
+            raise ValueError('Parallel builds need a master_dir')
+        if workers > 1 and glyph_workers > 1:
+            raise ValueError('Use either workers or glyph_workers')
+        if streaming:
+            if master_dir is None:
+                raise ValueError('Streaming builds need a master_dir')
+            if incremental or glyph_workers > 1:
+                raise ValueError('Streaming builds can\'t be incremental or '
+                                 'use glyph_workers')
+        prelude = self._prepare_masters()
+        masters = self.font.masters
+        workers = min(workers, len(masters))
+        if workers <= 1:
+            pool = None
+            if glyph_workers > 1:
+                pool = multiprocessing.Pool(
+                    glyph_workers, _init_master_worker, (self, prelude))
+            try:
+                for master in masters:
+                    if incremental:
+                        ufo = self.ufo_module.Font(
+                            self.to_ufo_master_incremental(
+                                master, prelude, master_dir, pool))
+                    elif streaming:
+                        ufo = self.ufo_module.Font(
+                            self.to_ufo_master_streaming(
+                                master, prelude, master_dir))
+                    else:
+                        ufo = self._build_master(master, prelude, pool=pool)
+                        if master_dir is not None:
+                            ufo = self.ufo_module.Font(
+                                write_ufo(ufo, master_dir))
+                    yield ufo
+                    # Don't keep the UFO alive while building the next one.
+                    del ufo
+                if pool is not None:
+                    pool.close()
+            finally:
+                if pool is not None:
+                    pool.terminate()
+                    pool.join()
+            return
+
+        # Forked workers inherit the builder; others get a pickled copy once.
+        pool = multiprocessing.Pool(
+            workers, _init_master_worker, (self, prelude))
+        try:
+            jobs = [(index, master_dir, incremental, streaming)
+                    for index in range(len(masters))]
+            for path in pool.imap(_build_master_in_worker, jobs):
+                ufo = self.ufo_module.Font(path)
+                yield ufo
+                del ufo
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _prepare_masters(self):
+        """Return the _MastersPrelude shared by all masters."""
+        kerning_groups = {}
+        # The layers to build for each master, and the background data from
+        # "associated layers"
+        master_layers = OrderedDict(
+            (master.id, []) for master in self.font.masters)
+        supplementary_layer_data = OrderedDict(
+            (master.id, []) for master in self.font.masters)
         for glyph in self.font.glyphs:
             self.to_ufo_glyph_groups(kerning_groups, glyph)
+            # Resolved here once, rather than in each worker process.
+            self.glyph_info(glyph.name)
             glyph_name = glyph.name
-            if glyph_name not in sorted_glyphset:
-                # glyphs not listed in the 'glyphOrder' custom parameter but still
-                # in the font are appended after the listed glyphs, in the order
-                # in which they appear in the source file
-                glyph_order.append(glyph_name)
-
             for layer in glyph.layers.values():
                 layer_id = layer.layerId
                 layer_name = layer.name
@@ -124,36 +236,140 @@ class UFOBuilder(object):
                 assoc_id = layer.associatedMasterId
                 if assoc_id != layer.layerId:
                     if layer_name is not None:
-                        supplementary_layer_data.append(
-                            (assoc_id, glyph_name, layer_name, layer))
+                        supplementary_layer_data[assoc_id].append(
+                            (glyph_name, layer_name, layer))
                     continue
+                master_layers[layer_id].append((glyph_name, layer, glyph))
 
-                ufo = self._ufos[layer_id]
-                ufo_glyph = ufo.newGlyph(glyph_name)
-                self.to_ufo_glyph(ufo_glyph, layer, glyph)
+        # get the 'glyphOrder' custom parameter as stored in the lib.plist.
+        # We assume it's the same for all ufos.
+        glyph_order = list(self._master_custom_param('glyphOrder') or [])
+        sorted_glyphset = set(glyph_order)
+        for glyph in self.font.glyphs:
+            # glyphs not listed in the 'glyphOrder' custom parameter but still
+            # in the font are appended after the listed glyphs, in the order
+            # in which they appear in the source file
+            if glyph.name not in sorted_glyphset:
+                glyph_order.append(glyph.name)
+
+        return _MastersPrelude(kerning_groups, master_layers,
+                               supplementary_layer_data, glyph_order)
+
+    def _master_custom_param(self, name):
+        """Return the value of a custom parameter that to_ufo_custom_params
+        puts in the UFO of the first master, without building it: the last
+        one of the master, or else of the font.
+        """
+        value = None
+        if self.font.masters:
+            for data in (self.font, self.font.masters[0]):
+                for param in data.customParameters:
+                    if normalize_custom_param_name(param.name) == name:
+                        value = param.value
+        return value
+
+    def _build_master(self, master, prelude, glyph_classes=None, pool=None):
+        """Build the UFO of one master from the _MastersPrelude.
+
+        glyph_classes is passed on to to_ufo_features. If pool is given, a
+        multiprocessing.Pool set up by _init_master_worker, the glyphs are
+        built in its processes (see _merge_glyph_chunks).
+        """
+        ufo = self.to_ufo_master_attributes(master, self.family_name)
+        if pool is None:
+            self._build_glyphs(ufo, prelude.master_layers[master.id],
+                               prelude.supplementary_layer_data[master.id])
+        else:
+            self._merge_glyph_chunks(ufo, master.id, prelude, pool)
+
+        ufo.lib[PUBLIC_PREFIX + 'glyphOrder'] = prelude.glyph_order
+        if self.propagate_anchors:
+            self.to_ufo_propagate_font_anchors(ufo)
+        self.to_ufo_features(ufo, glyph_classes)
+        self.to_ufo_kerning_groups(ufo, prelude.kerning_groups)
+
+        kerning = self.font.kerning.get(master.id)
+        if kerning is not None:
+            self.to_ufo_kerning(ufo, kerning)
+        return ufo
+
+    def _build_glyphs(self, ufo, master_layers, supplementary_layer_data):
+        """Build glyphs into a UFO, from items of the master_layers and
+        supplementary_layer_data of a _MastersPrelude.
+        """
+        for glyph_name, layer, glyph in master_layers:
+            ufo_glyph = ufo.newGlyph(glyph_name)
+            self.to_ufo_glyph(ufo_glyph, layer, glyph)
 
-        for layer_id, glyph_name, layer_name, layer_data \
-                in supplementary_layer_data:
-            ufo_font = self._ufos[layer_id]
-            if layer_name not in ufo_font.layers:
-                ufo_layer = ufo_font.newLayer(layer_name)
+        for glyph_name, layer_name, layer_data in supplementary_layer_data:
+            if layer_name not in ufo.layers:
+                ufo_layer = ufo.newLayer(layer_name)
             else:
-                ufo_layer = ufo_font.layers[layer_name]
+                ufo_layer = ufo.layers[layer_name]
             ufo_glyph = ufo_layer.newGlyph(glyph_name)
             self.to_ufo_glyph(ufo_glyph, layer_data, layer_data.parent)
 
-        for ufo in self._ufos.values():
-            ufo.lib[glyphOrder_key] = glyph_order
-            if self.propagate_anchors:
-                self.to_ufo_propagate_font_anchors(ufo)
-            self.to_ufo_features(ufo)
-            self.to_ufo_kerning_groups(ufo, kerning_groups)
+    def _merge_glyph_chunks(self, ufo, master_id, prelude, pool):
+        """Build the glyphs of a master in the processes of pool, and add
+        them to its UFO.
 
-        for master_id, kerning in self.font.kerning.items():
-            self.to_ufo_kerning(self._ufos[master_id], kerning)
-
-        return self._ufos.values()
+        The glyphs are built in chunks of GLYPH_CHUNK_SIZE, each into a UFO
+        of its own, and sent back as GLIF data, which is read into the UFO
+        here in the order of the chunks, so that its layers come in the same
+        order as when the glyphs are built here. What depends on the other
+        glyphs, anchor propagation and the GDEF table, is left to the
+        caller.
+        """
+        jobs = []
+        for supplementary, items in (
+                (False, prelude.master_layers[master_id]),
+                (True, prelude.supplementary_layer_data[master_id])):
+            for start in range(0, len(items), GLYPH_CHUNK_SIZE):
+                jobs.append((master_id, supplementary, start,
+                             start + GLYPH_CHUNK_SIZE))
+
+        postscript_names_key = PUBLIC_PREFIX + 'postscriptNames'
+        for glyphs, postscript_names in pool.imap(_build_glyph_chunk, jobs):
+            for layer_name, glyph_name, glif in glyphs:
+                if layer_name is None:
+                    ufo_layer = ufo.layers.defaultLayer
+                elif layer_name not in ufo.layers:
+                    ufo_layer = ufo.newLayer(layer_name)
+                else:
+                    ufo_layer = ufo.layers[layer_name]
+                ufo_glyph = ufo_layer.newGlyph(glyph_name)
+                readGlyphFromString(glif, ufo_glyph, ufo_glyph.getPointPen())
+            if postscript_names:
+                if postscript_names_key not in ufo.lib:
+                    ufo.lib[postscript_names_key] = dict()
+                ufo.lib[postscript_names_key].update(postscript_names)
+
+    def __getstate__(self):
+        # For worker processes that don't fork: modules can't be pickled.
+        state = self.__dict__.copy()
+        state['ufo_module'] = self.ufo_module.__name__
+        return state
+
+    def __setstate__(self, state):
+        state['ufo_module'] = importlib.import_module(state['ufo_module'])
+        self.__dict__.update(state)
+
+    def glyph_info(self, glyph_name):
+        """Return the GlyphData properties of a glyph (a glyphdata.Glyph).
+
+        They are resolved once for all glyphs of the font and shared between
+        all masters, and between building glyphs and the GDEF table.
+        """
+        from glyphsLib import glyphdata
 
+        if self._glyph_infos is None:
+            self._glyph_infos = glyphdata.get_glyphs(
+                (glyph.name for glyph in self.font.glyphs), self.glyph_data)
+        info = self._glyph_infos.get(glyph_name)
+        if info is None:
+            info = self._glyph_infos[glyph_name] = glyphdata.get_glyph(
+                glyph_name, self.glyph_data)
+        return info
 
     @property
     def instances(self):
@@ -179,12 +395,10 @@ class UFOBuilder(object):
                                            self._instance_family_name))
         instance_data = {'data': instances}
 
-        first_ufo = next(iter(self.masters))
-
         # the 'Variation Font Origin' is a font-wide custom parameter, thus it is
         # shared by all the master ufos; here we just get it from the first one
         varfont_origin_key = "Variation Font Origin"
-        varfont_origin = first_ufo.lib.get(GLYPHS_PREFIX + varfont_origin_key)
+        varfont_origin = self._master_custom_param(varfont_origin_key)
         if varfont_origin:
             instance_data[varfont_origin_key] = varfont_origin
         return instance_data
@@ -197,17 +411,72 @@ class UFOBuilder(object):
     from .components import to_ufo_draw_components
     from .custom_params import to_ufo_custom_params
     from .features import to_ufo_features
-    from .font import to_ufo_font_attributes
+    from .font import to_ufo_font_attributes, to_ufo_master_attributes
     from .glyph import (to_ufo_glyph, to_ufo_glyph_background,
                         to_ufo_glyph_libdata)
     from .guidelines import to_ufo_guidelines
+    from .incremental import to_ufo_master_incremental
     from .kerning import (to_ufo_kerning, to_ufo_glyph_groups,
                           to_ufo_kerning_groups)
     from .names import to_ufo_names
     from .paths import to_ufo_draw_paths
+    from .streaming import to_ufo_master_streaming
     from .user_data import to_ufo_family_user_data, to_ufo_master_user_data
 
 
+# The (builder, prelude) of a worker process that builds masters or chunks
+# of glyphs, see UFOBuilder.iter_masters.
+_master_worker_state = None
+
+
+def _init_master_worker(builder, prelude):
+    global _master_worker_state
+    _master_worker_state = (builder, prelude)
+
+
+def _build_master_in_worker(job):
+    """Build one master in a worker process and write it to master_dir.
+    Return the path of the written UFO.
+    """
+    index, master_dir, incremental, streaming = job
+    builder, prelude = _master_worker_state
+    master = builder.font.masters[index]
+    if incremental:
+        return builder.to_ufo_master_incremental(master, prelude, master_dir)
+    if streaming:
+        return builder.to_ufo_master_streaming(master, prelude, master_dir)
+    ufo = builder._build_master(master, prelude)
+    return write_ufo(ufo, master_dir)
+
+
+def _build_glyph_chunk(job):
+    """Build a chunk of the glyphs of a master in a worker process, see
+    UFOBuilder._merge_glyph_chunks.
+
+    Return the glyphs as (layer name, glyph name, GLIF data) tuples, with
+    None for the name of the default layer, and the production names that
+    go in the lib of the UFO.
+    """
+    master_id, supplementary, start, stop = job
+    builder, prelude = _master_worker_state
+    ufo = builder.ufo_module.Font()
+    if supplementary:
+        builder._build_glyphs(
+            ufo, (), prelude.supplementary_layer_data[master_id][start:stop])
+    else:
+        builder._build_glyphs(
+            ufo, prelude.master_layers[master_id][start:stop], ())
+
+    default_layer = ufo.layers.defaultLayer
+    glyphs = []
+    for layer in ufo.layers:
+        layer_name = None if layer is default_layer else layer.name
+        for glyph in layer:
+            glyphs.append((layer_name, glyph.name, writeGlyphToString(
+                glyph.name, glyph, glyph.drawPoints)))
+    return glyphs, ufo.lib.get(PUBLIC_PREFIX + 'postscriptNames')
+
+
 def filter_instances_by_family(instances, family_name=None):
     """Yield instances whose 'familyName' custom parameter is
     equal to 'family_name'.
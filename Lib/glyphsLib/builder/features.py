@@ -25,8 +25,11 @@ def autostr(automatic):
     return '# automatic\n' if automatic else ''
 
 
-def to_ufo_features(self, ufo):
-    """Write an UFO's OpenType feature file."""
+def to_ufo_features(self, ufo, glyph_classes=None):
+    """Write an UFO's OpenType feature file.
+
+    glyph_classes is passed on to _build_gdef.
+    """
 
     prefix_str = '\n\n'.join('# Prefix: %s\n%s%s' %
                              (prefix.name, autostr(prefix.automatic),
@@ -58,7 +61,7 @@ def to_ufo_features(self, ufo):
         lines.append('} %s;' % feature.name)
         feature_defs.append('\n'.join(lines))
     fea_str = '\n\n'.join(feature_defs)
-    gdef_str = _build_gdef(ufo)
+    gdef_str = _build_gdef(ufo, self.glyph_info, glyph_classes)
 
     # make sure feature text is a unicode string, for defcon
     full_text = '\n\n'.join(
@@ -66,55 +69,32 @@ def to_ufo_features(self, ufo):
     ufo.features.text = full_text if full_text.strip() else ''
 
 
-def _build_gdef(ufo):
-    """Build a table GDEF statement for ligature carets."""
-    from glyphsLib import glyphdata  # Expensive import
+def _build_gdef(ufo, glyph_info, glyph_classes=None):
+    """Build a table GDEF statement for ligature carets.
+
+    glyph_info returns the GlyphData properties of a glyph by name.
 
+    glyph_classes, if given, is a dict of the _glyph_gdef_class of glyphs by
+    name. Glyphs in it are not looked at again, and the classes of the
+    other glyphs are added to it.
+    """
+    if glyph_classes is None:
+        glyph_classes = {}
     bases, ligatures, marks, carets = set(), set(), set(), {}
-    category_key = GLYPHLIB_PREFIX + 'category'
-    subCategory_key = GLYPHLIB_PREFIX + 'subCategory'
-    for glyph in ufo:
-        has_attaching_anchor = False
-        for anchor in glyph.anchors:
-            name = anchor.name
-            if name and not name.startswith('_'):
-                has_attaching_anchor = True
-            if name and name.startswith('caret_') and 'x' in anchor:
-                carets.setdefault(glyph.name, []).append(round(anchor['x']))
-        lib = glyph.lib
-        glyphinfo = glyphdata.get_glyph(glyph.name)
-        # first check glyph.lib for category/subCategory overrides; else use
-        # global values from GlyphData
-        category = lib.get(category_key)
-        if category is None:
-            category = glyphinfo.category
-        subCategory = lib.get(subCategory_key)
-        if subCategory is None:
-            subCategory = glyphinfo.subCategory
-
-        # Glyphs.app assigns glyph classes like this:
-        #
-        # * Base: any glyph that has an attaching anchor
-        #   (such as "top"; "_top" does not count) and is neither
-        #   classified as Ligature nor Mark using the definitions below;
-        #
-        # * Ligature: if subCategory is "Ligature" and the glyph has
-        #   at least one attaching anchor;
-        #
-        # * Mark: if category is "Mark" and subCategory is either
-        #   "Nonspacing" or "Spacing Combining";
-        #
-        # * Compound: never assigned by Glyphs.app.
-        #
-        # https://github.com/googlei18n/glyphsLib/issues/85
-        # https://github.com/googlei18n/glyphsLib/pull/100#issuecomment-275430289
-        if subCategory == 'Ligature' and has_attaching_anchor:
-            ligatures.add(glyph.name)
-        elif category == 'Mark' and (subCategory == 'Nonspacing' or
-                                     subCategory == 'Spacing Combining'):
-            marks.add(glyph.name)
-        elif has_attaching_anchor:
-            bases.add(glyph.name)
+    for glyph_name in ufo.keys():
+        gdef_class = glyph_classes.get(glyph_name)
+        if gdef_class is None:
+            gdef_class = glyph_classes[glyph_name] = _glyph_gdef_class(
+                ufo[glyph_name], glyph_info)
+        glyph_class, caret_positions = gdef_class
+        if glyph_class == 'Ligature':
+            ligatures.add(glyph_name)
+        elif glyph_class == 'Mark':
+            marks.add(glyph_name)
+        elif glyph_class == 'Base':
+            bases.add(glyph_name)
+        if caret_positions:
+            carets[glyph_name] = caret_positions
     if not any((bases, ligatures, marks, carets)):
         return None
     lines = ['table GDEF {', '  # automatic']
@@ -132,3 +112,54 @@ def _build_gdef(ufo):
                      (glyph, ' '.join(unicode(p) for p in sorted(caretPos))))
     lines.append('} GDEF;')
     return '\n'.join(lines)
+
+
+def _glyph_gdef_class(glyph, glyph_info):
+    """Return the GDEF class of a UFO glyph, 'Base', 'Ligature', 'Mark' or
+    None, and the positions of its ligature carets.
+    """
+    category_key = GLYPHLIB_PREFIX + 'category'
+    subCategory_key = GLYPHLIB_PREFIX + 'subCategory'
+    carets = []
+    has_attaching_anchor = False
+    for anchor in glyph.anchors:
+        name = anchor.name
+        if name and not name.startswith('_'):
+            has_attaching_anchor = True
+        if name and name.startswith('caret_') and 'x' in anchor:
+            carets.append(round(anchor['x']))
+    lib = glyph.lib
+    glyphinfo = glyph_info(glyph.name)
+    # first check glyph.lib for category/subCategory overrides; else use
+    # global values from GlyphData
+    category = lib.get(category_key)
+    if category is None:
+        category = glyphinfo.category
+    subCategory = lib.get(subCategory_key)
+    if subCategory is None:
+        subCategory = glyphinfo.subCategory
+
+    # Glyphs.app assigns glyph classes like this:
+    #
+    # * Base: any glyph that has an attaching anchor
+    #   (such as "top"; "_top" does not count) and is neither
+    #   classified as Ligature nor Mark using the definitions below;
+    #
+    # * Ligature: if subCategory is "Ligature" and the glyph has
+    #   at least one attaching anchor;
+    #
+    # * Mark: if category is "Mark" and subCategory is either
+    #   "Nonspacing" or "Spacing Combining";
+    #
+    # * Compound: never assigned by Glyphs.app.
+    #
+    # https://github.com/googlei18n/glyphsLib/issues/85
+    # https://github.com/googlei18n/glyphsLib/pull/100#issuecomment-275430289
+    if subCategory == 'Ligature' and has_attaching_anchor:
+        return 'Ligature', carets
+    elif category == 'Mark' and (subCategory == 'Nonspacing' or
+                                 subCategory == 'Spacing Combining'):
+        return 'Mark', carets
+    elif has_attaching_anchor:
+        return 'Base', carets
+    return None, carets
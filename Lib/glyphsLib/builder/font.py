@@ -30,6 +30,15 @@ def to_ufo_font_attributes(self, family_name):
     Modifies the list of UFOs in the UFOBuilder (self) in-place.
     """
 
+    for master in self.font.masters:
+        self._ufos[master.id] = self.to_ufo_master_attributes(
+            master, family_name)
+
+
+def to_ufo_master_attributes(self, master, family_name):
+    """Generate the UFO of one master, with metadata loaded from .glyphs data.
+    """
+
     font = self.font
 
     # "date" can be missing; Glyphs.app removes it on saving if it's empty:
@@ -46,66 +55,63 @@ def to_ufo_font_attributes(self, family_name):
     manufacturer = font.manufacturer
     manufacturer_url = font.manufacturerURL
 
-    for master in font.masters:
-        ufo = self.ufo_module.Font()
-
-        if date_created is not None:
-            ufo.info.openTypeHeadCreated = date_created
-        ufo.info.unitsPerEm = units_per_em
-        ufo.info.versionMajor = version_major
-        ufo.info.versionMinor = version_minor
-
-        if copyright:
-            ufo.info.copyright = copyright
-        if designer:
-            ufo.info.openTypeNameDesigner = designer
-        if designer_url:
-            ufo.info.openTypeNameDesignerURL = designer_url
-        if manufacturer:
-            ufo.info.openTypeNameManufacturer = manufacturer
-        if manufacturer_url:
-            ufo.info.openTypeNameManufacturerURL = manufacturer_url
-
-        ufo.info.ascender = master.ascender
-        ufo.info.capHeight = master.capHeight
-        ufo.info.descender = master.descender
-        ufo.info.xHeight = master.xHeight
-
-        horizontal_stems = master.horizontalStems
-        vertical_stems = master.verticalStems
-        italic_angle = -master.italicAngle
-        if horizontal_stems:
-            ufo.info.postscriptStemSnapH = horizontal_stems
-        if vertical_stems:
-            ufo.info.postscriptStemSnapV = vertical_stems
-        if italic_angle:
-            ufo.info.italicAngle = italic_angle
-
-        width = master.width
-        weight = master.weight
-        if weight:
-            ufo.lib[GLYPHS_PREFIX + 'weight'] = weight
-        if width:
-            ufo.lib[GLYPHS_PREFIX + 'width'] = width
-        for number in ('', '1', '2', '3'):
-            custom_name = getattr(master, 'customName' + number)
-            if custom_name:
-                ufo.lib[GLYPHS_PREFIX + 'customName' + number] = custom_name
-            custom_value = getattr(master, 'customValue' + number)
-            if custom_value:
-                ufo.lib[GLYPHS_PREFIX + 'customValue' + number] = custom_value
-
-        self.to_ufo_names(ufo, master, family_name)
-        self.to_ufo_blue_values(ufo, master)
-        self.to_ufo_family_user_data(ufo)
-        self.to_ufo_master_user_data(ufo, master)
-        self.to_ufo_guidelines(ufo, master)
-        self.to_ufo_custom_params(ufo, master)
-
-        master_id = master.id
-        ufo.lib[GLYPHS_PREFIX + 'fontMasterID'] = master_id
-        # FIXME: (jany) in the future, yield this UFO (for memory, laze iter)
-        self._ufos[master_id] = ufo
+    ufo = self.ufo_module.Font()
+
+    if date_created is not None:
+        ufo.info.openTypeHeadCreated = date_created
+    ufo.info.unitsPerEm = units_per_em
+    ufo.info.versionMajor = version_major
+    ufo.info.versionMinor = version_minor
+
+    if copyright:
+        ufo.info.copyright = copyright
+    if designer:
+        ufo.info.openTypeNameDesigner = designer
+    if designer_url:
+        ufo.info.openTypeNameDesignerURL = designer_url
+    if manufacturer:
+        ufo.info.openTypeNameManufacturer = manufacturer
+    if manufacturer_url:
+        ufo.info.openTypeNameManufacturerURL = manufacturer_url
+
+    ufo.info.ascender = master.ascender
+    ufo.info.capHeight = master.capHeight
+    ufo.info.descender = master.descender
+    ufo.info.xHeight = master.xHeight
+
+    horizontal_stems = master.horizontalStems
+    vertical_stems = master.verticalStems
+    italic_angle = -master.italicAngle
+    if horizontal_stems:
+        ufo.info.postscriptStemSnapH = horizontal_stems
+    if vertical_stems:
+        ufo.info.postscriptStemSnapV = vertical_stems
+    if italic_angle:
+        ufo.info.italicAngle = italic_angle
+
+    width = master.width
+    weight = master.weight
+    if weight:
+        ufo.lib[GLYPHS_PREFIX + 'weight'] = weight
+    if width:
+        ufo.lib[GLYPHS_PREFIX + 'width'] = width
+    for number in ('', '1', '2', '3'):
+        custom_name = getattr(master, 'customName' + number)
+        if custom_name:
+            ufo.lib[GLYPHS_PREFIX + 'customName' + number] = custom_name
+        custom_value = getattr(master, 'customValue' + number)
+        if custom_value:
+            ufo.lib[GLYPHS_PREFIX + 'customValue' + number] = custom_value
+
+    self.to_ufo_names(ufo, master, family_name)
+    self.to_ufo_blue_values(ufo, master)
+    self.to_ufo_family_user_data(ufo)
+    self.to_ufo_master_user_data(ufo, master)
+    self.to_ufo_guidelines(ufo, master)
+    self.to_ufo_custom_params(ufo, master)
+
+    ufo.lib[GLYPHS_PREFIX + 'fontMasterID'] = master.id
+    return ufo
 
 
 def to_glyphs_font_attributes(self, ufo, master, is_initial):
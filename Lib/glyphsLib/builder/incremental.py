@@ -0,0 +1,272 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Incremental builds of master UFOs.
+
+The build cache of a master UFO records a digest of what the build of each
+glyph depends on: the glyph's layers in the master, its metadata, its
+GlyphData properties and, for anchor propagation, the same digest of its
+components. A digest of the font-level settings tells whether the cache
+can be used at all. The next build of the master only rebuilds the glyphs
+whose digest changed in the UFO on disk, and saves it in place, so that
+only their .glif files are written.
+
+The cache is kept in the data directory of the UFO, so that it goes away
+with the glyphs it describes whenever the UFO is written afresh, like by a
+build that is not incremental. Changes made to the UFO in place by other
+tools are not noticed.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import hashlib
+import json
+import logging
+import os
+
+from fontTools.misc.py23 import tobytes, unicode
+
+import glyphsLib
+from glyphsLib.classes import ContentEncoder, content_digest
+from glyphsLib.util import build_ufo_path, write_ufo
+from .constants import GLYPHLIB_PREFIX, PUBLIC_PREFIX
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['to_ufo_master_incremental']
+
+# Bump when the layout of the cache files changes.
+CACHE_FORMAT = 2
+
+
+def to_ufo_master_incremental(self, master, prelude, master_dir, pool=None):
+    """Build the UFO of a master into master_dir, reusing the glyphs of
+    the previous build that did not change. Return the path of the UFO.
+
+    pool is passed on to _build_master when the whole master is built.
+    """
+    ufo = self.to_ufo_master_attributes(master, self.family_name)
+    path = build_ufo_path(master_dir, ufo.info.familyName, ufo.info.styleName)
+    cache = BuildCache(path)
+    settings = _settings_digest(self, master)
+    digests = _glyph_digests(self, master, prelude)
+
+    entries = cache.load(settings)
+    target = None
+    if entries is not None and os.path.isdir(path):
+        target = self.ufo_module.Font(path)
+        built = set(name for name, (_, gdef_class) in entries.items()
+                    if gdef_class is not None)
+        removed = set(entries).difference(digests)
+        if set(target.keys()) != built:
+            logger.info('%s does not match its build cache' % path)
+            target = None
+        elif any(component.name in removed
+                 for _, layer, _ in prelude.master_layers[master.id]
+                 for component in layer.components):
+            # defcon would read them back from the UFO on disk
+            logger.info('Removed glyphs are still used as components')
+            target = None
+
+    if target is None:
+        glyph_classes = {}
+        ufo = self._build_master(master, prelude, glyph_classes, pool)
+        write_ufo(ufo, master_dir, skip_unchanged=True)
+    else:
+        changed = set(name for name, digest in digests.items()
+                      if entries.get(name, (None,))[0] != digest)
+        stale = changed.union(removed)
+        logger.info('Updating %s: %d of %d glyphs changed' % (
+            path, len(stale), len(digests)))
+        glyph_classes = dict(
+            (name, gdef_class) for name, (_, gdef_class) in entries.items()
+            if gdef_class is not None and name not in stale)
+        _update_master(self, target, ufo, master, prelude, stale,
+                       glyph_classes)
+        target.save()
+
+    cache.save(settings, dict(
+        (name, (digest, glyph_classes.get(name)))
+        for name, digest in digests.items()))
+    return path
+
+
+def _update_master(self, target, ufo, master, prelude, stale,
+                   glyph_classes):
+    """Update the UFO of a previous build of a master in place.
+
+    ufo holds the font attributes of the master, built afresh; the glyphs
+    in stale are rebuilt or removed, and the font-level data is built
+    again from the glyphs.
+    """
+    postscript_names_key = PUBLIC_PREFIX + 'postscriptNames'
+    postscript_names = dict(
+        (name, value)
+        for name, value in target.lib.get(postscript_names_key, {}).items()
+        if name not in stale)
+
+    for layer in target.layers:
+        for glyph_name in stale.intersection(layer.keys()):
+            del layer[glyph_name]
+
+    info = dict.fromkeys(target.info.getDataForSerialization())
+    info.update(ufo.info.getDataForSerialization())
+    target.info.setDataFromSerialization(info)
+    target.clearGuidelines()
+    self.to_ufo_guidelines(target, master)
+    target.lib.clear()
+    target.lib.update(ufo.lib)
+    if postscript_names:
+        target.lib[postscript_names_key] = postscript_names
+    target.groups.clear()
+    target.kerning.clear()
+
+    for glyph_name, layer, glyph in prelude.master_layers[master.id]:
+        if glyph_name in stale:
+            ufo_glyph = target.newGlyph(glyph_name)
+            self.to_ufo_glyph(ufo_glyph, layer, glyph)
+
+    for glyph_name, layer_name, layer_data \
+            in prelude.supplementary_layer_data[master.id]:
+        if glyph_name not in stale:
+            continue
+        if layer_name not in target.layers:
+            ufo_layer = target.newLayer(layer_name)
+        else:
+            ufo_layer = target.layers[layer_name]
+        ufo_glyph = ufo_layer.newGlyph(glyph_name)
+        self.to_ufo_glyph(ufo_glyph, layer_data, layer_data.parent)
+
+    default_layer = target.layers.defaultLayer
+    for layer in list(target.layers):
+        if layer is not default_layer and not len(layer):
+            del target.layers[layer.name]
+
+    target.lib[PUBLIC_PREFIX + 'glyphOrder'] = prelude.glyph_order
+    if self.propagate_anchors:
+        self.to_ufo_propagate_font_anchors(
+            target, stale.intersection(target.keys()))
+    self.to_ufo_features(target, glyph_classes)
+    self.to_ufo_kerning_groups(target, prelude.kerning_groups)
+
+    kerning = self.font.kerning.get(master.id)
+    if kerning is not None:
+        self.to_ufo_kerning(target, kerning)
+
+
+def _settings_digest(self, master):
+    """Return a digest of what the build of all glyphs of a master depends
+    on besides the glyphs themselves.
+    """
+    encoder = ContentEncoder(content_digest)
+    for value in (CACHE_FORMAT, glyphsLib.__version__,
+                  self.ufo_module.__name__, self.propagate_anchors,
+                  master.id, list(self.font.customParameters)):
+        encoder.encode(value)
+    return _sha1(' '.join(encoder.parts))
+
+
+def _glyph_digests(self, master, prelude):
+    """Return a digest of what the build of each glyph in a master depends
+    on, by glyph name.
+    """
+    master_id = master.id
+
+    def layer_digest(layer):
+        # The layers of the other masters don't go into this one
+        if layer.associatedMasterId != master_id:
+            return ''
+        return layer.content_hash()
+
+    encoder = ContentEncoder(layer_digest)
+    own_digests = {}
+    for glyph in self.font.glyphs:
+        info = self.glyph_info(glyph.name)
+        # The content digest leaves out lastChange, which goes in the lib
+        own_digests[glyph.name] = ' '.join((
+            encoder.digest(glyph), unicode(glyph.lastChange),
+            info.production_name or '', info.category or '',
+            info.subCategory or ''))
+
+    # Propagated anchors come from the components, recursively.
+    component_names = {}
+    for glyph_name, layer, _ in prelude.master_layers[master_id]:
+        component_names[glyph_name] = [c.name for c in layer.components]
+
+    digests = {}
+
+    def glyph_digest(glyph_name, visiting):
+        digest = digests.get(glyph_name)
+        if digest is not None:
+            return digest
+        if glyph_name not in own_digests or glyph_name in visiting:
+            return ''
+        visiting.add(glyph_name)
+        parts = [own_digests[glyph_name]]
+        for component_name in component_names.get(glyph_name, ()):
+            parts.append(glyph_digest(component_name, visiting))
+        visiting.discard(glyph_name)
+        digest = digests[glyph_name] = _sha1(' '.join(parts))
+        return digest
+
+    for glyph_name in own_digests:
+        glyph_digest(glyph_name, set())
+    return digests
+
+
+def _sha1(text):
+    return hashlib.sha1(tobytes(text, encoding='utf-8')).hexdigest()
+
+
+class BuildCache(object):
+    """The build cache of a master UFO, a JSON file in the data directory of
+    the UFO.
+
+    It holds the settings digest of the last build, and the glyph digest
+    and _glyph_gdef_class of each glyph, by glyph name; the class is None
+    for glyphs without a layer in the master.
+    """
+
+    FILE_NAME = GLYPHLIB_PREFIX + 'buildCache.json'
+
+    def __init__(self, ufo_path):
+        self.path = os.path.join(ufo_path, 'data', self.FILE_NAME)
+
+    def load(self, settings):
+        """Return the glyph entries of the last build, or None if there
+        are none for these settings.
+        """
+        try:
+            with open(self.path) as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.get('settings') != settings:
+            return None
+        return dict(
+            (name, (digest, None if gdef_class is None else tuple(gdef_class)))
+            for name, (digest, gdef_class) in data['glyphs'].items())
+
+    def save(self, settings, entries):
+        """Record the settings and glyph entries of a build."""
+        data_dir = os.path.dirname(self.path)
+        if not os.path.isdir(data_dir):
+            os.makedirs(data_dir)
+        data = {'settings': settings, 'glyphs': entries}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as fp:
+            json.dump(data, fp)
+        # Replaces any previous cache file in one step.
+        os.rename(temp_path, self.path)
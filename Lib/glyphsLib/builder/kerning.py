@@ -18,6 +18,8 @@ from __future__ import (print_function, division, absolute_import,
 import logging
 import re
 
+from glyphsLib.classes import kerning_rows
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +29,7 @@ def to_ufo_kerning(self, ufo, kerning_data):
     warning_msg = 'Non-existent glyph class %s found in kerning rules.'
     class_glyph_pairs = []
 
-    for left, pairs in kerning_data.items():
+    for left, pairs in kerning_rows(kerning_data):
         match = re.match(r'@MMK_L_(.+)', left)
         left_is_class = bool(match)
         if left_is_class:
@@ -35,7 +37,7 @@ def to_ufo_kerning(self, ufo, kerning_data):
             if left not in ufo.groups:
                 logger.warn(warning_msg % left)
                 continue
-        for right, kerning_val in pairs.items():
+        for right, kerning_val in pairs:
             match = re.match(r'@MMK_R_(.+)', right)
             right_is_class = bool(match)
             if right_is_class:
@@ -0,0 +1,302 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming builds of master UFOs.
+
+A streaming build writes the glyphs of a master to a UFO on disk one by
+one, straight from the GSLayers, with the GLIF writer of ufoLib. Each glyph
+is built into a _Glyph, a stand-in for a defcon glyph that only records
+what goes in its .glif file, written, and dropped: no defcon glyph,
+contour or point objects are made, and the glyphs of a master are never
+all in memory at once. The font-level data is built into a defcon font
+without glyphs, like in other builds, and written at the end.
+
+Anchor propagation works from an _AnchorIndex of the anchors and components
+of all glyphs of the master, made from the GSLayers up front, and the
+GDEF table from the _glyph_gdef_class of each glyph, taken as it is
+written.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict, namedtuple
+import logging
+
+from ufoLib import UFOWriter
+
+from glyphsLib.util import build_ufo_path, clean_ufo
+from .constants import PUBLIC_PREFIX
+from .features import _glyph_gdef_class
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['to_ufo_master_streaming']
+
+DEFAULT_LAYER_NAME = 'public.default'
+
+
+def to_ufo_master_streaming(self, master, prelude, master_dir):
+    """Write the UFO of a master into master_dir glyph by glyph, without
+    building it in memory first. Return the path of the UFO.
+    """
+    ufo = self.to_ufo_master_attributes(master, self.family_name)
+    path = build_ufo_path(master_dir, ufo.info.familyName, ufo.info.styleName)
+    logger.info('Writing %s' % path)
+    clean_ufo(path)
+    writer = UFOWriter(path)
+    font = _Font(writer, ufo)
+
+    master_layers = prelude.master_layers[master.id]
+    index = None
+    if self.propagate_anchors:
+        index = _AnchorIndex(master_layers)
+        self.to_ufo_propagate_font_anchors(index)
+
+    glyph_classes = {}
+    for glyph_name, layer, glyph in master_layers:
+        ufo_glyph = font.newGlyph(glyph_name)
+        self.to_ufo_glyph(ufo_glyph, layer, glyph)
+        if index is not None:
+            for anchor in index[glyph_name].propagated:
+                ufo_glyph.appendAnchor(anchor)
+        glyph_classes[glyph_name] = _glyph_gdef_class(
+            ufo_glyph, self.glyph_info)
+        font.write_glyphs()
+    del index
+
+    for glyph_name, layer_name, layer_data \
+            in prelude.supplementary_layer_data[master.id]:
+        if layer_name not in font.layers:
+            ufo_layer = font.newLayer(layer_name)
+        else:
+            ufo_layer = font.layers[layer_name]
+        ufo_glyph = ufo_layer.newGlyph(glyph_name)
+        self.to_ufo_glyph(ufo_glyph, layer_data, layer_data.parent)
+        font.write_glyphs()
+
+    ufo.lib[PUBLIC_PREFIX + 'glyphOrder'] = prelude.glyph_order
+    self.to_ufo_features(font, glyph_classes)
+    self.to_ufo_kerning_groups(ufo, prelude.kerning_groups)
+    kerning = self.font.kerning.get(master.id)
+    if kerning is not None:
+        self.to_ufo_kerning(ufo, kerning)
+
+    # In the order defcon writes them
+    for layer in font.layers.values():
+        layer.glyph_set.writeContents()
+        layer.glyph_set.writeLayerInfo(layer)
+    writer.writeLayerContents(list(font.layers))
+    writer.writeInfo(ufo.info)
+    writer.writeGroups(ufo.groups)
+    writer.writeKerning(ufo.kerning)
+    writer.writeLib(dict(ufo.lib))
+    if ufo.features.text is not None:
+        writer.writeFeatures(ufo.features.text)
+    return path
+
+
+class _Font(object):
+    """What to_ufo_glyph and to_ufo_features use of a defcon font, for a
+    UFO being written by a UFOWriter.
+
+    The lib and features are those of the defcon font with the font-level
+    data. The glyphs are written when write_glyphs is called, which
+    forgets them.
+    """
+
+    def __init__(self, writer, ufo):
+        self.writer = writer
+        self.lib = ufo.lib
+        self.features = ufo.features
+        self.layers = OrderedDict()
+        self.default_layer = self.newLayer(DEFAULT_LAYER_NAME)
+        self._glyph_names = []
+        self._new_glyphs = []
+
+    def newLayer(self, name):
+        glyph_set = self.writer.getGlyphSet(
+            layerName=name, defaultLayer=not self.layers)
+        layer = self.layers[name] = _Layer(self, name, glyph_set)
+        return layer
+
+    def newGlyph(self, name):
+        return self.default_layer.newGlyph(name)
+
+    def keys(self):
+        """Return the names of the glyphs written to the default layer."""
+        return self._glyph_names
+
+    def write_glyphs(self):
+        """Write the glyphs made since the last call."""
+        for glyph in self._new_glyphs:
+            glyph.layer.glyph_set.writeGlyph(
+                glyph.name, glyph, glyph.drawPoints)
+            if glyph.layer is self.default_layer:
+                self._glyph_names.append(glyph.name)
+        del self._new_glyphs[:]
+
+
+class _Layer(object):
+    """What to_ufo_glyph uses of a defcon layer, and the layer info that
+    glifLib writes.
+    """
+
+    color = None
+
+    def __init__(self, font, name, glyph_set):
+        self.font = font
+        self.name = name
+        self.glyph_set = glyph_set
+        self.lib = {}
+
+    def newGlyph(self, name):
+        glyph = _Glyph(name, self)
+        self.font._new_glyphs.append(glyph)
+        return glyph
+
+
+class _Glyph(object):
+    """What to_ufo_glyph sets on a defcon glyph, to be written by glifLib.
+
+    The outline is recorded as the calls to the point pen, and replayed by
+    drawPoints.
+    """
+
+    height = 0
+
+    def __init__(self, name, layer):
+        self.name = name
+        self.layer = layer
+        self.font = layer.font
+        self.width = 0
+        self.unicodes = []
+        self.note = None
+        self.lib = {}
+        self.anchors = []
+        self.guidelines = []
+        self._outline = []
+
+    @property
+    def unicode(self):
+        return self.unicodes[0] if self.unicodes else None
+
+    @unicode.setter
+    def unicode(self, value):
+        # Like defcon: the value becomes the first of the code points
+        unicodes = [code for code in self.unicodes if code != value]
+        if value is not None:
+            unicodes.insert(0, value)
+        self.unicodes = unicodes
+
+    def appendAnchor(self, anchor):
+        self.anchors.append(_Anchor(anchor))
+
+    def getPointPen(self):
+        return _RecordingPointPen(self._outline)
+
+    def drawPoints(self, pen):
+        for method, args, kwargs in self._outline:
+            getattr(pen, method)(*args, **kwargs)
+
+
+class _RecordingPointPen(object):
+    """A point pen that records the calls to it in a list."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def beginPath(self, **kwargs):
+        self.calls.append(('beginPath', (), kwargs))
+
+    def endPath(self):
+        self.calls.append(('endPath', (), {}))
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 **kwargs):
+        kwargs.update(segmentType=segmentType, smooth=smooth, name=name)
+        self.calls.append(('addPoint', (pt,), kwargs))
+
+    def addComponent(self, baseGlyphName, transformation, **kwargs):
+        self.calls.append(
+            ('addComponent', (baseGlyphName, transformation), kwargs))
+
+
+class _Anchor(dict):
+    """An anchor as glifLib writes it, a dict, that also has the attributes
+    of a defcon anchor read by the builder.
+    """
+
+    def __init__(self, anchorDict):
+        dict.__init__(self, anchorDict)
+
+    @property
+    def name(self):
+        return self.get('name')
+
+    @property
+    def x(self):
+        return self.get('x')
+
+    @property
+    def y(self):
+        return self.get('y')
+
+
+# A component in an _AnchorIndex, with the attributes of a defcon component
+# read by anchor propagation.
+_IndexComponent = namedtuple('_IndexComponent', ['baseGlyph',
+                                                 'transformation'])
+
+
+class _IndexGlyph(object):
+    """The anchors and components of a glyph in an _AnchorIndex."""
+
+    anchorClass = _Anchor
+
+    def __init__(self, name, anchors, components):
+        self.name = name
+        self.anchors = anchors
+        self.components = components
+        # The anchors added by anchor propagation
+        self.propagated = []
+
+    def appendAnchor(self, anchor):
+        self.anchors.append(anchor)
+        self.propagated.append(anchor)
+
+
+class _AnchorIndex(object):
+    """The anchors and components of the glyphs of a master, taken from
+    their GSLayers, for to_ufo_propagate_font_anchors to work on instead of
+    a defcon font.
+    """
+
+    def __init__(self, master_layers):
+        self._glyphs = OrderedDict()
+        for glyph_name, layer, _ in master_layers:
+            anchors = []
+            for anchor in layer.anchors:
+                x, y = anchor.position
+                anchors.append(_Anchor({'name': anchor.name, 'x': x, 'y': y}))
+            components = [_IndexComponent(component.name, component.transform)
+                          for component in layer.components]
+            self._glyphs[glyph_name] = _IndexGlyph(
+                glyph_name, anchors, components)
+
+    def keys(self):
+        return self._glyphs.keys()
+
+    def __getitem__(self, glyph_name):
+        return self._glyphs[glyph_name]
@@ -17,6 +17,12 @@
 
 from __future__ import print_function, unicode_literals
 import re, math, inspect
+import copy
+from array import array
+from itertools import groupby
+from operator import itemgetter
+import datetime
+import hashlib
 import traceback
 import uuid
 import logging
@@ -26,15 +32,25 @@ from glyphsLib.types import (
     readIntlist, writeIntlist, needsQuotes, feature_syntax_encode, baseType,
     encode_dict_as_string_for_gsnode, decode_dict_as_string_from_gsnode
 )
-from glyphsLib.parser import Parser
+from glyphsLib.parser import Parser, gc_paused
 from glyphsLib.writer import Writer
 from collections import OrderedDict
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 from fontTools.misc.py23 import unicode, basestring, UnicodeIO, unichr, open
 from glyphsLib.affine import Affine
 
 
 logger = logging.getLogger(__name__)
 
+# Comments and the glyph names and class references of feature code, and
+# glyph names that cannot be mistaken for ranges, see GSFont.subset
+_FEATURE_COMMENT_RE = re.compile(r"#.*")
+_FEATURE_NAME_RE = re.compile(r"@?[A-Za-z0-9_.][A-Za-z0-9_.\-]*")
+_PLAIN_GLYPH_NAME_RE = re.compile(r"[A-Za-z0-9_.]+$")
+
 __all__ = [
     "Glyphs",
     "GSFont",
@@ -191,6 +207,238 @@ def transformStructToScaleAndRotation(transform):
     return _sX, _sY, _R
 
 
+# Bounds are passed around as (left, bottom, right, top) tuples or None for
+# empty outlines, and turned into rect objects only by the public properties.
+IDENTITY_TRANSFORM = (1, 0, 0, 1, 0, 0)
+
+
+def union_bounds(bounds, other):
+    if bounds is None:
+        return other
+    if other is None:
+        return bounds
+    return (min(bounds[0], other[0]), min(bounds[1], other[1]),
+            max(bounds[2], other[2]), max(bounds[3], other[3]))
+
+
+def bounds_to_rect(bounds):
+    if bounds is not None:
+        left, bottom, right, top = bounds
+        return rect(point(left, bottom), point(right - left, top - bottom))
+
+
+def compose_transforms(outer, inner):
+    """Return the transform that applies `inner`, then `outer`."""
+    a, b, c, d, e, f = outer
+    return (a * inner[0] + c * inner[1], b * inner[0] + d * inner[1],
+            a * inner[2] + c * inner[3], b * inner[2] + d * inner[3],
+            a * inner[4] + c * inner[5] + e, b * inner[4] + d * inner[5] + f)
+
+
+def measure_paths(paths):
+    """Fill the bounds caches of many paths in one vectorized pass.
+
+    Does nothing if NumPy is not installed, the paths then get measured one
+    by one when their bounds are asked for. Paths that GSPath.segments cannot
+    split into lines and cubic curves are left alone as well.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return
+
+    measured = []
+    cubics, cubicPaths = [], []
+    lines, linePaths = [], []
+    for path in paths:
+        if path._bounds is not None:
+            continue
+        nodes = path._nodes
+        nodeCount = len(nodes)
+        pathCubics, pathLines = [], []
+        i = 0
+        while i < nodeCount:
+            nodeType = nodes[i].type
+            if nodeType == 'offcurve' and i + 2 < nodeCount:
+                for node in (nodes[i - 1], nodes[i], nodes[i + 1],
+                             nodes[i + 2]):
+                    pathCubics.extend(node.position.value)
+                i += 3
+            elif nodeType == 'line':
+                pathLines.extend(nodes[i - 1].position.value)
+                pathLines.extend(nodes[i].position.value)
+                i += 1
+            else:
+                break
+        if i < nodeCount or nodeCount == 0:
+            continue
+        index = len(measured)
+        measured.append(path)
+        cubics.extend(pathCubics)
+        cubicPaths.extend([index] * (len(pathCubics) // 8))
+        lines.extend(pathLines)
+        linePaths.extend([index] * (len(pathLines) // 4))
+    if not measured:
+        return
+
+    lows = numpy.full((len(measured), 2), numpy.inf)
+    highs = numpy.full((len(measured), 2), -numpy.inf)
+    if lines:
+        lines = numpy.array(lines, dtype=float).reshape(-1, 2, 2)
+        numpy.minimum.at(lows, linePaths, lines.min(axis=1))
+        numpy.maximum.at(highs, linePaths, lines.max(axis=1))
+    if cubics:
+        cubics = numpy.array(cubics, dtype=float).reshape(-1, 4, 2)
+        cubicLows, cubicHighs = _cubic_bounds(numpy, cubics)
+        numpy.minimum.at(lows, cubicPaths, cubicLows)
+        numpy.maximum.at(highs, cubicPaths, cubicHighs)
+    for path, low, high in zip(measured, lows.tolist(), highs.tolist()):
+        path._bounds = low[0], low[1], high[0], high[1]
+
+
+def _cubic_bounds(numpy, cubics):
+    """Return the lower left and upper right corners of the bounds of an
+    (n, 4, 2) array of cubic curves, like segment.bezierMinMax."""
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    lows = numpy.minimum(p0, p3)
+    highs = numpy.maximum(p0, p3)
+    # The extrema are at the roots of the derivative a t^2 + b t + c
+    a = -3 * p0 + 9 * p1 - 9 * p2 + 3 * p3
+    b = 6 * p0 - 12 * p1 + 6 * p2
+    c = 3 * p1 - 3 * p0
+    quadratic = numpy.abs(a) >= 1e-12
+    linear = ~quadratic & (numpy.abs(b) >= 1e-12)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        root = numpy.sqrt(b * b - 4 * c * a)
+        roots = (
+            numpy.where(quadratic, (-b + root) / (2 * a), numpy.nan),
+            numpy.where(quadratic, (-b - root) / (2 * a), numpy.nan),
+            numpy.where(linear, -c / b, numpy.nan),
+        )
+    for t in roots:
+        t = numpy.where((t > 0) & (t < 1), t, numpy.nan)
+        for axis in (0, 1):
+            # Like bezierMinMax, use both coordinates of every extremum
+            tAxis = t[:, axis:axis + 1]
+            mt = 1 - tAxis
+            values = (mt * mt * mt * p0 + 3 * mt * mt * tAxis * p1 +
+                      3 * mt * tAxis * tAxis * p2 +
+                      tAxis * tAxis * tAxis * p3)
+            lows = numpy.fmin(lows, values)
+            highs = numpy.fmax(highs, values)
+    return lows, highs
+
+
+def transform_bounds(matrix, bounds):
+    """Transform bounds by a matrix without rotation or skew."""
+    if bounds is None:
+        return None
+    a, b, c, d, e, f = matrix
+    left, bottom, right, top = bounds
+    x0, x1 = sorted((a * left + e, a * right + e))
+    y0, y1 = sorted((d * bottom + f, d * top + f))
+    return x0, y0, x1, y1
+
+
+class ObjectGraphCloner(object):
+    """Copy a graph of GSBase objects, for GSFont.clone.
+
+    Works like copy.deepcopy, with a memo so that parent links point into
+    the copy, but knows the few types a font is made of and leaves out
+    cached proxies, indexes and other caches, which are rebuilt on demand.
+
+    With `share_geometry`, point, rect and transform objects are not copied
+    but shared between the original and the copy. Default values shared by
+    all instances of a class stay shared, the writer tells them apart from
+    set values by identity.
+    """
+    # Values that can always be shared
+    SHARED_TYPES = (type(None), bool, int, float, str, unicode, bytes,
+                    datetime.datetime)
+
+    def __init__(self, share_geometry=True):
+        self.share_geometry = share_geometry
+        self.memo = {}
+        # How values of each type are cloned, see _kind_of
+        self._kinds = {}
+
+    def _kind_of(self, cls):
+        if issubclass(cls, (Proxy, ListIndex, FontBoundsCache)):
+            kind = "skip"
+        elif cls in self.SHARED_TYPES or (
+                self.share_geometry and issubclass(cls, (point, rect))):
+            kind = "share"
+        elif issubclass(cls, (point, rect)):
+            kind = "geometry"
+        elif issubclass(cls, GSBase):
+            kind = "object"
+            for default in cls._defaultsForName.values():
+                self.memo[id(default)] = default
+        else:
+            kind = "copy"
+        self._kinds[cls] = kind
+        return kind
+
+    def clone(self, value):
+        cls = type(value)
+        kind = self._kinds.get(cls) or self._kind_of(cls)
+        if kind == "share":
+            return value
+        try:
+            return self.memo[id(value)]
+        except KeyError:
+            pass
+        if kind == "object":
+            return self._clone_object(value)
+        if kind == "geometry":
+            return self._clone_geometry(value)
+        if cls is list:
+            result = self.memo[id(value)] = []
+            result.extend([self.clone(item) for item in value])
+            return result
+        if cls in (dict, OrderedDict):
+            result = self.memo[id(value)] = cls()
+            for key, item in value.items():
+                result[key] = self.clone(item)
+            return result
+        if cls is tuple:
+            return tuple(self.clone(item) for item in value)
+        return copy.deepcopy(value, self.memo)
+
+    def _clone_object(self, obj):
+        cls = type(obj)
+        if obj._tracking:
+            # Copies do not track their changes
+            cls = cls._untrackedClass
+        memo = self.memo
+        kinds = self._kinds
+        result = memo[id(obj)] = cls.__new__(cls)
+        skip = cls._cacheAttributes
+        state = result.__dict__
+        # The common cases are inlined, this runs once per node.
+        for key, value in obj.__dict__.items():
+            kind = kinds.get(type(value)) or self._kind_of(type(value))
+            if kind == "share":
+                state[key] = value
+            elif kind != "skip" and key not in skip:
+                copied = memo.get(id(value))
+                if copied is None:
+                    copied = self.clone(value)
+                state[key] = copied
+        return result
+
+    def _clone_geometry(self, value):
+        cls = type(value)
+        result = self.memo[id(value)] = cls.__new__(cls)
+        result.__dict__.update(value.__dict__)
+        # The writer recognizes unset values by the shared default list
+        if value.value is not cls.default:
+            result.value = list(value.value)
+        if getattr(value, "rect", None) is not None:
+            result.rect = self.clone(value.rect)
+        return result
+
+
 class GSApplication(object):
 
     def __init__(self):
@@ -209,23 +457,159 @@ class GSApplication(object):
 Glyphs = GSApplication()
 
 
+class LazyDefault(object):
+    """Class attribute that creates the default value of an attribute the
+    first time it is read from an instance and stores it on the instance.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name] = self.factory()
+        return value
+
+
+# Types whose default value can be shared by all instances
+IMMUTABLE_TYPES = (bool, int, float, str, unicode, bytes)
+
+
+def class_attribute(cls, name):
+    """Return the attribute `name` of `cls` without invoking descriptors."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+    return None
+
+
+def _defined_by_class(cls, name):
+    """Return whether `cls` or a base class defines the attribute `name`
+    itself, rather than as a default installed by _install_defaults."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return name not in klass.__dict__.get("_installedDefaults", ())
+    return False
+
+
+class _SharedDefault(object):
+    """Stands for the default value `name` that all objects of a GSBase
+    class share, in the pickled state of an object.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _shared_defaults(cls):
+    """Return the names of the mutable defaults of a GSBase class by id."""
+    defaults = cls.__dict__.get("_sharedDefaults")
+    if defaults is None:
+        defaults = dict(
+            (id(value), name)
+            for name, value in cls._defaultsForName.items()
+            if not isinstance(value, IMMUTABLE_TYPES))
+        cls._sharedDefaults = defaults
+    return defaults
+
+
 class GSBase(object):
     _classesForName = {}
     _defaultsForName = {}
     _wrapperKeysTranslate = {}
+    # Instance attributes holding caches, left out of copies and pickles
+    _cacheAttributes = frozenset()
+    # Whether __init__ installs the class defaults, see _install_defaults
+    _installsDefaults = True
+    # Whether the object reports the attributes set on it to the change
+    # tracker of its font, see ChangeTracker
+    _tracking = False
 
     def __init__(self):
-        for key in self._classesForName.keys():
+        cls = type(self)
+        setters = cls.__dict__.get("_defaultSetters")
+        if setters is None:
+            setters = cls._install_defaults()
+        for key, attribute, factory in setters:
             if not hasattr(self, key):
-                klass = self._classesForName[key]
-                if inspect.isclass(klass) and issubclass(klass, GSBase):
-                    value = []
-                elif key in self._defaultsForName:
-                    value = self._defaultsForName.get(key)
-                else:
-                    value = klass()
-                key = self._wrapperKeysTranslate.get(key, key)
-                setattr(self, key, value)
+                setattr(self, attribute, factory())
+
+    @classmethod
+    def _install_defaults(cls):
+        """Work out once per class how GSBase.__init__ sets the defaults.
+
+        Plain attributes get their default from the class: shared values
+        and immutable ones as class attributes, mutable ones through a
+        LazyDefault, so objects made by the parser only build the defaults
+        that the file does not set. Attributes that the class already
+        defines, like properties and proxies, are set on every instance
+        when missing, which returns (key, attribute, factory) tuples.
+        """
+        setters = []
+        installed = set()
+        for key, klass in cls._classesForName.items():
+            attribute = cls._wrapperKeysTranslate.get(key, key)
+            if inspect.isclass(klass) and issubclass(klass, GSBase):
+                factory = list
+            elif key in cls._defaultsForName:
+                value = cls._defaultsForName[key]
+                factory = lambda value=value: value
+            elif klass in IMMUTABLE_TYPES:
+                value = klass()
+                factory = lambda value=value: value
+            else:
+                factory = klass
+            if isinstance(class_attribute(cls, attribute), ProxyProperty):
+                # Reading a proxy always works, so the default is never set
+                continue
+            if (_defined_by_class(cls, key) or
+                    _defined_by_class(cls, attribute)):
+                setters.append((key, attribute, factory))
+                continue
+            if factory is list or factory is klass:
+                setattr(cls, attribute, LazyDefault(attribute, factory))
+            else:
+                setattr(cls, attribute, factory())
+            installed.add(attribute)
+        cls._installedDefaults = frozenset(installed)
+        cls._defaultSetters = tuple(setters)
+        return cls._defaultSetters
+
+    def __getstate__(self):
+        # Cached proxies point back at their owner, leave them out of copies.
+        # The writer tells default values apart by identity, so the shared
+        # defaults of the class are pickled by name.
+        defaults = _shared_defaults(type(self))
+        state = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, Proxy) or key in self._cacheAttributes:
+                continue
+            name = defaults.get(id(value))
+            state[key] = value if name is None else _SharedDefault(name)
+        return state
+
+    def __setstate__(self, state):
+        # Unpickling skips __init__, which installs the class defaults the
+        # first time; install them here so that the classes end up the same
+        # as in the pickling process.
+        cls = type(self)
+        if cls._installsDefaults and "_defaultSetters" not in cls.__dict__:
+            cls._install_defaults()
+        for key, value in state.items():
+            if isinstance(value, _SharedDefault):
+                state[key] = cls._defaultsForName[value.name]
+        self.__dict__.update(state)
+
+    def _record_change(self, key):
+        """Tell the change tracker of the font, if any, that the attribute
+        `key` changed. Objects that are part of a glyph, layer, master etc.
+        mark that one as changed, see ChangeTracker.
+        """
+        parent = getattr(self, "parent", None)
+        if isinstance(parent, GSBase):
+            parent._record_change(key)
 
     def __repr__(self):
         content = ""
@@ -276,6 +660,8 @@ class GSBase(object):
 
 
 class Proxy(object):
+    __slots__ = ("_owner",)
+
     def __init__(self, owner):
         self._owner = owner
 
@@ -313,7 +699,7 @@ class Proxy(object):
         return list(self)
 
     def __deepcopy__(self, memo):
-        return [x.copy() for x in self.values()]
+        return [copy.deepcopy(x, memo) for x in self]
 
     def setter(self, values):
         method = self.setterMethod()
@@ -329,6 +715,37 @@ class Proxy(object):
             raise TypeError
 
 
+class ProxyProperty(object):
+    """Attribute that gives access to a list or dict of its owner through a
+    Proxy.
+
+    The builder reads `layer.paths`, `glyph.layers` and friends millions of
+    times, so the proxy made on the first read is kept in the owner's
+    __dict__ and handed out again afterwards. Assigning to the attribute
+    goes through the proxy's `setter`.
+    """
+
+    def __init__(self, proxy_class):
+        self.proxy_class = proxy_class
+        self.cache_key = "_%s" % proxy_class.__name__
+
+    def __get__(self, owner, owner_class=None):
+        if owner is None:
+            return self
+        try:
+            return owner.__dict__[self.cache_key]
+        except KeyError:
+            proxy = owner.__dict__[self.cache_key] = self.proxy_class(owner)
+            return proxy
+
+    def __set__(self, owner, value):
+        proxy = owner.__dict__.get(self.cache_key)
+        if proxy is None:
+            # Don't cache a proxy just for setting, e.g. from __init__
+            proxy = self.proxy_class(owner)
+        proxy.setter(value)
+
+
 class LayersIterator:
     def __init__(self, owner):
         self.curInd = 0
@@ -384,6 +801,8 @@ class FontFontMasterProxy(Proxy):
         for master in Font.masters:
         ...
     """
+    __slots__ = ()
+
     def __getitem__(self, Key):
         if type(Key) == slice:
             return self.values().__getitem__(Key)
@@ -406,11 +825,13 @@ class FontFontMasterProxy(Proxy):
                 Key = self.__len__() + Key
             FontMaster.id = OldFontMaster.id
             self._owner._masters[Key] = FontMaster
+            track_new_objects(self._owner, FontMaster)
         elif isString(Key):
             OldFontMaster = self.__getitem__(Key)
             FontMaster.id = OldFontMaster.id
             Index = self._owner._masters.index(OldFontMaster)
             self._owner._masters[Index] = FontMaster
+            track_new_objects(self._owner, FontMaster)
         else:
             raise(KeyError)
 
@@ -431,6 +852,7 @@ class FontFontMasterProxy(Proxy):
         FontMaster.parent = self._owner
         FontMaster.id = str(uuid.uuid4()).upper()
         self._owner._masters.append(FontMaster)
+        track_new_objects(self._owner, FontMaster)
 
         # Cycle through all glyphs and append layer
         for glyph in self._owner.glyphs:
@@ -441,6 +863,7 @@ class FontFontMasterProxy(Proxy):
 
 
     def remove(self, FontMaster):
+        FontMaster._record_change("parent")
 
         # First remove all layers in all glyphs that reference this master
         for glyph in self._owner.glyphs:
@@ -453,6 +876,7 @@ class FontFontMasterProxy(Proxy):
     def insert(self, Index, FontMaster):
         FontMaster.parent = self._owner
         self._owner._masters.insert(Index, FontMaster)
+        track_new_objects(self._owner, FontMaster)
 
     def extend(self, FontMasters):
         for FontMaster in FontMasters:
@@ -461,6 +885,8 @@ class FontFontMasterProxy(Proxy):
     def setter(self, values):
         if isinstance(values, Proxy):
             values = list(values)
+        for m in self._owner._masters:
+            m._record_change("parent")
         self._owner._masters = values
         for m in self._owner._masters:
             m.parent = self._owner
@@ -474,6 +900,8 @@ class FontGlyphsProxy(Proxy):
         for glyph in Font.glyphs:
         ...
     """
+    __slots__ = ()
+
     def __getitem__(self, key):
         if type(key) == slice:
             return self.values().__getitem__(key)
@@ -484,9 +912,9 @@ class FontGlyphsProxy(Proxy):
 
         if isinstance(key, basestring):
             # by glyph name
-            for glyph in self._owner._glyphs:
-                if glyph.name == key:
-                    return glyph
+            glyph = self._glyph_for_name(key)
+            if glyph is not None:
+                return glyph
             # by string representation as u'ä'
             if len(key) == 1:
                 for glyph in self._owner._glyphs:
@@ -502,13 +930,17 @@ class FontGlyphsProxy(Proxy):
     def __setitem__(self, key, glyph):
         if type(key) is int:
             self._owner._setupGlyph(glyph)
+            replaced = self._owner._glyphs[key]
             self._owner._glyphs[key] = glyph
+            self._changed([replaced, glyph])
         else:
             raise KeyError  # TODO: add other access methods
 
     def __delitem__(self, key):
         if type(key) is int:
-            del(self._owner._glyph[key])
+            removed = self._owner._glyphs[key]
+            del(self._owner._glyphs[key])
+            self._changed([removed])
         else:
             raise KeyError  # TODO: add other access methods
 
@@ -530,11 +962,14 @@ class FontGlyphsProxy(Proxy):
     def append(self, glyph):
         self._owner._setupGlyph(glyph)
         self._owner._glyphs.append(glyph)
+        self._changed([glyph])
 
     def extend(self, objects):
+        objects = list(objects)
         for glyph in objects:
             self._owner._setupGlyph(glyph)
-        self._owner._glyphs.extend(list(objects))
+        self._owner._glyphs.extend(objects)
+        self._changed(objects)
 
     def __len__(self):
         return len(self._owner._glyphs)
@@ -542,6 +977,7 @@ class FontGlyphsProxy(Proxy):
     def setter(self, values):
         if isinstance(values, Proxy):
             values = list(values)
+        removed = self._owner._glyphs
         self._owner._glyphs = values
         for g in self._owner._glyphs:
             g.parent = self._owner
@@ -550,67 +986,224 @@ class FontGlyphsProxy(Proxy):
                         layer.associatedMasterId is None or
                         len(layer.associatedMasterId) == 0):
                     g._setupLayer(layer, layer.layerId)
+        self._changed(removed + list(values))
+
+    def _glyph_for_name(self, name):
+        glyphs = self._owner._glyphs
+        index = getattr(self._owner, "_glyphsIndex", None)
+        if index is None or not index.is_valid_for(glyphs):
+            index = self._owner._glyphsIndex = NamedObjectsIndex(glyphs)
+        position = index.positions.get(name)
+        if position is not None and glyphs[position].name == name:
+            return glyphs[position]
+        if position is not None:
+            # The list was changed behind our back, start over.
+            self._changed()
+            return self._glyph_for_name(name)
+        return None
+
+    def _changed(self, glyphs=()):
+        invalidate_name_index(self._owner, "_glyphs")
+        self._owner._geometry_changed()
+        if self._owner._tracking:
+            set_tracking(glyphs, True)
+            for glyph in glyphs:
+                self._owner._track_change("glyphs", glyph.name)
+
+
+class ListIndex(object):
+    """Base for lookup tables over an ordered list of objects.
+
+    The list stays the single source of truth, so the writer still sees the
+    objects in file order. An index is only valid for the very list object
+    it was built from, as long as that list keeps its length.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.length = len(objects)
+
+    def is_valid_for(self, objects):
+        return objects is self.objects and len(objects) == self.length
+
+
+class NamedObjectsIndex(ListIndex):
+    """Index an ordered list of named objects by name. Like in Glyphs.app,
+    a name that occurs more than once resolves to its first occurrence.
+    """
+
+    def __init__(self, objects):
+        super(NamedObjectsIndex, self).__init__(objects)
+        self.positions = {}
+        for position, obj in enumerate(objects):
+            self.positions.setdefault(obj.name, position)
+
 
+class ObjectPositionsIndex(ListIndex):
+    """Index an ordered list of objects by identity."""
 
-class FontClassesProxy(Proxy):
+    def __init__(self, objects):
+        super(ObjectPositionsIndex, self).__init__(objects)
+        self.positions = dict(
+            (id(obj), position) for position, obj in enumerate(objects))
+
+    def position(self, obj):
+        position = self.positions.get(id(obj))
+        if position is not None and self.objects[position] is obj:
+            return position
+        return None
+
+
+def invalidate_name_index(owner, objects_name):
+    """Drop the name index that `owner` keeps for its list `objects_name`."""
+    index_name = objects_name + "Index"
+    if owner is not None and getattr(owner, index_name, None) is not None:
+        setattr(owner, index_name, None)
+
+
+class NamedObjectsProxy(Proxy):
+    """The list of named objects stored in `_objects_name` on the owner.
+    You can access it with the index or the name.
+
+    Lookups by name go through a NamedObjectsIndex that is cached on the
+    owner and dropped whenever the list is changed through the proxy or one
+    of its objects is renamed.
+    """
+    __slots__ = ()
+    _objects_name = None
 
     def __getitem__(self, key):
         if isinstance(key, (slice, int)):
             return self.values().__getitem__(key)
-        if isinstance(key, (str, unicode)):
-            for index, klass in enumerate(self.values()):
-                if klass.name == key:
-                    return self.values()[index]
+        if isString(key):
+            position = self._position_for_name(key)
+            if position is not None:
+                return self.values()[position]
         raise KeyError
 
     def __setitem__(self, key, value):
         if isinstance(key, int):
             self.values()[key] = value
-            value._parent = self._owner
-        elif isinstance(key, (str, unicode)):
-            for index, klass in enumerate(self.values()):
-                if klass.name == key:
-                    self.values()[index] = value
-                    value._parent = self._owner
+        elif isString(key):
+            position = self._position_for_name(key)
+            if position is None:
+                raise KeyError
+            self.values()[position] = value
         else:
             raise KeyError
+        value._parent = self._owner
+        self._changed([value])
 
     def __delitem__(self, key):
         if isinstance(key, int):
+            removed = [self.values()[key]]
             del self.values()[key]
-        elif isinstance(key, (str, unicode)):
-            for index, klass in enumerate(self.values()):
-                if klass.name == key:
-                    del self.values()[index]
+        elif isString(key):
+            # Remove every object with this name, not only the first one.
+            if self._position_for_name(key) is None:
+                return
+            removed = [obj for obj in self.values() if obj.name == key]
+            self.values()[:] = [obj for obj in self.values()
+                                if obj.name != key]
+        else:
+            raise KeyError
+        self._changed(removed)
+
+    def __contains__(self, item):
+        if isString(item):
+            return self._position_for_name(item) is not None
+        return item in self.values()
 
     def append(self, item):
         self.values().append(item)
         item._parent = self._owner
+        self._changed([item])
 
     def insert(self, key, item):
         self.values().insert(key, item)
         item._parent = self._owner
+        self._changed([item])
 
     def extend(self, items):
         self.values().extend(items)
         for value in items:
             value._parent = self._owner
+        self._changed(items)
 
     def remove(self, item):
         self.values().remove(item)
+        self._changed([item])
 
     def values(self):
-        return self._owner._classes
+        return getattr(self._owner, self._objects_name)
 
     def setter(self, values):
         if isinstance(values, Proxy):
             values = list(values)
-        self._owner._classes = values
+        removed = getattr(self._owner, self._objects_name, None) or []
+        setattr(self._owner, self._objects_name, values)
         for value in values:
             value._parent = self._owner
+        self._changed(list(removed) + list(values))
+
+    def _name_index(self):
+        objects = self.values()
+        index = getattr(self._owner, self._objects_name + "Index", None)
+        if index is None or not index.is_valid_for(objects):
+            index = NamedObjectsIndex(objects)
+            setattr(self._owner, self._objects_name + "Index", index)
+        return index
+
+    def _position_for_name(self, name):
+        index = self._name_index()
+        position = index.positions.get(name)
+        if position is not None and index.objects[position].name != name:
+            # The list was changed behind our back, start over.
+            self._invalidate_name_index()
+            position = self._name_index().positions.get(name)
+        return position
+
+    def _invalidate_name_index(self):
+        invalidate_name_index(self._owner, self._objects_name)
+
+    def _changed(self, objects):
+        self._invalidate_name_index()
+        if self._owner._tracking:
+            set_tracking(objects, True)
+            for obj in objects:
+                obj._record_change("parent")
+            self._owner._record_change(self._objects_name[1:])
+
+
+class FontClassesProxy(NamedObjectsProxy):
+    """The list of OpenType classes. You can access it with the index or the
+    class name.
+    Usage:
+        Font.classes[index]
+        Font.classes[name]
+        for klass in Font.classes:
+        ...
+    """
+    __slots__ = ()
+    _objects_name = "_classes"
+
+
+class FontFeaturesProxy(NamedObjectsProxy):
+    """The list of OpenType features. You can access it with the index or
+    the feature tag; duplicate tags resolve to the first feature.
+    Usage:
+        Font.features[index]
+        Font.features[tag]
+        for feature in Font.features:
+        ...
+    """
+    __slots__ = ()
+    _objects_name = "_features"
 
 
 class GlyphLayerProxy(Proxy):
+    __slots__ = ()
+
     def __getitem__(self, key):
         self._ensureMasterLayers()
         if isinstance(key, slice):
@@ -642,7 +1235,9 @@ class GlyphLayerProxy(Proxy):
                 key = self.__len__() + key
             Layer = self.__getitem__(key)
             key = Layer.layerId
+        self._owner._layers[key]._record_change("parent")
         del(self._owner._layers[key])
+        self._owner._layers_changed()
 
     def __iter__(self):
         return LayersIterator(self._owner)
@@ -710,80 +1305,66 @@ class GlyphLayerProxy(Proxy):
     def plistArray(self):
         return list(self._owner._layers.values())
 
-class LayerAnchorsProxy(Proxy):
+class LayerAnchorsProxy(NamedObjectsProxy):
+    """The anchors of a layer. Like in Glyphs.app, anchor names are unique:
+    adding an anchor replaces any existing anchor with the same name.
+    """
+    __slots__ = ()
+    _objects_name = "_anchors"
 
     def __getitem__(self, key):
-        if isinstance(key, (slice, int)):
-            return self.values().__getitem__(key)
-        elif isinstance(key, (str, unicode)):
-            for i, a in enumerate(self._owner._anchors):
-                if a.name == key:
-                    return self._owner._anchors[i]
-        else:
-            raise KeyError
+        if isString(key):
+            position = self._position_for_name(key)
+            if position is not None:
+                return self._owner._anchors[position]
+            return None
+        return super(LayerAnchorsProxy, self).__getitem__(key)
 
     def __setitem__(self, key, anchor):
-        if isinstance(key, (str, unicode)):
+        if isString(key):
             anchor.name = key
-            for i, a in enumerate(self._owner._anchors):
-                if a.name == key:
-                    self._owner._anchors[i] = anchor
-                    return
-            anchor._parent = self._owner
-            self._owner._anchors.append(anchor)
+            self.append(anchor)
         else:
             raise TypeError
 
-    def __delitem__(self, key):
-        if isinstance(key, int):
-            del self._owner._anchors[key]
-        elif isinstance(key, (str, unicode)):
-            for i, a in enumerate(self._owner._anchors):
-                if a.name == key:
-                    self._owner._anchors[i]._parent = None
-                    del self._owner._anchors[i]
-                    return
-
-    def values(self):
-        return self._owner._anchors
-
     def append(self, anchor):
-        for i, a in enumerate(self._owner._anchors):
-            if a.name == anchor.name:
-                anchor._parent = self._owner
-                self._owner._anchors[i] = anchor
-                return
-        if anchor.name:
-            self._owner._anchors.append(anchor)
-        else:
+        if not anchor.name:
             raise ValueError("Anchor must have name")
+        anchor._parent = self._owner
+        position = self._position_for_name(anchor.name)
+        if position is not None:
+            self._owner._anchors[position] = anchor
+        else:
+            self._owner._anchors.append(anchor)
+        self._changed([anchor])
 
     def extend(self, anchors):
         for anchor in anchors:
-            anchor._parent = self._owner
-        self._owner._anchors.extend(anchors)
+            self.append(anchor)
 
     def remove(self, anchor):
-        if isinstance(anchor, (str, unicode)):
-            anchor = self.values()[anchor]
-        return self._owner._anchors.remove(anchor)
-
-    def insert(self, index, anchor):
-        anchor._parent = self._owner
-        self._owner._anchors.insert(index, anchor)
+        if isString(anchor):
+            anchor = self[anchor]
+        anchor._parent = None
+        super(LayerAnchorsProxy, self).remove(anchor)
 
     def __len__(self):
         return len(self._owner._anchors)
 
-    def setter(self, anchors):
-        if isinstance(anchors, Proxy):
-            anchors = list(anchors)
-        self._owner._anchors = anchors
-        for anchor in anchors:
-            anchor._parent = self._owner
-
 
 class IndexedObjectsProxy(Proxy):
+    """The list of objects stored in `_objects_name` on the owner.
+
+    `index()` goes through an ObjectPositionsIndex that is cached on the
+    owner and dropped whenever the list is changed through the proxy, so
+    that e.g. `GSNode.index` does not have to scan the whole path.
+
+    Proxies with `_changes_geometry` set also tell their owner that its
+    outline changed, so that cached segments and bounds are recomputed.
+    """
+    __slots__ = ()
+    _changes_geometry = False
+
     def __getitem__(self, key):
         if isinstance(key, (slice, int)):
             return self.values().__getitem__(key)
@@ -794,33 +1375,50 @@ class IndexedObjectsProxy(Proxy):
         if isinstance(key, int):
             self.values()[key] = value
             value._parent = self._owner
+            self._changed([value])
         else:
             raise KeyError
 
     def __delitem__(self, key):
         if isinstance(key, int):
             del self.values()[key]
+            self._changed()
         else:
             raise KeyError
 
+    def index(self, value):
+        positions = self._positions_index()
+        position = positions.position(value)
+        if position is None:
+            # Maybe the list was changed behind our back, start over.
+            self._invalidate_positions()
+            position = self._positions_index().position(value)
+            if position is None:
+                raise ValueError("%r is not in list" % (value,))
+        return position
+
     def values(self):
         return getattr(self._owner, self._objects_name)
 
     def append(self, value):
         self.values().append(value)
         value._parent = self._owner
+        self._changed([value])
 
     def extend(self, values):
         self.values().extend(values)
         for value in values:
             value._parent = self._owner
+        self._changed(values)
 
     def remove(self, value):
         self.values().remove(value)
+        self._changed()
 
     def insert(self, index, value):
         self.values().insert(index, value)
         value._parent = self._owner
+        self._changed([value])
 
     def __len__(self):
         return len(self.values())
@@ -829,16 +1427,41 @@ class IndexedObjectsProxy(Proxy):
         setattr(self._owner, self._objects_name, list(values))
         for value in self.values():
             value._parent = self._owner
+        self._changed()
+
+    def _positions_index(self):
+        objects = self.values()
+        index = getattr(self._owner, self._objects_name + "Positions", None)
+        if index is None or not index.is_valid_for(objects):
+            index = ObjectPositionsIndex(objects)
+            setattr(self._owner, self._objects_name + "Positions", index)
+        return index
+
+    def _changed(self, added=()):
+        self._invalidate_positions()
+        if self._changes_geometry:
+            self._owner._geometry_changed()
+        if self._owner._tracking:
+            set_tracking(added, True)
+            self._owner._record_change(self._objects_name[1:])
+
+    def _invalidate_positions(self):
+        if getattr(self._owner, self._objects_name + "Positions",
+                   None) is not None:
+            setattr(self._owner, self._objects_name + "Positions", None)
 
 
 class LayerPathsProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_paths"
+    _changes_geometry = True
 
     def __init__(self, owner):
         super(LayerPathsProxy, self).__init__(owner)
 
 
 class LayerHintsProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_hints"
 
     def __init__(self, owner):
@@ -846,13 +1469,16 @@ class LayerHintsProxy(IndexedObjectsProxy):
 
 
 class LayerComponentsProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_components"
+    _changes_geometry = True
 
     def __init__(self, owner):
         super(LayerComponentsProxy, self).__init__(owner)
 
 
 class LayerAnnotationProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_annotations"
 
     def __init__(self, owner):
@@ -860,6 +1486,7 @@ class LayerAnnotationProxy(IndexedObjectsProxy):
 
 
 class LayerGuideLinesProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_guides"
 
     def __init__(self, owner):
@@ -867,90 +1494,56 @@ class LayerGuideLinesProxy(IndexedObjectsProxy):
 
 
 class PathNodesProxy(IndexedObjectsProxy):
+    __slots__ = ()
     _objects_name = "_nodes"
+    _changes_geometry = True
 
     def __init__(self, owner):
         super(PathNodesProxy, self).__init__(owner)
 
 
-class CustomParametersProxy(Proxy):
+class CustomParametersProxy(NamedObjectsProxy):
+    """The list of custom parameters. Accessing it by name gives the value
+    of the first parameter with that name, like in Glyphs.app.
+    """
+    __slots__ = ()
+    _objects_name = "_customParameters"
+
     def __getitem__(self, key):
-        if isinstance(key, slice):
+        if isinstance(key, (slice, int)):
             return self.values().__getitem__(key)
-        if isinstance(key, int):
-            return self._owner._customParameters[key]
-        else:
-            customParameter = self._get_parameter_by_key(key)
-            if customParameter is not None:
-                return customParameter.value
+        customParameter = self._get_parameter_by_key(key)
+        if customParameter is not None:
+            return customParameter.value
         return None
 
     def _get_parameter_by_key(self, key):
-        for customParameter in self._owner._customParameters:
-            if customParameter.name == key:
-                return customParameter
+        position = self._position_for_name(key)
+        if position is not None:
+            return self._owner._customParameters[position]
 
     def __setitem__(self, key, value):
         customParameter = self._get_parameter_by_key(key)
         if customParameter is not None:
             customParameter.value = value
         else:
-            parameter = GSCustomParameter(name=key, value=value)
-            self._owner._customParameters.append(parameter)
-
-    def __delitem__(self, key):
-        if isinstance(key, int):
-            del self._owner._customParameters[key]
-        elif isinstance(key, basestring):
-            for parameter in self._owner._customParameters:
-                if parameter.name == key:
-                    self._owner._customParameters.remove(parameter)
-        else:
-            raise KeyError
-
-    def __contains__(self, item):
-        if isString(item):
-            return self._owner.__getitem__(item) is not None
-        return item in self._owner._customParameters
+            self.append(GSCustomParameter(name=key, value=value))
 
     def __iter__(self):
         for index in range(len(self._owner._customParameters)):
             yield self._owner._customParameters[index]
 
-    def append(self, parameter):
-        parameter.parent = self._owner
-        self._owner._customParameters.append(parameter)
-
-    def extend(self, parameters):
-        for parameter in parameters:
-            parameter.parent = self._owner
-        self._owner._customParameters.extend(parameters)
-
     def remove(self, parameter):
         if isString(parameter):
-            parameter = self.__getitem__(parameter)
-        self._owner._customParameters.remove(parameter)
-
-    def insert(self, index, parameter):
-        parameter.parent = self._owner
-        self._owner._customParameters.insert(index, parameter)
+            parameter = self._get_parameter_by_key(parameter)
+        super(CustomParametersProxy, self).remove(parameter)
 
     def __len__(self):
         return len(self._owner._customParameters)
 
-    def values(self):
-        return self._owner._customParameters
-
-    def __setter__(self, parameters):
-        for parameter in parameters:
-            parameter.parent = self._owner
-        self._owner._customParameters = parameters
-
-    def setterMethod(self):
-        return self.__setter__
-
 
 class UserDataProxy(Proxy):
+    __slots__ = ()
 
     def __getitem__(self, key):
         if self._owner._userData is None:
@@ -962,10 +1555,12 @@ class UserDataProxy(Proxy):
             self._owner._userData[key] = value
         else:
             self._owner._userData = {key: value}
+        self._changed()
 
     def __delitem__(self, key):
         if self._owner._userData is not None and key in self._owner._userData:
             del self._owner._userData[key]
+            self._changed()
 
     def __contains__(self, item):
         if self._owner._userData is None:
@@ -995,9 +1590,16 @@ class UserDataProxy(Proxy):
 
     def setter(self, values):
         self._owner._userData = values
+        self._changed()
+
+    def _changed(self):
+        if self._owner._tracking:
+            self._owner._record_change("userData")
 
 
 class GSCustomParameter(GSBase):
+    # __init__ does not call GSBase.__init__, see GSBase.__setstate__
+    _installsDefaults = False
     _classesForName = {
         "name": unicode,
         "value": None,
@@ -1049,6 +1651,8 @@ class GSCustomParameter(GSBase):
     _CUSTOM_DICT_PARAMS = frozenset((
         'GASP Table'))
 
+    _parent = None
+
     def __init__(self, name="New Value", value="New Parameter"):
         self.name = name
         self.value = value
@@ -1057,6 +1661,27 @@ class GSCustomParameter(GSBase):
         return "<%s %s: %s>" % \
             (self.__class__.__name__, self.name, self._value)
 
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, value):
+        self._parent = value
+
+    def _record_change(self, key):
+        if self._parent is not None:
+            self._parent._record_change("customParameters")
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        invalidate_name_index(self._parent, "_customParameters")
+
     def plistValue(self):
         string = UnicodeIO()
         writer = Writer(string)
@@ -1087,6 +1712,8 @@ class GSCustomParameter(GSBase):
 
 
 class GSAlignmentZone(GSBase):
+    # __init__ does not call GSBase.__init__, see GSBase.__setstate__
+    _installsDefaults = False
 
     def __init__(self, pos=0, size=20):
         self.position = pos
@@ -1226,6 +1853,13 @@ class GSFontMaster(GSBase):
         return '<GSFontMaster "%s" width %s weight %s>' % \
             (self.name, self.widthValue, self.weightValue)
 
+    def _record_change(self, key):
+        font = getattr(self, "parent", None)
+        master_id = getattr(self, "id", None)
+        # A new master is only added once it has an ID
+        if font is not None and master_id:
+            font._track_change("masters", master_id)
+
     def shouldWriteValueForKey(self, key):
         if key in ("width", "weight"):
             if getattr(self, key) == "Regular":
@@ -1255,13 +1889,9 @@ class GSFontMaster(GSBase):
             name = " ".join(list(names))
         return name
 
-    customParameters = property(
-        lambda self: CustomParametersProxy(self),
-        lambda self, value: CustomParametersProxy(self).setter(value))
+    customParameters = ProxyProperty(CustomParametersProxy)
 
-    userData = property(
-        lambda self: UserDataProxy(self),
-        lambda self, value: UserDataProxy(self).setter(value))
+    userData = ProxyProperty(UserDataProxy)
 
     @property
     def weight(self):
@@ -1285,8 +1915,11 @@ class GSFontMaster(GSBase):
 
 
 class GSNode(GSBase):
-    _rx = '([-.e\d]+) ([-.e\d]+) (LINE|CURVE|QCURVE|OFFCURVE|n/a)'\
-          '(?: (SMOOTH))?(?: (\{.*\}))?'
+    # __init__ does not call GSBase.__init__, see GSBase.__setstate__
+    _installsDefaults = False
+    _rx = re.compile(
+        '([-.e\\d]+) ([-.e\\d]+) (LINE|CURVE|QCURVE|OFFCURVE|n/a)'
+        '(?: (SMOOTH))?(?: (\\{.*\\}))?')
     MOVE = "move"
     LINE = "line"
     CURVE = "curve"
@@ -1296,12 +1929,15 @@ class GSNode(GSBase):
 
     def __init__(self, position=(0, 0), nodetype=LINE,
                  smooth=False, name=None):
-        self.position = point(position[0], position[1])
-        self.type = nodetype
-        self.smooth = smooth
-        self._parent = None
-        self._userData = None
-        self.name = name
+        # A new node has no path to notify, skip the property setters
+        state = self.__dict__
+        state["_position"] = point(position[0], position[1])
+        state["_type"] = nodetype
+        state["smooth"] = smooth
+        state["_parent"] = None
+        state["_userData"] = None
+        if name is not None:
+            self.name = name
 
     def __repr__(self):
         content = self.type
@@ -1311,14 +1947,35 @@ class GSNode(GSBase):
             (self.__class__.__name__, self.position.x, self.position.y,
              content)
 
-    userData = property(
-        lambda self: UserDataProxy(self),
-        lambda self, value: UserDataProxy(self).setter(value))
+    userData = ProxyProperty(UserDataProxy)
 
     @property
     def parent(self):
         return self._parent
 
+    # Moving a node or changing its type changes the segments of its path.
+    # Changing the coordinates of `position` in place is not noticed, assign
+    # a new point instead or call GSPath.invalidate_bounds afterwards.
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        if self._parent is not None:
+            self._parent._geometry_changed()
+
+    @property
+    def type(self):
+        return self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = value
+        if self._parent is not None:
+            self._parent._geometry_changed()
+
     def plistValue(self):
         content = self.type.upper()
         if self.smooth:
@@ -1334,10 +1991,14 @@ class GSNode(GSBase):
              content)
 
     def read(self, line):
-        m = re.match(self._rx, line).groups()
-        self.position = point(float(m[0]), float(m[1]))
-        self.type = m[2].lower()
-        self.smooth = bool(m[3])
+        m = self._rx.match(line).groups()
+        state = self.__dict__
+        state["_position"] = point(float(m[0]), float(m[1]))
+        state["_type"] = m[2].lower()
+        state["smooth"] = bool(m[3])
+        if self._parent is not None:
+            self._parent._geometry_changed()
+            self._record_change("position")
 
         # TODO: Use proper string parsing used in other classes
         if m[4] is not None and len(m[4]) > 0:
@@ -1349,15 +2010,15 @@ class GSNode(GSBase):
 
     @property
     def name(self):
-        if "name" in self.userData:
-            return self.userData["name"]
+        if self._userData is not None and "name" in self._userData:
+            return self._userData["name"]
         return None
 
     @name.setter
     def name(self, value):
         if value is None:
-            if "name" in self.userData:
-                del(self.userData["name"])
+            if self._userData is not None and "name" in self._userData:
+                del(self._userData["name"])
         else:
             self.userData["name"] = value
 
@@ -1369,20 +2030,22 @@ class GSNode(GSBase):
     @property
     def nextNode(self):
         assert self.parent
+        nodes = self.parent._nodes
         index = self.index
-        if index == (len(self.parent.nodes) - 1):
-            return self.parent.nodes[0]
-        elif index < len(self.parent.nodes):
-            return self.parent.nodes[index + 1]
+        if index == (len(nodes) - 1):
+            return nodes[0]
+        elif index < len(nodes):
+            return nodes[index + 1]
 
     @property
     def prevNode(self):
         assert self.parent
+        nodes = self.parent._nodes
         index = self.index
         if index == 0:
-            return self.parent.nodes[-1]
-        elif index < len(self.parent.nodes):
-            return self.parent.nodes[index - 1]
+            return nodes[-1]
+        elif index < len(nodes):
+            return nodes[index - 1]
 
     def makeNodeFirst(self):
         assert self.parent
@@ -1408,6 +2071,8 @@ class GSNode(GSBase):
 
 
 class GSPath(GSBase):
+    # __init__ does not call GSBase.__init__, see GSBase.__setstate__
+    _installsDefaults = False
     _classesForName = {
         "nodes": GSNode,
         "closed": bool
@@ -1416,9 +2081,14 @@ class GSPath(GSBase):
         "closed": True,
     }
     _parent = None
+    _segments = None
+    _bounds = None
+    _cacheAttributes = frozenset(("_segments", "_bounds"))
 
     def __init__(self):
         self._closed = True
+        self._segments = None
+        self._bounds = None
         self.nodes = []
 
     @property
@@ -1430,47 +2100,53 @@ class GSPath(GSBase):
             return True
         return super(GSPath, self).shouldWriteValueForKey(key)
 
-    nodes = property(
-        lambda self: PathNodesProxy(self),
-        lambda self, value: PathNodesProxy(self).setter(value))
+    nodes = ProxyProperty(PathNodesProxy)
+
+    def _geometry_changed(self):
+        """Drop the cached segments and bounds, called whenever the nodes
+        change."""
+        self._segments = None
+        self._bounds = None
+        if self._parent is not None:
+            self._parent._geometry_changed()
 
     @property
     def segments(self):
-        self._segments = []
-        self._segmentLength = 0
+        if self._segments is None:
+            self._segments = self._build_segments()
+        return self._segments
 
+    def _build_segments(self):
+        segments = []
+        nodes = self._nodes
+        nodeLength = len(nodes)
         nodeCount = 0
         segmentCount = 0
-        while nodeCount < len(self.nodes):
+        while nodeCount < nodeLength:
             newSegment = segment()
             newSegment.parent = self
             newSegment.index = segmentCount
 
-            if nodeCount == 0:
-                newSegment.appendNode(self.nodes[-1])
-            else:
-                newSegment.appendNode(self.nodes[nodeCount-1])
+            newSegment.appendNode(nodes[nodeCount - 1])
 
-            if self.nodes[nodeCount].type == 'offcurve':
-                newSegment.appendNode(self.nodes[nodeCount])
-                newSegment.appendNode(self.nodes[nodeCount+1])
-                newSegment.appendNode(self.nodes[nodeCount+2])
+            if nodes[nodeCount].type == 'offcurve':
+                newSegment.appendNode(nodes[nodeCount])
+                newSegment.appendNode(nodes[nodeCount+1])
+                newSegment.appendNode(nodes[nodeCount+2])
                 nodeCount += 3
-            elif self.nodes[nodeCount].type == 'line':
-                newSegment.appendNode(self.nodes[nodeCount])
+            elif nodes[nodeCount].type == 'line':
+                newSegment.appendNode(nodes[nodeCount])
                 nodeCount += 1
 
-            self._segments.append(newSegment)
-            self._segmentLength += 1
+            segments.append(newSegment)
             segmentCount += 1
 
-        self._segments
-        return self._segments
+        return segments
 
     @segments.setter
     def segments(self, value):
         if type(value) in (list, tuple):
-            self.setSegments(segments)
+            self.setSegments(value)
         else:
             raise TypeError
 
@@ -1484,6 +2160,23 @@ class GSPath(GSBase):
 
     @property
     def bounds(self):
+        return bounds_to_rect(self._cached_bounds())
+
+    def invalidate_bounds(self):
+        """Drop the cached segments and bounds of the path, and the bounds
+        of its layer and of the layers that use it as a component.
+
+        Only needed after changing the coordinates of node positions in
+        place, other changes are noticed.
+        """
+        self._geometry_changed()
+
+    def _cached_bounds(self):
+        if self._bounds is None:
+            self._bounds = self._compute_bounds()
+        return self._bounds
+
+    def _compute_bounds(self):
         left, bottom, right, top = None, None, None, None
         for segment in self.segments:
             newLeft, newBottom, newRight, newTop = segment.bbox()
@@ -1503,14 +2196,14 @@ class GSPath(GSBase):
                 top = newTop
             else:
                 top = max(top, newTop)
-        return rect(point(left, bottom), point(right - left, top - bottom))
+        if left is not None:
+            return left, bottom, right, top
 
     @property
     def direction(self):
         direction = 0
-        for i in range(len(self.nodes)):
-            thisNode = self.nodes[i]
-            nextNode = thisNode.nextNode
+        nodes = self._nodes
+        for thisNode, nextNode in zip(nodes, nodes[1:] + nodes[:1]):
             direction += (nextNode.position.x - thisNode.position.x) * (nextNode.position.y + thisNode.position.y)
         if direction < 0:
             return -1
@@ -1526,7 +2219,8 @@ class GSPath(GSBase):
         raise OnlyInGlyphsAppError
 
     def reverse(self):
-        segments = list(reversed(self.segments))
+        # Work on fresh segments, the cached ones may be held by callers.
+        segments = list(reversed(self._build_segments()))
         for s, segment in enumerate(segments):
             segment.nodes = list(reversed(segment.nodes))
             if s == len(segments) - 1:
@@ -1572,19 +2266,21 @@ class segment(list):
     def nextSegment(self):
         assert self.parent
         index = self.index
-        if index == (len(self.parent._segments) - 1):
-            return self.parent._segments[0]
-        elif index < len(self.parent._segments):
-            return self.parent._segments[index + 1]
+        segments = self.parent.segments
+        if index == (len(segments) - 1):
+            return segments[0]
+        elif index < len(segments):
+            return segments[index + 1]
 
     @property
     def prevSegment(self):
         assert self.parent
         index = self.index
+        segments = self.parent.segments
         if index == 0:
-            return self.parent._segments[-1]
-        elif index < len(self.parent._segments):
-            return self.parent._segments[index - 1]
+            return segments[-1]
+        elif index < len(segments):
+            return segments[index - 1]
 
     def bbox(self):
         if len(self) == 2:
@@ -1633,19 +2329,12 @@ class segment(list):
             if 0 < t2 and t2 < 1:
                 tvalues.append(t2)
 
-        for j in range(len(tvalues) - 1, -1, -1):
-            t = tvalues[j]
+        for t in tvalues:
             mt = 1 - t
             newxValue = (mt * mt * mt * x0) + (3 * mt * mt * t * x1) + (3 * mt * t * t * x2) + (t * t * t * x3)
-            if len(xvalues) > 0:
-                xvalues[j] = newxValue
-            else:
-                xvalues.append(newxValue)
+            xvalues.append(newxValue)
             newyValue = (mt * mt * mt * y0) + (3 * mt * mt * t * y1) + (3 * mt * t * t * y2) + (t * t * t * y3)
-            if len(yvalues) > 0:
-                yvalues[j] = newyValue
-            else:
-                yvalues.append(newyValue)
+            yvalues.append(newyValue)
 
         xvalues.append(x0)
         xvalues.append(x3)
@@ -1680,7 +2369,7 @@ class GSComponent(GSBase):
             if scale != (1, 1) or offset != (0, 0):
                 xx, yy = scale
                 dx, dy = offset
-                self.transform = transform(xx, 0, 0, yy, dx, dy)
+                self.transform = glyphsLib.types.transform(xx, 0, 0, yy, dx, dy)
         else:
             self.transform = transform
 
@@ -1704,14 +2393,38 @@ class GSComponent(GSBase):
     def parent(self):
         return self._parent
 
+    # Changing what a component points to or how it is placed changes the
+    # outline of its layer.
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        if self._parent is not None:
+            self._parent._geometry_changed()
+
+    @property
+    def transform(self):
+        return self._transform
+
+    @transform.setter
+    def transform(self, value):
+        self._transform = value
+        if self._parent is not None:
+            self._parent._geometry_changed()
+
     # .position
     @property
     def position(self):
         return point(self.transform[4], self.transform[5])
     @position.setter
     def position(self, value):
-        self.transform[4] = value[0]
-        self.transform[5] = value[1]
+        # Assign a new transform, the current one may be the shared default.
+        values = list(self.transform.value)
+        values[4:6] = value[0], value[1]
+        self.transform = transform(*values)
 
     # .scale
     @property
@@ -1761,27 +2474,21 @@ class GSComponent(GSBase):
         return self.parent.parent.parent.glyphs[self.name].layers[self.parent.layerId]
 
     def applyTransformation(self, x, y):
-        x *= self.scale[0]
-        y *= self.scale[1]
-        x += self.position.x
-        y += self.position.y
-        # TODO:
-        # Integrate rotation
-        return x, y
+        """Return the point x, y of the component glyph transformed by the
+        whole transform of the component, rotation and skew included."""
+        a, b, c, d, e, f = self.transform.value
+        return a * x + c * y + e, b * x + d * y + f
 
     @property
     def bounds(self):
-        bounds = self.layer.bounds
-        if bounds is not None:
-            left, bottom, width, height = self.layer.bounds
-            right = left + width
-            top = bottom + height
-
-            left, bottom = self.applyTransformation(left, bottom)
-            right, top = self.applyTransformation(right, top)
-
-            if left is not None and bottom is not None and right is not None and top is not None:
-                return rect(point(left, bottom), point(right - left, top - bottom))
+        """The bounds of the transformed component glyph, or None when the
+        layer of the component is not in a font, in which the component
+        glyph could be looked up."""
+        layer = self.parent
+        font = layer._font() if layer is not None else None
+        if font is None:
+            return None
+        return bounds_to_rect(font._bounds_cache().component_bounds(self))
 
     smartComponentValues = property(
         lambda self: self.piece,
@@ -1836,6 +2543,15 @@ class GSAnchor(GSBase):
     def parent(self):
         return self._parent
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        invalidate_name_index(self._parent, "_anchors")
+
 
 class GSHint(GSBase):
     _classesForName = {
@@ -1930,12 +2646,10 @@ class GSHint(GSBase):
         """Find the path_index and node_index that identify the given node."""
         path = node.parent
         layer = path.parent
-        for path_index in range(len(layer.paths)):
-            if path == layer.paths[path_index]:
-                for node_index in range(len(path.nodes)):
-                    if node == path.nodes[node_index]:
-                        return point(path_index, node_index)
-        return None
+        try:
+            return point(layer.paths.index(path), path.nodes.index(node))
+        except ValueError:
+            return None
 
     @property
     def originNode(self):
@@ -2042,6 +2756,9 @@ class GSFeature(GSBase):
         "notes": unicode,
         "disabled": bool,
     }
+    _parent = None
+    # The list of the parent GSFont that holds this kind of object
+    _parent_objects_name = "_features"
 
     def __init__(self, name="xxxx", code=""):
         super(GSFeature, self).__init__()
@@ -2065,6 +2782,18 @@ class GSFeature(GSBase):
         self._code = code
     code = property(getCode, setCode)
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._parent is not None:
+            # The feature is gone under its old name
+            self._record_change("name")
+        self._name = value
+        invalidate_name_index(self._parent, self._parent_objects_name)
+
     def __repr__(self):
         return '<%s "%s">' % \
             (self.__class__.__name__, self.name)
@@ -2073,13 +2802,17 @@ class GSFeature(GSBase):
     def parent(self):
         return self._parent
 
+    def _record_change(self, key):
+        if self._parent is not None:
+            self._parent._track_change("features", self.name)
+
 
 class GSClass(GSFeature):
-    pass
+    _parent_objects_name = "_classes"
 
 
 class GSFeaturePrefix(GSFeature):
-    pass
+    _parent_objects_name = "_featurePrefixes"
 
 
 class GSAnnotation(GSBase):
@@ -2098,6 +2831,8 @@ class GSAnnotation(GSBase):
 
 
 class GSInstance(GSBase):
+    # __init__ does not call GSBase.__init__, see GSBase.__setstate__
+    _installsDefaults = False
     _classesForName = {
         "customParameters": GSCustomParameter,
         "exports": bool,
@@ -2160,9 +2895,12 @@ class GSInstance(GSBase):
         self.weightClass = "Regular"
         self._customParameters = []
 
-    customParameters = property(
-        lambda self: CustomParametersProxy(self),
-        lambda self, value: CustomParametersProxy(self).setter(value))
+    customParameters = ProxyProperty(CustomParametersProxy)
+
+    def _record_change(self, key):
+        font = getattr(self, "parent", None)
+        if font is not None:
+            font._track_change("instances", self.name)
 
     weightValue = property(
         lambda self: self.interpolationWeight,
@@ -2405,6 +3143,10 @@ class GSLayer(GSBase):
         "width",
     )
 
+    # Bumped whenever the paths, nodes or components of the layer change.
+    _generation = 0
+    parent = None
+
     def __init__(self):
         super(GSLayer, self).__init__()
         self._anchors = []
@@ -2463,33 +3205,19 @@ class GSLayer(GSBase):
     def name(self, value):
         self._name = value
 
-    anchors = property(
-        lambda self: LayerAnchorsProxy(self),
-        lambda self, value: LayerAnchorsProxy(self).setter(value))
+    anchors = ProxyProperty(LayerAnchorsProxy)
 
-    hints = property(
-        lambda self: LayerHintsProxy(self),
-        lambda self, value: LayerHintsProxy(self).setter(value))
+    hints = ProxyProperty(LayerHintsProxy)
 
-    paths = property(
-        lambda self: LayerPathsProxy(self),
-        lambda self, value: LayerPathsProxy(self).setter(value))
+    paths = ProxyProperty(LayerPathsProxy)
 
-    components = property(
-        lambda self: LayerComponentsProxy(self),
-        lambda self, value: LayerComponentsProxy(self).setter(value))
+    components = ProxyProperty(LayerComponentsProxy)
 
-    guides = property(
-        lambda self: LayerGuideLinesProxy(self),
-        lambda self, value: LayerGuideLinesProxy(self).setter(value))
+    guides = ProxyProperty(LayerGuideLinesProxy)
 
-    annotations = property(
-        lambda self: LayerAnnotationProxy(self),
-        lambda self, value: LayerAnnotationProxy(self).setter(value))
+    annotations = ProxyProperty(LayerAnnotationProxy)
 
-    userData = property(
-        lambda self: UserDataProxy(self),
-        lambda self, value: UserDataProxy(self).setter(value))
+    userData = ProxyProperty(UserDataProxy)
 
     @property
     def smartComponentPoleMapping(self):
@@ -2501,35 +3229,1248 @@ class GSLayer(GSBase):
     def smartComponentPoleMapping(self, value):
         self.userData["PartSelection"] = value
 
+    def _geometry_changed(self):
+        """Bump the generation of this layer and drop its bounds from the
+        bounds cache of its font."""
+        self._generation += 1
+        font = self._font()
+        if font is not None and font._boundsCache is not None:
+            font._boundsCache.layer_changed(self)
+
+    def invalidate_bounds(self):
+        """Drop the cached segments and bounds of the paths of the layer,
+        and the bounds of the layer and of the layers that use it as a
+        component.
+
+        Only needed after changing the coordinates of node positions in
+        place, other changes are noticed.
+        """
+        for path in self._paths:
+            path._segments = None
+            path._bounds = None
+        self._geometry_changed()
+
+    def _font(self):
+        if self.parent is not None:
+            return self.parent.parent
+
+    def content_hash(self):
+        """Return a hex digest of the content of the layer: its outline,
+        anchors, metrics and everything else that is saved with it.
+
+        Layers in a font memoize their digest, see GSFont.content_hash.
+        """
+        font = self._font()
+        if font is None:
+            return content_digest(self)
+        return font._digest_cache().layer_digest(self)
+
+    def _record_change(self, key):
+        font = self._font()
+        # A new layer is only added once it has an ID
+        if font is not None and self.layerId:
+            font._track_change("layers", (self.parent.name, self.layerId))
+            font._track_change("glyphs", self.parent.name)
+
     @property
     def bounds(self):
-        left, bottom, right, top = None, None, None, None
+        font = self._font()
+        if font is not None:
+            return bounds_to_rect(font._bounds_cache().layer_bounds(self))
+        # Components cannot be resolved without a font
+        bounds = None
+        for path in self._paths:
+            bounds = union_bounds(bounds, path._cached_bounds())
+        return bounds_to_rect(bounds)
+
+
+class FontBoundsCache(object):
+    """Bounds of the layers of a font, as (left, bottom, right, top) tuples.
+
+    Components are resolved depth first: every layer is measured once,
+    after the layers it uses as components, and the result is memoized
+    per layer. Components that rotate or skew are measured on their
+    transformed outline, the others by transforming the memoized bounds.
+
+    When the outline of a layer changes, the bounds of that layer and of
+    the layers that use it as a component, directly or not, are dropped.
+    Everything is dropped when the generation of the font changes, i.e.
+    after glyphs were added, removed or renamed or layers were added or
+    removed, which changes what components refer to. Paths keep their own
+    bounds, so starting over only costs the unions.
+    """
 
-        for item in self.paths.values() + self.components.values():
+    def __init__(self, font):
+        self.font = font
+        self.generation = font._generation
+        self.bounds = {}
+        # IDs of the layers whose bounds used each layer, by its ID
+        self.users = {}
+        self.visiting = set()
+
+    def layer_bounds(self, layer):
+        self._check_generation()
+        return self._layer_bounds(layer)
+
+    def component_bounds(self, component):
+        self._check_generation()
+        return self._component_bounds(component, IDENTITY_TRANSFORM)
+
+    def master_bounds(self, master_id):
+        """Return the bounds of the master layers of all glyphs, by name."""
+        self._check_generation()
+        result = OrderedDict()
+        for glyph in self.font._glyphs:
+            layer = glyph._layers.get(master_id)
+            if layer is not None:
+                result[glyph.name] = self._layer_bounds(layer)
+        return result
+
+    def layer_changed(self, layer):
+        """Drop the bounds of `layer` and of the layers that use it."""
+        todo = [id(layer)]
+        while todo:
+            key = todo.pop()
+            self.bounds.pop(key, None)
+            todo.extend(self.users.pop(key, ()))
+
+    def _check_generation(self):
+        if self.generation != self.font._generation:
+            self.bounds.clear()
+            self.users.clear()
+            self.generation = self.font._generation
+
+    def _layer_bounds(self, layer):
+        key = id(layer)
+        if key in self.bounds:
+            return self.bounds[key][1]
+        if key in self.visiting:
+            logger.warning("Cyclic component reference in %r", layer)
+            return None
+        self.visiting.add(key)
+        try:
+            bounds = None
+            for path in layer._paths:
+                bounds = union_bounds(bounds, path._cached_bounds())
+            for component in layer._components:
+                bounds = union_bounds(bounds, self._component_bounds(
+                    component, IDENTITY_TRANSFORM))
+        finally:
+            self.visiting.discard(key)
+        # Keep the layer alive while its id is used as a key
+        self.bounds[key] = (layer, bounds)
+        return bounds
+
+    def _component_bounds(self, component, matrix):
+        layer = self._component_layer(component)
+        if layer is None:
+            return None
+        self.users.setdefault(id(layer), set()).add(id(component.parent))
+        matrix = compose_transforms(matrix, component.transform.value)
+        if matrix[1] == 0 and matrix[2] == 0:
+            return transform_bounds(matrix, self._layer_bounds(layer))
+        return self._transformed_outline_bounds(layer, matrix)
+
+    def _transformed_outline_bounds(self, layer, matrix):
+        key = id(layer)
+        if key in self.visiting:
+            logger.warning("Cyclic component reference in %r", layer)
+            return None
+        self.visiting.add(key)
+        try:
+            a, b, c, d, e, f = matrix
+            bounds = None
+            for path in layer._paths:
+                for pathSegment in path.segments:
+                    transformed = segment(
+                        point(a * p.x + c * p.y + e, b * p.x + d * p.y + f)
+                        for p in pathSegment)
+                    bounds = union_bounds(bounds, transformed.bbox())
+            for component in layer._components:
+                bounds = union_bounds(
+                    bounds, self._component_bounds(component, matrix))
+        finally:
+            self.visiting.discard(key)
+        return bounds
+
+    def _component_layer(self, component):
+        """Return the layer of the component glyph matching the layer of the
+        component, falling back to its master layer."""
+        glyph = self.font.glyphs[component.name]
+        if glyph is None:
+            return None
+        layer = component.parent
+        referenced = glyph._layers.get(layer.layerId)
+        if referenced is None:
+            referenced = glyph._layers.get(layer.associatedMasterId)
+        return referenced
 
-            newLeft, newBottom, newWidth, newHeight = item.bounds
-            newRight = newLeft + newWidth
-            newTop = newBottom + newHeight
 
-            if left is None:
-                left = newLeft
-            else:
-                left = min(left, newLeft)
-            if bottom is None:
-                bottom = newBottom
-            else:
-                bottom = min(bottom, newBottom)
-            if right is None:
-                right = newRight
+def _tracking_setattr(self, key, value):
+    object.__setattr__(self, key, value)
+    # Objects set on a tracked object are part of its font
+    if (isinstance(value, _TRACKED_CONTAINERS) and key != "_parent" and
+            key not in self._cacheAttributes):
+        set_tracking(value, True)
+    # Private attributes are caches or are set by public setters
+    if key[0] != "_":
+        self._record_change(key)
+
+
+def _new_object(cls):
+    return cls.__new__(cls)
+
+
+def _untracked_reduce_ex(self, protocol):
+    # Copies and pickles of tracked objects are plain objects
+    reduced = object.__reduce_ex__(self, protocol)
+    return (_new_object, (self._untrackedClass,)) + tuple(reduced[2:])
+
+
+def tracking_class(cls):
+    """Return the subclass of the GSBase class `cls` that reports the
+    attributes set on its objects to the change tracker of their font.
+
+    It has the name of `cls`, and its objects are copied and pickled as
+    objects of `cls`.
+    """
+    tracking = cls.__dict__.get("_trackingClass")
+    if tracking is None:
+        tracking = type(cls)(str(cls.__name__), (cls,), {
+            "__module__": cls.__module__,
+            "__doc__": cls.__doc__,
+            "__setattr__": _tracking_setattr,
+            "__reduce_ex__": _untracked_reduce_ex,
+            "_tracking": True,
+            "_untrackedClass": cls,
+        })
+        cls._trackingClass = tracking
+    return tracking
+
+
+# Values that can hold glyphsLib objects, see set_tracking
+_TRACKED_CONTAINERS = (GSBase, list, tuple, dict)
+
+
+def set_tracking(value, tracking):
+    """Swap the class of the GSBase objects in `value`, and of the objects
+    they hold, for their tracking_class, or back with `tracking` False.
+
+    Parent links and caches are not followed, and neither are objects that
+    already track their changes or not, like the rest of a font that a
+    new object is added to.
+    """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, GSBase):
+            if value._tracking is tracking:
+                continue
+            cls = type(value)
+            value.__class__ = (tracking_class(cls) if tracking
+                               else cls._untrackedClass)
+            skip = cls._cacheAttributes
+            for key, item in value.__dict__.items():
+                if (isinstance(item, _TRACKED_CONTAINERS) and
+                        key != "_parent" and key != "parent" and
+                        key not in skip):
+                    stack.append(item)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+
+def track_new_objects(owner, objects):
+    """Make the objects just added to `owner` track their changes if the
+    objects of `owner` do."""
+    if owner is not None and owner._tracking:
+        set_tracking(objects, True)
+
+
+class ChangeTracker(object):
+    """Record which parts of a font changed, see GSFont.changes_since.
+
+    Changes are numbered and the tracker keeps the number of the last
+    change of each changed object, so it grows with the number of objects
+    that changed and not with the number of edits.
+
+    Most changes are reported by the same hooks that invalidate the caches
+    of the objects. Assigning attributes is noticed by swapping the class
+    of each object of the font for a tracking subclass, see set_tracking,
+    whose __setattr__ reports the change. Objects added to the font later
+    are swapped when the font takes them in, and the objects of untracked
+    fonts keep the plain object.__setattr__.
+    """
+    CATEGORIES = ("font", "glyphs", "layers", "masters", "kerning",
+                  "features", "instances")
+
+    def __init__(self):
+        self.sequence = 0
+        self.changed = dict((category, {}) for category in self.CATEGORIES)
+
+    @classmethod
+    def start(cls, font):
+        set_tracking(font, True)
+        return cls()
+
+    @classmethod
+    def stop(cls, font):
+        set_tracking(font, False)
+
+    def record(self, category, key):
+        self.sequence += 1
+        self.changed[category][key] = self.sequence
+
+    def changes_since(self, token):
+        if not 0 <= token <= self.sequence:
+            raise ValueError("Unknown change token: %r" % (token,))
+        return FontChanges(self.sequence, dict(
+            (category, set(key for key, sequence in changed.items()
+                           if sequence > token))
+            for category, changed in self.changed.items()))
+
+
+class FontChanges(object):
+    """What changed in a font since a token, as returned by
+    GSFont.changes_since.
+
+    - `font`: names of the changed attributes of the font itself
+    - `glyphs`: names of changed, added, removed or renamed glyphs
+    - `layers`: (glyph name, layer ID) of changed, added or removed layers
+    - `masters`: IDs of changed, added or removed masters
+    - `kerning`: (master ID, left key, right key) of changed kerning pairs
+    - `features`: names of changed features, classes and feature prefixes
+    - `instances`: names of changed instances
+
+    Removed objects are listed like changed ones. `token` marks the state
+    of the font when the changes were collected.
+    """
+
+    def __init__(self, token, changed):
+        self.token = token
+        for category, keys in changed.items():
+            setattr(self, category, keys)
+
+    def __bool__(self):
+        return any(getattr(self, category)
+                   for category in ChangeTracker.CATEGORIES)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, ", ".join(
+            "%s: %d" % (category, len(getattr(self, category)))
+            for category in ChangeTracker.CATEGORIES))
+
+
+class ContentEncoder(object):
+    """Canonical encoding of glyphsLib objects, for content digests.
+
+    Objects are encoded from the keys of their _classesForName like in
+    the writer, but without formatting, rounding or defaults, so two
+    objects get the same digest exactly when they have the same content.
+    Layers inside glyphs and glyphs inside fonts are encoded by their own
+    digest, which `digest_for` returns.
+    """
+    # Keys that tell when an object was edited, not what it contains
+    VOLATILE_KEYS = frozenset(("lastChange",))
+    # Encoding method of each type, see _encoder_for
+    _encoders = {}
+    # Encoded keys of each GSBase subclass, see _fields
+    _fields_cache = {}
+
+    def __init__(self, digest_for):
+        self.digest_for = digest_for
+        self.parts = []
+
+    def digest(self, obj):
+        """Return the hex digest of the content of `obj`."""
+        self.parts = []
+        self._encode_object(obj)
+        content = " ".join(self.parts).encode("utf-8")
+        return hashlib.sha1(content).hexdigest()
+
+    def encode(self, value):
+        cls = type(value)
+        encoder = self._encoders.get(cls) or self._encoder_for(cls)
+        encoder(self, value)
+
+    @classmethod
+    def _encoder_for(cls, value_type):
+        if value_type is bool:
+            encoder = cls._encode_bool
+        elif issubclass(value_type, (int, float)):
+            encoder = cls._encode_number
+        elif issubclass(value_type, basestring):
+            encoder = cls._encode_string
+        elif value_type is type(None):
+            encoder = cls._encode_none
+        elif issubclass(value_type, GSPath):
+            encoder = cls._encode_path
+        elif issubclass(value_type, GSNode):
+            encoder = cls._encode_node
+        elif issubclass(value_type, (GSLayer, GSGlyph)):
+            encoder = cls._encode_digest
+        elif issubclass(value_type, GSBase):
+            encoder = cls._encode_object
+        elif issubclass(value_type, UserDataProxy):
+            encoder = cls._encode_user_data
+        elif issubclass(value_type, KerningStore):
+            encoder = cls._encode_kerning
+        elif issubclass(value_type, dict):
+            encoder = cls._encode_dict
+        elif issubclass(value_type, (list, tuple, Proxy)):
+            encoder = cls._encode_list
+        elif issubclass(value_type, (point, rect, baseType)):
+            encoder = cls._encode_value
+        elif issubclass(value_type, datetime.datetime):
+            encoder = cls._encode_datetime
+        else:
+            encoder = cls._encode_text
+        cls._encoders[value_type] = encoder
+        return encoder
+
+    @classmethod
+    def _fields(cls, obj_type):
+        """Return the (key, attribute) pairs to encode for a GSBase
+        subclass. Lists behind proxies are read directly."""
+        fields = cls._fields_cache.get(obj_type)
+        if fields is not None:
+            return fields
+        fields = []
+        for key in sorted(obj_type._classesForName):
+            if key in cls.VOLATILE_KEYS:
+                continue
+            attribute = obj_type._wrapperKeysTranslate.get(key, key)
+            descriptor = class_attribute(obj_type, attribute)
+            if isinstance(descriptor, ProxyProperty):
+                proxy_class = descriptor.proxy_class
+                if issubclass(proxy_class,
+                              (IndexedObjectsProxy, NamedObjectsProxy)):
+                    attribute = proxy_class._objects_name
+                elif issubclass(proxy_class, UserDataProxy):
+                    attribute = "_userData"
+            fields.append((key, attribute))
+        fields = cls._fields_cache[obj_type] = tuple(fields)
+        return fields
+
+    def _encode_object(self, obj):
+        parts = self.parts
+        parts.append(type(obj).__name__)
+        parts.append("{")
+        for key, attribute in self._fields(type(obj)):
+            value = getattr(obj, attribute, None)
+            if value is None:
+                continue
+            parts.append(key)
+            self.encode(value)
+        parts.append("}")
+
+    def _encode_path(self, path):
+        # Inlined, there are more nodes than everything else together
+        parts = self.parts
+        nodes = path._nodes
+        parts.append("GSPath closed [" if path.closed else "GSPath open [")
+        try:
+            parts.extend([
+                "%r %r %s %d" % (
+                    float(node._position.value[0]),
+                    float(node._position.value[1]),
+                    node._type, bool(node.smooth))
+                for node in nodes])
+        except AttributeError:
+            # A tuple was assigned to the position of a node
+            parts.extend([
+                "%r %r %s %d" % (
+                    float(node.position[0]), float(node.position[1]),
+                    node._type, bool(node.smooth))
+                for node in nodes])
+        parts.append("]")
+        for index, node in enumerate(nodes):
+            if node._userData:
+                parts.append("userData %d" % index)
+                self.encode(node._userData)
+
+    def _encode_node(self, node):
+        x, y = node._position.value
+        self.parts.append("%r %r %s %d" % (
+            float(x), float(y), node._type, bool(node.smooth)))
+        if node._userData:
+            self.encode(node._userData)
+
+    def _encode_digest(self, obj):
+        self.parts.append(self.digest_for(obj))
+
+    def _encode_user_data(self, proxy):
+        self.encode(proxy._owner._userData)
+
+    def _encode_dict(self, value):
+        parts = self.parts
+        parts.append("{")
+        for key in sorted(value):
+            self.encode(key)
+            self.encode(value[key])
+        parts.append("}")
+
+    def _encode_kerning(self, kerning):
+        # Like the nested dicts the store stands for
+        parts = self.parts
+        parts.append("{")
+        for master_id in sorted(kerning):
+            self.encode(master_id)
+            parts.append("{")
+            for left, row in sorted(kerning.rows(master_id)):
+                self.encode(left)
+                parts.append("{")
+                for right, value in sorted(row):
+                    self.encode(right)
+                    self.encode(value)
+                parts.append("}")
+            parts.append("}")
+        parts.append("}")
+
+    def _encode_list(self, value):
+        encoders = self._encoders
+        self.parts.append("[")
+        for item in value:
+            cls = type(item)
+            encoder = encoders.get(cls) or self._encoder_for(cls)
+            encoder(self, item)
+        self.parts.append("]")
+
+    def _encode_value(self, value):
+        value = value.value
+        if type(value) is list:
+            # The coordinates of a point, rect or transform
+            self.parts.append("(%s)" % " ".join(
+                "N" if number is None else repr(float(number))
+                for number in value))
+        else:
+            self.encode(value)
+
+    def _encode_bool(self, value):
+        self.parts.append("T" if value else "F")
+
+    def _encode_number(self, value):
+        self.parts.append(repr(float(value)))
+
+    def _encode_string(self, value):
+        # Length prefixed, so that no string can look like other tokens
+        self.parts.append("%d:%s" % (len(value), value))
+
+    def _encode_none(self, value):
+        self.parts.append("N")
+
+    def _encode_datetime(self, value):
+        self.parts.append(value.isoformat())
+
+    def _encode_text(self, value):
+        self._encode_string(unicode(value))
+
+
+def content_digest(obj):
+    """Return the content digest of `obj` without any memoization."""
+    return ContentEncoder(content_digest).digest(obj)
+
+
+class FontDigestCache(object):
+    """Memoized content digests of the glyphs and layers of a font, see
+    GSFont.content_hash.
+
+    The cache keeps the font recording its changes (see ChangeTracker) and
+    drops the digests of everything that changed before it answers.
+    Digests are keyed like the changes, by glyph name and by glyph name and
+    layer ID, and also remember their object, so that a new glyph with an
+    old name is never mistaken for the old one.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.tracker = None
+        self.sequence = None
+        self.glyphs = {}
+        self.layers = {}
+
+    def layer_digest(self, layer):
+        self._sync()
+        return self.digest(layer)
+
+    def glyph_digest(self, glyph):
+        self._sync()
+        return self.digest(glyph)
+
+    def font_digest(self):
+        self._sync()
+        # Not memoized: kerning and instances are plain containers whose
+        # changes are not tracked.
+        with gc_paused():
+            return ContentEncoder(self.digest).digest(self.font)
+
+    def digest(self, obj):
+        if isinstance(obj, GSLayer):
+            memo, key = self.layers, (obj.parent.name, obj.layerId)
+        else:
+            memo, key = self.glyphs, obj.name
+        entry = memo.get(key)
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+        value = ContentEncoder(self.digest).digest(obj)
+        memo[key] = (obj, value)
+        return value
+
+    def _sync(self):
+        tracker = self.font._change_tracker()
+        if tracker is not self.tracker:
+            # Changes made while nothing was tracked cannot be told apart
+            self.glyphs.clear()
+            self.layers.clear()
+            self.tracker = tracker
+            self.sequence = tracker.sequence
+        elif tracker.sequence != self.sequence:
+            changes = tracker.changes_since(self.sequence)
+            for key in changes.layers:
+                self.layers.pop(key, None)
+            for name in changes.glyphs:
+                self.glyphs.pop(name, None)
+            self.sequence = tracker.sequence
+
+
+class KerningPairs(object):
+    """The kerning pairs of one master in a KerningStore.
+
+    Pairs are kept in the order they were added, as three flat arrays with
+    the numbers of the left and right keys and the values. The dict from
+    pairs to positions that single lookups need is only built on the first
+    lookup, and so is the dict from left keys to the positions of their
+    pairs that `row` needs. Removed pairs leave a NaN hole in the arrays,
+    which are compacted once half of them are holes.
+    """
+
+    def __init__(self):
+        self.lefts = array(str("i"))
+        self.rights = array(str("i"))
+        self.values = array(str("d"))
+        # Number of pairs of each left key, in the order of the rows
+        self.left_counts = OrderedDict()
+        # Whether the pairs of each left key follow each other
+        self.grouped = True
+        self.holes = 0
+        self._positions = None
+        self._rows = None
+
+    def __len__(self):
+        return len(self.values) - self.holes
+
+    def positions(self):
+        if self._positions is None:
+            lefts, rights, values = self.lefts, self.rights, self.values
+            self._positions = dict(
+                (lefts[i] << 32 | rights[i], i) for i in range(len(values))
+                if values[i] == values[i])
+        return self._positions
+
+    def row_positions(self):
+        if self._rows is None:
+            rows = self._rows = {}
+            for position, left in enumerate(self.lefts):
+                row = rows.get(left)
+                if row is None:
+                    rows[left] = [position]
+                else:
+                    row.append(position)
+        return self._rows
+
+    def row(self, left):
+        """Return [(right number, value), ...] for one left key."""
+        rights, values = self.rights, self.values
+        return [(rights[i], values[i])
+                for i in self.row_positions().get(left, ())
+                if values[i] == values[i]]
+
+    def value(self, left, right):
+        position = self.positions().get(left << 32 | right)
+        if position is not None:
+            return self.values[position]
+
+    def set_value(self, left, right, value):
+        positions = self.positions()
+        position = positions.get(left << 32 | right)
+        if position is not None:
+            self.values[position] = value
+        else:
+            self.append(left, right, value)
+
+    def append(self, left, right, value):
+        """Add a pair that is not there yet."""
+        if self._positions is not None:
+            self._positions[left << 32 | right] = len(self.values)
+        if self._rows is not None:
+            self._rows.setdefault(left, []).append(len(self.values))
+        count = self.left_counts.get(left)
+        if count is None:
+            self.left_counts[left] = 1
+        else:
+            self.left_counts[left] = count + 1
+            if self.grouped and self.lefts[-1] != left:
+                self.grouped = False
+        self.lefts.append(left)
+        self.rights.append(right)
+        self.values.append(value)
+
+    def remove(self, left, right):
+        position = self.positions().pop(left << 32 | right, None)
+        if position is None:
+            return False
+        self.values[position] = float("nan")
+        self.holes += 1
+        count = self.left_counts[left] - 1
+        if count:
+            self.left_counts[left] = count
+        else:
+            del self.left_counts[left]
+        if self.holes * 2 > len(self.values):
+            self.compact()
+        return True
+
+    def compact(self):
+        values = self.values
+        keep = [i for i in range(len(values)) if values[i] == values[i]]
+        self.lefts = array(str("i"), [self.lefts[i] for i in keep])
+        self.rights = array(str("i"), [self.rights[i] for i in keep])
+        self.values = array(str("d"), [values[i] for i in keep])
+        self.holes = 0
+        self._positions = None
+        self._rows = None
+
+    def rows(self):
+        """Yield (left number, [(right number, value), ...]) in the order
+        of the rows."""
+        triples = zip(self.lefts, self.rights, self.values)
+        if self.holes:
+            triples = [triple for triple in triples if triple[2] == triple[2]]
+        if self.grouped:
+            for left, row in groupby(triples, itemgetter(0)):
+                yield left, [(right, value) for _, right, value in row]
+            return
+        rows = OrderedDict((left, []) for left in self.left_counts)
+        for left, right, value in triples:
+            rows[left].append((right, value))
+        for row in rows.items():
+            yield row
+
+
+class KerningStore(MutableMapping):
+    """Compact kerning of all masters of a font, see GSFont.compact_kerning.
+
+    The left and right keys, glyph names and kerning groups, are numbered
+    once for all masters, and the pairs of each master are kept in a
+    KerningPairs, in arrays of these numbers and of the values. This takes
+    a fraction of the memory of the nested dicts that GSFont.kerning
+    otherwise holds, and is read and written much faster with `value`,
+    `set_value`, `remove`, `rows` and `pairs`.
+
+    It is also a mapping of master IDs to mappings of left keys to
+    mappings of right keys to values, like the nested dicts, so that code
+    written for those keeps working. Changes made either way are reported
+    to the change tracker of the font in `parent`, if any.
+    """
+
+    def __init__(self, kerning=None):
+        self.parent = None
+        self._names = []
+        self._numbers = {}
+        self._masters = OrderedDict()
+        if kerning:
+            for master_id, master_kerning in kerning.items():
+                self[master_id] = master_kerning
+
+    def _record_change(self, master_id, left, right):
+        if self.parent is not None and self.parent._tracking:
+            self.parent._track_change("kerning", (master_id, left, right))
+
+    def _record_master_changes(self, master_id):
+        if self.parent is not None and self.parent._tracking:
+            for left, row in self.rows(master_id):
+                for right, _ in row:
+                    self._record_change(master_id, left, right)
+
+    def _number(self, name):
+        number = self._numbers.get(name)
+        if number is None:
+            number = self._numbers[name] = len(self._names)
+            self._names.append(name)
+        return number
+
+    def value(self, master_id, left, right):
+        """Return the value of a pair, or None if it is not kerned."""
+        pairs = self._masters.get(master_id)
+        numbers = self._numbers
+        if pairs is None or left not in numbers or right not in numbers:
+            return None
+        return pairs.value(numbers[left], numbers[right])
+
+    def set_value(self, master_id, left, right, value):
+        pairs = self._masters.get(master_id)
+        if pairs is None:
+            pairs = self._masters[master_id] = KerningPairs()
+        pairs.set_value(self._number(left), self._number(right), float(value))
+        self._record_change(master_id, left, right)
+
+    def remove(self, master_id, left, right):
+        """Remove a pair, and return whether it was kerned."""
+        pairs = self._masters.get(master_id)
+        numbers = self._numbers
+        if pairs is None or left not in numbers or right not in numbers:
+            return False
+        if not pairs.remove(numbers[left], numbers[right]):
+            return False
+        self._record_change(master_id, left, right)
+        return True
+
+    def rows(self, master_id):
+        """Yield (left key, [(right key, value), ...]) for the pairs of a
+        master, grouped by left key like the nested dicts."""
+        pairs = self._masters.get(master_id)
+        if pairs is None:
+            return
+        names = self._names
+        for left, row in pairs.rows():
+            yield names[left], [(names[right], value) for right, value in row]
+
+    def pairs(self):
+        """Yield (master ID, left key, right key, value) for all pairs."""
+        for master_id in self._masters:
+            for left, row in self.rows(master_id):
+                for right, value in row:
+                    yield master_id, left, right, value
+
+    def __getitem__(self, master_id):
+        if master_id not in self._masters:
+            raise KeyError(master_id)
+        return MasterKerningView(self, master_id)
+
+    def __setitem__(self, master_id, master_kerning):
+        if isinstance(master_kerning, MasterKerningView):
+            master_kerning = OrderedDict(master_kerning.rows())
+        if master_id in self._masters:
+            self._record_master_changes(master_id)
+        pairs = self._masters[master_id] = KerningPairs()
+        number = self._number
+        for left, row in master_kerning.items():
+            left = number(left)
+            for right, value in row.items() if hasattr(row, "items") else row:
+                pairs.append(left, number(right), float(value))
+        self._record_master_changes(master_id)
+
+    def __delitem__(self, master_id):
+        self._record_master_changes(master_id)
+        del self._masters[master_id]
+
+    def __iter__(self):
+        return iter(self._masters)
+
+    def __len__(self):
+        return len(self._masters)
+
+    def __contains__(self, master_id):
+        return master_id in self._masters
+
+    def setdefault(self, master_id, default=None):
+        if master_id not in self._masters:
+            self[master_id] = default or {}
+        return self[master_id]
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, ", ".join(
+            "%s: %d pairs" % (master_id, len(pairs))
+            for master_id, pairs in self._masters.items()))
+
+
+class MasterKerningView(MutableMapping):
+    """The kerning of one master in a KerningStore, as a mapping of left
+    keys to mappings of right keys to values."""
+
+    def __init__(self, store, master_id):
+        self.store = store
+        self.master_id = master_id
+
+    def _pairs(self):
+        return self.store._masters[self.master_id]
+
+    def rows(self):
+        return self.store.rows(self.master_id)
+
+    def __getitem__(self, left):
+        number = self.store._numbers.get(left)
+        if number is None or number not in self._pairs().left_counts:
+            raise KeyError(left)
+        return KerningRowView(self.store, self.master_id, left)
+
+    def __setitem__(self, left, row):
+        if left in self:
+            del self[left]
+        KerningRowView(self.store, self.master_id, left).update(row)
+
+    def __delitem__(self, left):
+        for right in list(self[left]):
+            self.store.remove(self.master_id, left, right)
+
+    def __iter__(self):
+        names = self.store._names
+        return iter([names[left] for left in self._pairs().left_counts])
+
+    def __len__(self):
+        return len(self._pairs().left_counts)
+
+    def setdefault(self, left, default=None):
+        if left not in self:
+            self[left] = default or {}
+        return KerningRowView(self.store, self.master_id, left)
+
+
+class KerningRowView(MutableMapping):
+    """The pairs of one left key of one master in a KerningStore, as a
+    mapping of right keys to values."""
+
+    def __init__(self, store, master_id, left):
+        self.store = store
+        self.master_id = master_id
+        self.left = left
+
+    def __getitem__(self, right):
+        value = self.store.value(self.master_id, self.left, right)
+        if value is None:
+            raise KeyError(right)
+        return value
+
+    def __setitem__(self, right, value):
+        self.store.set_value(self.master_id, self.left, right, value)
+
+    def __delitem__(self, right):
+        if not self.store.remove(self.master_id, self.left, right):
+            raise KeyError(right)
+
+    def _items(self):
+        store = self.store
+        number = store._numbers.get(self.left)
+        if number is None:
+            return []
+        names = store._names
+        return [(names[right], value) for right, value
+                in store._masters[self.master_id].row(number)]
+
+    def __iter__(self):
+        return iter([right for right, _ in self._items()])
+
+    def __len__(self):
+        number = self.store._numbers.get(self.left)
+        return self.store._masters[self.master_id].left_counts.get(number, 0)
+
+    def items(self):
+        return self._items()
+
+
+def kerning_rows(master_kerning):
+    """Yield (left key, [(right key, value), ...]) for the kerning of one
+    master, nested dicts or a view of a KerningStore."""
+    if isinstance(master_kerning, MasterKerningView):
+        return master_kerning.rows()
+    return ((left, list(row.items()))
+            for left, row in master_kerning.items())
+
+
+def kerning_pairs(kerning):
+    """Yield (master ID, left key, right key, value) for all pairs of the
+    kerning of a font, nested dicts or a KerningStore."""
+    if isinstance(kerning, KerningStore):
+        return kerning.pairs()
+    return ((master_id, left, right, value)
+            for master_id, master_kerning in kerning.items()
+            for left, row in master_kerning.items()
+            for right, value in row.items())
+
+
+class KerningLookup(object):
+    """Effective kerning of pairs of glyphs in one master, see
+    GSFont.kerning_lookup.
+
+    Kerning groups are resolved like in the UFOs made by to_ufos: a pair of
+    glyphs comes before a pair of a glyph and a group, which comes before
+    a pair of a group and a glyph, which comes before a pair of groups.
+    When a glyph-group and a group-glyph pair with different values both
+    apply, the one that comes later in the kerning wins, like the builder
+    makes it.
+    """
+
+    def __init__(self, font, master_id):
+        # Kerning keys of the groups of each glyph, as first and second
+        # glyph of a pair
+        self.left_keys = {}
+        self.right_keys = {}
+        for glyph in font._glyphs:
+            if glyph.rightKerningGroup:
+                self.left_keys[glyph.name] = (
+                    "@MMK_L_" + glyph.rightKerningGroup)
+            if glyph.leftKerningGroup:
+                self.right_keys[glyph.name] = (
+                    "@MMK_R_" + glyph.leftKerningGroup)
+        self.pairs = {}
+        # Position in the kerning of the pairs of a glyph and a group
+        self.order = {}
+        for left, row in kerning_rows(font.kerning.get(master_id) or {}):
+            left_is_group = left.startswith("@MMK_L_")
+            for right, value in row:
+                self.pairs[left, right] = value
+                if left_is_group != right.startswith("@MMK_R_"):
+                    self.order[left, right] = len(self.order)
+
+    def value(self, left, right):
+        """Return the kerning between two glyphs, 0 if they are not
+        kerned."""
+        pairs = self.pairs
+        value = pairs.get((left, right))
+        if value is not None:
+            return value
+        left_key = self.left_keys.get(left)
+        right_key = self.right_keys.get(right)
+        glyph_group = pairs.get((left, right_key))
+        group_glyph = pairs.get((left_key, right))
+        if glyph_group is not None:
+            if (group_glyph is not None and group_glyph != glyph_group and
+                    self.order[left_key, right] >
+                    self.order[left, right_key]):
+                return group_glyph
+            return glyph_group
+        if group_glyph is not None:
+            return group_glyph
+        value = pairs.get((left_key, right_key))
+        return 0 if value is None else value
+
+    def values(self, pairs):
+        """Return the kerning of each of the (left, right) glyph `pairs`."""
+        value = self.value
+        return [value(left, right) for left, right in pairs]
+
+    def string_values(self, glyph_names):
+        """Return the kerning between each glyph of a string of glyph names
+        and the next one."""
+        glyph_names = list(glyph_names)
+        return self.values(zip(glyph_names, glyph_names[1:]))
+
+
+class FontMerger(object):
+    """Merge other fonts into a font, for GSFont.merge.
+
+    Objects are looked up by name in dicts that are kept up to date while
+    merging, instead of through the proxies of the font, and copied with
+    an ObjectGraphCloner whose memo maps the other font to the font, so
+    that the parent links of the copies point to the font. Without `copy`
+    the objects of the other fonts are moved to the font instead.
+    """
+    POLICIES = ("error", "keep", "replace", "append")
+    # Lists of named objects of GSFont that are merged by name
+    NAMED_LISTS = ("_classes", "featurePrefixes", "_features")
+
+    def __init__(self, font, on_conflict="error", copy=True):
+        if on_conflict not in self.POLICIES:
+            raise ValueError("on_conflict must be one of %s, not %r" %
+                             (", ".join(self.POLICIES), on_conflict))
+        self.font = font
+        self.on_conflict = on_conflict
+        self.copy = copy
+        self.changed_glyphs = []
+        self.changed_objects = {}
+
+    def merge(self, other_fonts):
+        other_fonts = list(other_fonts)
+        master_maps = [self.master_map(other) for other in other_fonts]
+        if self.on_conflict in ("error", "append"):
+            self.check_conflicts(other_fonts, master_maps)
+        font = self.font
+        glyph_positions = self.positions(font._glyphs)
+        with gc_paused():
+            for other, master_map in zip(other_fonts, master_maps):
+                if self.copy:
+                    cloner = ObjectGraphCloner()
+                    cloner.memo[id(other)] = font
+                    clone = cloner.clone
+                else:
+                    clone = self.move
+                self.merge_glyphs(other, master_map, clone, glyph_positions)
+                self.merge_kerning(other, master_map)
+                for objects_name in self.NAMED_LISTS:
+                    self.merge_named(other, objects_name, clone)
+        font.glyphs._changed(self.changed_glyphs)
+        font.classes._changed(self.changed_objects.get("_classes", []))
+        font.features._changed(self.changed_objects.get("_features", []))
+        track_new_objects(
+            font, self.changed_objects.get("featurePrefixes", []))
+
+    def move(self, obj):
+        if isinstance(obj, GSGlyph):
+            obj.parent = self.font
+        return obj
+
+    @staticmethod
+    def positions(objects):
+        positions = {}
+        for position, obj in enumerate(objects):
+            positions.setdefault(obj.name, position)
+        return positions
+
+    def master_map(self, other):
+        """Return the IDs of the masters of this font by the IDs of the
+        masters of `other`, or None for the masters without a match."""
+        master_ids = set()
+        ids_by_name = {}
+        for master in self.font._masters:
+            master_ids.add(master.id)
+            ids_by_name.setdefault(master.name, master.id)
+        master_map = {}
+        for master in other._masters:
+            if master.id in master_ids:
+                master_map[master.id] = master.id
+                continue
+            master_map[master.id] = ids_by_name.get(master.name)
+            if master_map[master.id] is None:
+                logger.warning("Master '%s' of %r matches no master of %r, "
+                               "its layers and kerning are not merged",
+                               master.name, other, self.font)
+        return master_map
+
+    def check_conflicts(self, other_fonts, master_maps):
+        font = self.font
+        names = set(glyph.name for glyph in font._glyphs)
+        # Appending merges the code of named objects instead
+        named = dict(
+            (objects_name,
+             dict((obj.name, obj.code)
+                  for obj in getattr(font, objects_name, None) or ()))
+            for objects_name in self.NAMED_LISTS
+            if self.on_conflict == "error")
+        pairs = dict(((master_id, left, right), value) for
+                     master_id, left, right, value in kerning_pairs(
+                         font._kerning))
+        for other, master_map in zip(other_fonts, master_maps):
+            for glyph in other._glyphs:
+                if glyph.name in names:
+                    raise ValueError("Glyph '%s' of %r is already in %r" %
+                                     (glyph.name, other, font))
+                names.add(glyph.name)
+            for objects_name, codes in named.items():
+                for obj in getattr(other, objects_name, None) or ():
+                    if codes.setdefault(obj.name, obj.code) != obj.code:
+                        raise ValueError("%r of %r differs from the one in %r"
+                                         % (obj, other, font))
+            for (master_id, left, right), value in self.kerning_pairs(
+                    other._kerning, master_map):
+                pair = (master_id, left, right)
+                if pairs.setdefault(pair, value) != value:
+                    raise ValueError(
+                        "Kerning of %s %s of %r differs from %r" %
+                        (left, right, other, font))
+
+    @staticmethod
+    def kerning_pairs(kerning, master_map):
+        """Yield ((master ID, left, right), value) for the pairs of another
+        font, with the master IDs of the font."""
+        for master_id, left, right, value in kerning_pairs(kerning):
+            master_id = master_map.get(master_id)
+            if master_id is not None:
+                yield (master_id, left, right), value
+
+    def merge_glyphs(self, other, master_map, clone, positions):
+        glyphs = self.font._glyphs
+        replace = self.on_conflict == "replace"
+        for glyph in other._glyphs:
+            position = positions.get(glyph.name)
+            if position is not None and not replace:
+                continue
+            glyph = clone(glyph)
+            self.remap_layers(glyph, master_map)
+            if position is None:
+                positions[glyph.name] = len(glyphs)
+                glyphs.append(glyph)
             else:
-                right = max(right, newRight)
-            if top is None:
-                top = newTop
+                self.changed_glyphs.append(glyphs[position])
+                glyphs[position] = glyph
+            self.changed_glyphs.append(glyph)
+
+    @staticmethod
+    def remap_layers(glyph, master_map):
+        layers = OrderedDict()
+        for layer in glyph._layers.values():
+            if layer.layerId in master_map:
+                layer.layerId = master_map[layer.layerId]
+                if layer.layerId is None:
+                    continue
+            if layer.associatedMasterId in master_map:
+                layer.associatedMasterId = master_map[
+                    layer.associatedMasterId]
+                if layer.associatedMasterId is None:
+                    continue
+            layers[layer.layerId] = layer
+        glyph._layers = layers
+
+    def merge_kerning(self, other, master_map):
+        font = self.font
+        replace = self.on_conflict == "replace"
+        for (master_id, left, right), value in self.kerning_pairs(
+                other._kerning, master_map):
+            if replace or font.kerningForPair(
+                    master_id, left, right) is None:
+                font.setKerningForPair(master_id, left, right, value)
+
+    def merge_named(self, other, objects_name, clone):
+        other_objects = getattr(other, objects_name, None)
+        if not other_objects:
+            return
+        objects = getattr(self.font, objects_name, None)
+        if objects is None:
+            objects = []
+            setattr(self.font, objects_name, objects)
+        positions = self.positions(objects)
+        changed = self.changed_objects.setdefault(objects_name, [])
+        for obj in other_objects:
+            position = positions.get(obj.name)
+            if position is not None and self.on_conflict == "append":
+                merged = objects[position]
+                code = self.appended_code(merged, obj)
+                if code != merged.code:
+                    merged.code = code
+                    changed.append(merged)
+                continue
+            if position is not None and self.on_conflict != "replace":
+                continue
+            obj = clone(obj)
+            obj._parent = self.font
+            if position is None:
+                positions[obj.name] = len(objects)
+                objects.append(obj)
             else:
-                top = max(top, newTop)
-
-        if left is not None and bottom is not None and right is not None and top is not None:
-            return rect(point(left, bottom), point(right - left, top - bottom))
+                changed.append(objects[position])
+                objects[position] = obj
+            changed.append(obj)
+
+    @staticmethod
+    def appended_code(obj, other):
+        """Return the code of `obj` followed by the code of `other`. Only
+        the glyph names that are not in it yet are added to a class."""
+        code, other_code = obj.code or "", other.code or ""
+        if isinstance(obj, GSClass) and "#" not in code + other_code:
+            tokens = code.split()
+            seen = set(tokens)
+            for token in other_code.split():
+                if token not in seen:
+                    seen.add(token)
+                    tokens.append(token)
+            return " ".join(tokens)
+        if not other_code.strip() or other_code == code:
+            return code
+        if not code.strip():
+            return other_code
+        return code.rstrip("\n") + "\n" + other_code
 
 
 class GSGlyph(GSBase):
@@ -2607,6 +4548,8 @@ class GSGlyph(GSBase):
         "partsSettings",
     )
 
+    parent = None
+
     def __init__(self, name=None):
         super(GSGlyph, self).__init__()
         self._layers = OrderedDict()
@@ -2625,8 +4568,33 @@ class GSGlyph(GSBase):
             return getattr(self, key) is not None
         return super(GSGlyph, self).shouldWriteValueForKey(key)
 
-    layers = property(lambda self: GlyphLayerProxy(self),
-                      lambda self, value: GlyphLayerProxy(self).setter(value))
+    layers = ProxyProperty(GlyphLayerProxy)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self.parent is not None:
+            # The glyph is gone under its old name
+            self._record_change("name")
+        self._name = value
+        if self.parent is not None:
+            invalidate_name_index(self.parent, "_glyphs")
+            self.parent._geometry_changed()
+
+    def _record_change(self, key):
+        if self.parent is not None:
+            self.parent._track_change("glyphs", self.name)
+
+    def content_hash(self):
+        """Return a hex digest of the content of the glyph and its layers,
+        see GSLayer.content_hash. The lastChange date is left out.
+        """
+        if self.parent is None:
+            return content_digest(self)
+        return self.parent._digest_cache().glyph_digest(self)
 
     def _setupLayer(self, layer, key):
         assert type(key) == str
@@ -2635,6 +4603,14 @@ class GSGlyph(GSBase):
         # TODO use proxy `self.parent.masters[key]`
         if self.parent and self.parent.masterForId(key):
             layer.associatedMasterId = key
+        self._layers_changed()
+        if self._tracking:
+            set_tracking(layer, True)
+            layer._record_change("parent")
+
+    def _layers_changed(self):
+        if self.parent is not None:
+            self.parent._geometry_changed()
 
     # def setLayerForKey(self, layer, key):
     #     if Layer and Key:
@@ -2647,16 +4623,16 @@ class GSGlyph(GSBase):
     def removeLayerForKey_(self, key):
         for layer in list(self._layers):
             if layer == key:
+                self._layers[key]._record_change("parent")
                 del self._layers[key]
+        self._layers_changed()
 
     @property
     def string(self):
         if self.unicode:
             return unichr(int(self.unicode, 16))
 
-    userData = property(
-        lambda self: UserDataProxy(self),
-        lambda self, value: UserDataProxy(self).setter(value))
+    userData = ProxyProperty(UserDataProxy)
 
     glyphname = property(
         lambda self: self.name,
@@ -2705,7 +4681,7 @@ class GSFont(GSBase):
     }
     _wrapperKeysTranslate = {
         ".appVersion": "appVersion",
-        "fontMaster": "_masters",
+        "fontMaster": "masters",
         "unitsPerEm": "upm",
         "gridSubDivision": "gridSubDivisions"
     }
@@ -2720,6 +4696,17 @@ class GSFont(GSBase):
         "kerning": OrderedDict(),
         "keyboardIncrement": 1,
     }
+    # Bumped whenever glyphs or layers are added, removed or renamed, see
+    # FontBoundsCache.
+    _generation = 0
+    _boundsCache = None
+    _changeTracker = None
+    # Whether track_changes was called, see changes_since
+    _changesTracked = False
+    _digestCache = None
+    _cacheAttributes = frozenset(
+        ("_boundsCache", "_changeTracker", "_changesTracked",
+         "_digestCache"))
 
     def __init__(self, path=None):
         super(GSFont, self).__init__()
@@ -2733,6 +4720,7 @@ class GSFont(GSBase):
         self._instances = []
         self._customParameters = []
         self._classes = []
+        self._features = []
         self.filepath = None
         self._userData = None
 
@@ -2776,29 +4764,280 @@ class GSFont(GSBase):
 
     versionMinor = property(getVersionMinor, setVersionMinor)
 
-    glyphs = property(lambda self: FontGlyphsProxy(self),
-                      lambda self, value: FontGlyphsProxy(self).setter(value))
+    glyphs = ProxyProperty(FontGlyphsProxy)
+
+    def _geometry_changed(self):
+        self._generation += 1
+
+    def track_changes(self):
+        """Start recording which parts of the font change, and return a
+        token for its current state to pass to changes_since.
+
+        Tracking slows down assigning attributes of the objects of the
+        font a little, call stop_tracking_changes when you are done.
+        """
+        self._changesTracked = True
+        return self._change_tracker().sequence
+
+    def stop_tracking_changes(self):
+        """Stop recording the changes of the font, and forget its memoized
+        digests (see content_hash) until they are asked for again."""
+        self._changesTracked = False
+        if self._changeTracker is not None:
+            self._changeTracker = None
+            ChangeTracker.stop(self)
+
+    def changes_since(self, token):
+        """Return a FontChanges listing what changed since `token` was
+        returned by track_changes, or since the changes with that `token`.
+
+        Changes made through the glyphsLib API are seen, and so are changes
+        to a compacted kerning (see compact_kerning), but not changes made
+        to plain lists and dicts in place, like nested-dict kerning or the
+        instances of the font.
+        """
+        if not self._changesTracked:
+            raise ValueError("Changes of %r are not tracked" % self)
+        return self._changeTracker.changes_since(token)
+
+    def _change_tracker(self):
+        if self._changeTracker is None:
+            self._changeTracker = ChangeTracker.start(self)
+        return self._changeTracker
+
+    def _record_change(self, key):
+        self._track_change("font", key)
+
+    def _track_change(self, category, key):
+        if self._changeTracker is not None:
+            self._changeTracker.record(category, key)
+
+    def clone(self, share_geometry=True):
+        """Return a copy of the font, made without reparsing or going
+        through copy.deepcopy.
+
+        With `share_geometry`, the copy shares the point, rect and transform
+        objects, like node positions and component transforms, with this
+        font. glyphsLib never changes those objects in place: setting a new
+        position or transform replaces the object, so later edits of either
+        font stay separate. If you change their coordinates in place
+        yourself, both fonts see the change.
+        """
+        with gc_paused():
+            return ObjectGraphCloner(share_geometry).clone(self)
+
+    def subset(self, glyph_names, closure=True):
+        """Return a copy of the font with only the glyphs in `glyph_names`
+        and, with `closure`, the glyphs they use as components.
+
+        The kerning, the glyph classes and the glyphOrder custom parameter
+        are pruned to the glyphs of the subset; kerning of groups that no
+        glyph of the subset belongs to is dropped, and so are classes that
+        end up empty. Classes whose code is more than a list of glyph names
+        and class references, with ranges or comments for instance, are
+        copied as they are, with a warning. Features and feature prefixes
+        are copied as they are too; a warning lists those that use glyphs
+        or classes left out of the subset. Like with clone, the copy shares
+        point, rect and transform objects with this font.
+        """
+        glyphs_by_name = {}
+        for glyph in self._glyphs:
+            glyphs_by_name.setdefault(glyph.name, glyph)
+        keep = set()
+        todo = []
+        for name in glyph_names:
+            if name not in glyphs_by_name:
+                logger.warning("Glyph '%s' is not in %r, it is left out of "
+                               "the subset", name, self)
+            elif name not in keep:
+                keep.add(name)
+                todo.append(name)
+        while closure and todo:
+            for layer in glyphs_by_name[todo.pop()]._layers.values():
+                for component in layer._components:
+                    name = component.name
+                    if name not in keep and name in glyphs_by_name:
+                        keep.add(name)
+                        todo.append(name)
+        kept = [glyph for glyph in self._glyphs if glyph.name in keep]
+
+        # The lists that are pruned are filled in after copying the font,
+        # so that the glyphs that are left out are never copied.
+        cloner = ObjectGraphCloner()
+        glyphs = cloner.memo[id(self._glyphs)] = []
+        classes = cloner.memo[id(self._classes)] = []
+        if "_kerning" in self.__dict__:
+            cloner.memo[id(self._kerning)] = self._subset_kerning(kept)
+        with gc_paused():
+            font = cloner.clone(self)
+            if isinstance(font._kerning, KerningStore):
+                font._kerning.parent = font
+            glyphs.extend([cloner.clone(glyph) for glyph in kept])
+            class_names = set(
+                glyph_class.name for glyph_class in self._classes)
+            plain = {}
+            for glyph_class in self._classes:
+                tokens = glyph_class.code.split()
+                if all(token in glyphs_by_name or (
+                        token[1:] in class_names if token.startswith("@")
+                        else _PLAIN_GLYPH_NAME_RE.match(token))
+                        for token in tokens):
+                    plain[id(glyph_class)] = tokens
+            # Dropping a class can leave a class that refers to it empty,
+            # wherever it is in the list, so prune until nothing changes.
+            dropped = set()
+            codes = {}
+            changed = True
+            while changed:
+                changed = False
+                for glyph_class in self._classes:
+                    tokens = plain.get(id(glyph_class))
+                    if tokens is None or codes.get(id(glyph_class)) == "":
+                        continue
+                    code = codes[id(glyph_class)] = " ".join(
+                        token for token in tokens
+                        if token in keep or (token.startswith("@") and
+                                             token[1:] not in dropped))
+                    if not code:
+                        dropped.add(glyph_class.name)
+                        changed = True
+            for glyph_class in self._classes:
+                if id(glyph_class) not in plain:
+                    logger.warning(
+                        "Class '%s' is not a plain list of glyph names, it "
+                        "is copied to the subset as it is",
+                        glyph_class.name)
+                    classes.append(cloner.clone(glyph_class))
+                elif codes[id(glyph_class)]:
+                    code = codes[id(glyph_class)]
+                    glyph_class = cloner.clone(glyph_class)
+                    glyph_class.code = code
+                    classes.append(glyph_class)
+
+        left_out = set(name for name in glyphs_by_name if name not in keep)
+        left_out.update("@" + name for name in dropped)
+        for feature in list(font.featurePrefixes) + list(font.features):
+            names = sorted(left_out.intersection(
+                _FEATURE_NAME_RE.findall(
+                    _FEATURE_COMMENT_RE.sub("", feature.code or ""))))
+            if names:
+                logger.warning(
+                    "%s '%s' uses %s, which %s not in the subset",
+                    type(feature).__name__, feature.name, ", ".join(names),
+                    "is" if len(names) == 1 else "are")
+
+        glyph_order = font.customParameters._get_parameter_by_key(
+            "glyphOrder")
+        if glyph_order is not None:
+            glyph_order.value = [
+                name for name in glyph_order.value if name in keep]
+        return font
+
+    def merge(self, other_fonts, on_conflict="error", copy=True):
+        """Add the glyphs, kerning, classes, feature prefixes and features
+        of `other_fonts` to the font.
+
+        Masters of the other fonts are matched with the masters of the
+        font by ID, or else by name, and the layers of their glyphs get the
+        IDs of the matching masters; layers and kerning of masters without
+        a match are left out. Everything is copied and the other fonts are
+        not changed, unless `copy` is false: then the glyphs and other
+        objects are moved, which is much faster, and the other fonts must
+        not be used afterwards.
+
+        `on_conflict` says what to do with glyphs whose name is already
+        taken, and with classes, feature prefixes, features and kerning
+        pairs that are already there with other code or another value:
+        "error" raises a ValueError before anything is merged, "keep" keeps
+        what came first and "replace" takes what comes last. "append" adds
+        the code of classes, feature prefixes and features to the ones with
+        the same name, like the locl features of fonts for different
+        scripts, and raises a ValueError for glyphs and kerning like
+        "error"; classes only get the glyph names they do not have yet.
+        """
+        FontMerger(self, on_conflict, copy).merge(other_fonts)
+
+    def _subset_kerning(self, glyphs):
+        """Return a copy of the kerning with only the pairs of `glyphs`
+        and of the kerning groups they belong to."""
+        keys_left = set()
+        keys_right = set()
+        for glyph in glyphs:
+            keys_left.add(glyph.name)
+            keys_right.add(glyph.name)
+            if glyph.rightKerningGroup:
+                keys_left.add("@MMK_L_" + glyph.rightKerningGroup)
+            if glyph.leftKerningGroup:
+                keys_right.add("@MMK_R_" + glyph.leftKerningGroup)
+        kerning = OrderedDict()
+        for master_id, master_map in self._kerning.items():
+            new_master_map = kerning[master_id] = OrderedDict()
+            for left, row in kerning_rows(master_map):
+                if left not in keys_left:
+                    continue
+                new_glyph_map = OrderedDict(
+                    (right, value) for right, value in row
+                    if right in keys_right)
+                if new_glyph_map:
+                    new_master_map[left] = new_glyph_map
+        if isinstance(self._kerning, KerningStore):
+            return KerningStore(kerning)
+        return kerning
+
+    def compute_bounds(self, master_id):
+        """Return the bounds of the master layers of all glyphs as rects,
+        keyed by glyph name.
+
+        With NumPy installed, all paths of the master that have not been
+        measured yet are measured in one vectorized pass.
+        """
+        paths = []
+        for glyph in self._glyphs:
+            layer = glyph._layers.get(master_id)
+            if layer is not None:
+                paths.extend(layer._paths)
+        measure_paths(paths)
+        bounds = self._bounds_cache().master_bounds(master_id)
+        return OrderedDict(
+            (name, bounds_to_rect(value)) for name, value in bounds.items())
+
+    def _bounds_cache(self):
+        if self._boundsCache is None:
+            self._boundsCache = FontBoundsCache(self)
+        return self._boundsCache
+
+    def content_hash(self):
+        """Return a hex digest of the content of the whole font.
+
+        Equal digests mean equal content, whatever the formatting of the
+        files the fonts were loaded from. The digests of glyphs and layers
+        are memoized, and only those of changed objects are recomputed on
+        the next call: the first digest makes the font record its changes
+        like track_changes does, which slows down assigning attributes of
+        its objects a little until stop_tracking_changes. Changes made to
+        the kerning or other plain lists and dicts in place are seen by the
+        font digest but not by the glyph and layer digests, which do not
+        depend on them.
+        """
+        return self._digest_cache().font_digest()
+
+    def _digest_cache(self):
+        if self._digestCache is None:
+            self._digestCache = FontDigestCache(self)
+        return self._digestCache
 
     def _setupGlyph(self, glyph):
         glyph.parent = self
+        track_new_objects(self, glyph)
         for layer in glyph.layers:
             if (not hasattr(layer, "associatedMasterId") or
                     layer.associatedMasterId is None or
                     len(layer.associatedMasterId) == 0):
                 glyph._setupLayer(layer, layer.layerId)
 
-    @property
-    def features(self):
-        return self._features
-
-    @features.setter
-    def features(self, value):
-        self._features = value
-        for g in self._features:
-            g._parent = self
+    features = ProxyProperty(FontFeaturesProxy)
 
-    masters = property(lambda self: FontFontMasterProxy(self),
-                       lambda self, value: FontFontMasterProxy(self).setter(value))
+    masters = ProxyProperty(FontFontMasterProxy)
 
     def masterForId(self, key):
         for master in self._masters:
@@ -2816,17 +5055,11 @@ class GSFont(GSBase):
         for i in self._instances:
             i.parent = self
 
-    classes = property(
-        lambda self: FontClassesProxy(self),
-        lambda self, value: FontClassesProxy(self).setter(value))
+    classes = ProxyProperty(FontClassesProxy)
 
-    customParameters = property(
-        lambda self: CustomParametersProxy(self),
-        lambda self, value: CustomParametersProxy(self).setter(value))
+    customParameters = ProxyProperty(CustomParametersProxy)
 
-    userData = property(
-        lambda self: UserDataProxy(self),
-        lambda self, value: UserDataProxy(self).setter(value))
+    userData = ProxyProperty(UserDataProxy)
 
     @property
     def kerning(self):
@@ -2834,12 +5067,78 @@ class GSFont(GSBase):
 
     @kerning.setter
     def kerning(self, kerning):
+        if self._changeTracker is not None:
+            self._track_kerning_changes(self.__dict__.get("_kerning", {}))
+            self._track_kerning_changes(kerning)
         self._kerning = kerning
+        if isinstance(kerning, KerningStore):
+            kerning.parent = self
+            return
         for master_id, master_map in kerning.items():
             for left_glyph, glyph_map in master_map.items():
                 for right_glyph, value in glyph_map.items():
                     glyph_map[right_glyph] = float(value)
 
+    def compact_kerning(self):
+        """Keep the kerning in a KerningStore instead of nested dicts, and
+        return it.
+
+        The store takes a fraction of the memory and is walked much faster
+        by the builder and the writer. GSFont.kerning returns the store,
+        which can still be used like the nested dicts.
+        """
+        if not isinstance(self._kerning, KerningStore):
+            self._kerning = KerningStore(self._kerning)
+            self._kerning.parent = self
+        return self._kerning
+
+    def kerning_lookup(self, master_id):
+        """Return a KerningLookup for the effective kerning of pairs of
+        glyphs in a master, with kerning groups resolved.
+
+        The lookup is built once from the kerning and the kerning groups of
+        the glyphs; make a new one after changing them.
+        """
+        return KerningLookup(self, master_id)
+
+    def _track_kerning_changes(self, kerning):
+        for master_id, left, right, _ in kerning_pairs(kerning):
+            self._track_change("kerning", (master_id, left, right))
+
+    def kerningForPair(self, fontMasterId, leftKey, rightKey):
+        """Return the kerning value of a pair, or None if it is not kerned.
+        The keys are glyph names or kerning groups like "@MMK_L_A".
+        """
+        if isinstance(self._kerning, KerningStore):
+            return self._kerning.value(fontMasterId, leftKey, rightKey)
+        glyph_map = self._kerning.get(fontMasterId, {}).get(leftKey, {})
+        return glyph_map.get(rightKey)
+
+    def setKerningForPair(self, fontMasterId, leftKey, rightKey, value):
+        if isinstance(self._kerning, KerningStore):
+            self._kerning.set_value(fontMasterId, leftKey, rightKey, value)
+            return
+        if self._kerning is self._defaultsForName["kerning"]:
+            # Do not add pairs to the default shared by all fonts
+            self._kerning = OrderedDict()
+        master_map = self._kerning.setdefault(fontMasterId, OrderedDict())
+        glyph_map = master_map.setdefault(leftKey, OrderedDict())
+        glyph_map[rightKey] = float(value)
+        self._track_change("kerning", (fontMasterId, leftKey, rightKey))
+
+    def removeKerningForPair(self, fontMasterId, leftKey, rightKey):
+        if isinstance(self._kerning, KerningStore):
+            self._kerning.remove(fontMasterId, leftKey, rightKey)
+            return
+        master_map = self._kerning.get(fontMasterId, {})
+        glyph_map = master_map.get(leftKey, {})
+        if rightKey not in glyph_map:
+            return
+        del glyph_map[rightKey]
+        if not glyph_map:
+            del master_map[leftKey]
+        self._track_change("kerning", (fontMasterId, leftKey, rightKey))
+
     @property
     def selection(self):
         return (glyph for glyph in self.glyphs if glyph.selected)
@@ -0,0 +1,258 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Structural differences between two GSFont objects.
+
+    >> import glyphsLib
+    >> for difference in glyphsLib.diff(old_font, new_font):
+    >>     print(difference)
+    Difference(path=('glyphs', 'a', 'layers', 'UUID', 'width'), old=500.0,
+               new=520.0)
+
+Every difference has the path of the value that differs, starting from the
+font, and the old and new value. Added and removed objects have None as old
+respectively new value.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict, namedtuple
+from functools import partial
+import logging
+
+from glyphsLib.classes import (
+    GSBase, GSNode, GSLayer, Proxy, UserDataProxy, ContentEncoder,
+    kerning_pairs)
+from glyphsLib.parser import gc_paused
+from glyphsLib.types import point, rect, baseType
+
+__all__ = ['diff', 'Difference', 'FontDiff']
+
+logger = logging.getLogger(__name__)
+
+Difference = namedtuple('Difference', 'path,old,new')
+
+# Keys of GSFont, GSGlyph and GSLayer that are compared item by item
+FONT_COLLECTIONS = ('glyphs', 'fontMaster', 'features', 'classes',
+                    'featurePrefixes', 'instances', 'kerning')
+GLYPH_COLLECTIONS = ('layers',)
+LAYER_COLLECTIONS = ('anchors', 'components', 'paths')
+
+
+class FontDiff(list):
+    """The list of differences between two fonts, as returned by diff."""
+
+    def _glyph_names(self, added, removed):
+        return [
+            d.path[1] for d in self
+            if len(d.path) == 2 and d.path[0] == 'glyphs' and
+            (d.old is None) == added and (d.new is None) == removed]
+
+    @property
+    def glyphs_added(self):
+        return self._glyph_names(added=True, removed=False)
+
+    @property
+    def glyphs_removed(self):
+        return self._glyph_names(added=False, removed=True)
+
+    @property
+    def glyphs_changed(self):
+        """Names of glyphs that are in both fonts but differ."""
+        names = OrderedDict()
+        for d in self:
+            if len(d.path) > 2 and d.path[0] == 'glyphs':
+                names[d.path[1]] = True
+        return list(names)
+
+
+def diff(font_a, font_b):
+    """Return a FontDiff with the differences between two fonts.
+
+    Glyphs are paired by name, layers by ID, masters by ID, anchors,
+    features and instances by name and paths and components by their
+    position in the layer. Glyphs and layers with the same content digest
+    are skipped without looking at them. Fonts keep the digests of their
+    glyphs and layers between calls (see GSFont.content_hash), so only
+    what changed since is hashed again.
+    """
+    differences = FontDiff()
+    with gc_paused():
+        _diff_font(font_a, font_b, differences)
+    return differences
+
+
+class _Digests(object):
+    """Content digests of the glyphs and layers compared by one diff.
+
+    Fonts memoize the digests of their own glyphs and layers. Those of
+    glyphs outside of a font are built from the digests of their layers,
+    which are kept for when the layers of glyphs that differ are compared.
+    """
+
+    def __init__(self):
+        self.memo = {}
+
+    def __call__(self, obj):
+        font = obj.parent
+        if isinstance(obj, GSLayer) and font is not None:
+            font = font.parent
+        if font is not None:
+            # Fonts memoize the digests of their glyphs and layers
+            return obj.content_hash()
+        entry = self.memo.get(id(obj))
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+        value = ContentEncoder(self).digest(obj)
+        self.memo[id(obj)] = (obj, value)
+        return value
+
+
+def _diff_font(font_a, font_b, differences):
+    _diff_fields(font_a, font_b, (), FONT_COLLECTIONS, differences)
+    _diff_named(_glyphs_by_name(font_a), _glyphs_by_name(font_b),
+                ('glyphs',), partial(_diff_glyph, _Digests()), differences)
+    _diff_named(_by_key(font_a.masters, 'id'), _by_key(font_b.masters, 'id'),
+                ('masters',), _diff_object, differences)
+    for key in ('features', 'classes', 'featurePrefixes'):
+        _diff_named(_by_key(getattr(font_a, key), 'name'),
+                    _by_key(getattr(font_b, key), 'name'),
+                    (key,), _diff_object, differences)
+    _diff_named(_by_key(font_a.instances, 'name'),
+                _by_key(font_b.instances, 'name'),
+                ('instances',), _diff_object, differences)
+    _diff_kerning(font_a.kerning, font_b.kerning, differences)
+
+
+def _glyphs_by_name(font):
+    glyphs = OrderedDict()
+    for glyph in font.glyphs:
+        if glyph.name in glyphs:
+            logger.warning("Duplicate glyph name '%s', only the first one "
+                           "is compared", glyph.name)
+            continue
+        glyphs[glyph.name] = glyph
+    return glyphs
+
+
+def _by_key(objects, key):
+    result = OrderedDict()
+    for obj in objects or ():
+        result.setdefault(getattr(obj, key), obj)
+    return result
+
+
+def _diff_named(objects_a, objects_b, path, diff_function, differences):
+    """Pair two OrderedDicts of objects by key and diff each pair."""
+    for key, obj_a in objects_a.items():
+        obj_b = objects_b.get(key)
+        if obj_b is None:
+            differences.append(Difference(path + (key,), obj_a, None))
+        else:
+            diff_function(obj_a, obj_b, path + (key,), differences)
+    for key, obj_b in objects_b.items():
+        if key not in objects_a:
+            differences.append(Difference(path + (key,), None, obj_b))
+
+
+def _diff_glyph(digest, glyph_a, glyph_b, path, differences):
+    if digest(glyph_a) == digest(glyph_b):
+        return
+    _diff_fields(glyph_a, glyph_b, path, GLYPH_COLLECTIONS, differences)
+    _diff_named(_by_key(glyph_a.layers, 'layerId'),
+                _by_key(glyph_b.layers, 'layerId'),
+                path + ('layers',), partial(_diff_layer, digest), differences)
+
+
+def _diff_layer(digest, layer_a, layer_b, path, differences):
+    if digest(layer_a) == digest(layer_b):
+        return
+    _diff_fields(layer_a, layer_b, path, LAYER_COLLECTIONS, differences)
+    _diff_named(_by_key(layer_a.anchors, 'name'),
+                _by_key(layer_b.anchors, 'name'),
+                path + ('anchors',), _diff_object, differences)
+    _diff_indexed(layer_a.components, layer_b.components,
+                  path + ('components',), differences)
+    _diff_indexed(layer_a.paths, layer_b.paths, path + ('paths',),
+                  differences)
+
+
+def _diff_indexed(objects_a, objects_b, path, differences):
+    """Diff two lists of objects by position."""
+    objects_a, objects_b = list(objects_a), list(objects_b)
+    for index in range(max(len(objects_a), len(objects_b))):
+        if index >= len(objects_b):
+            differences.append(
+                Difference(path + (index,), objects_a[index], None))
+        elif index >= len(objects_a):
+            differences.append(
+                Difference(path + (index,), None, objects_b[index]))
+        else:
+            _diff_object(objects_a[index], objects_b[index], path + (index,),
+                         differences)
+
+
+def _diff_object(obj_a, obj_b, path, differences):
+    _diff_fields(obj_a, obj_b, path, (), differences)
+
+
+def _diff_fields(obj_a, obj_b, path, skip, differences):
+    """Compare the keys of two objects of the same class, except `skip`."""
+    for key, attribute in ContentEncoder._fields(type(obj_a)):
+        if key in skip:
+            continue
+        value_a = _plain(getattr(obj_a, attribute, None))
+        value_b = _plain(getattr(obj_b, attribute, None))
+        if value_a != value_b:
+            differences.append(Difference(path + (key,), value_a, value_b))
+
+
+def _diff_kerning(kerning_a, kerning_b, differences):
+    pairs_a, pairs_b = _kerning_pairs(kerning_a), _kerning_pairs(kerning_b)
+    for pair, value in pairs_a.items():
+        other = pairs_b.get(pair)
+        if other != value:
+            differences.append(Difference(('kerning',) + pair, value, other))
+    for pair, value in pairs_b.items():
+        if pair not in pairs_a:
+            differences.append(Difference(('kerning',) + pair, None, value))
+
+
+def _kerning_pairs(kerning):
+    return OrderedDict(
+        ((master_id, left, right), value)
+        for master_id, left, right, value in kerning_pairs(kerning or {}))
+
+
+def _plain(value):
+    """Return `value` as plain Python values that compare by content."""
+    if isinstance(value, GSNode):
+        return (value.position.x, value.position.y, value.type,
+                bool(value.smooth), _plain(value._userData))
+    if isinstance(value, GSBase):
+        return OrderedDict(
+            (key, _plain(getattr(value, attribute, None)))
+            for key, attribute in ContentEncoder._fields(type(value)))
+    if isinstance(value, UserDataProxy):
+        return _plain(value._owner._userData)
+    if isinstance(value, (list, tuple, Proxy)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, _plain(item)) for key, item in value.items())
+    if isinstance(value, (point, rect)):
+        return tuple(value.value)
+    if isinstance(value, baseType):
+        return value.value
+    return value
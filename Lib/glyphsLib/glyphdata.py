@@ -16,21 +16,473 @@
 
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
-from collections import namedtuple
-from fontTools import agl
-from fontTools.misc.py23 import unichr
-from glyphsLib import glyphdata_generated
+from collections import namedtuple, OrderedDict
+from fontTools.misc.py23 import unichr, basestring
+import array
+import hashlib
+import io
+import logging
+import mmap
+import os
 import sys
 import struct
+import tempfile
+import threading
 import unicodedata
+import xml.etree.ElementTree as etree
+
+from glyphsLib.util import user_cache_dir
+
+logger = logging.getLogger(__name__)
 
 NARROW_PYTHON_BUILD = sys.maxunicode < 0x10FFFF
 
 
 Glyph = namedtuple("Glyph", "name,production_name,unicode,category,subCategory")
 
+# The glyph data is stored in a binary table written by
+# MetaTools/generate_glyphdata.py, which is memory-mapped on first use.
+# It starts with a header:
+#
+#   magic      4 bytes "GDAT"
+#   version    uint32
+#   offsets    one uint32 per table in TABLES, from the start of the file
+#
+# Each table is a block of sorted UTF-8 keys and their values:
+#
+#   count      uint32
+#   keys       count + 1 uint32 offsets of the keys, from the start of
+#              the file; key i is the bytes from keys[i] to keys[i + 1]
+#   values     count + 1 uint32 offsets of the values, likewise
+#   bytes      the keys, then the values
+#
+# All integers are little-endian. The GLYPHS table has one record per name
+# that appears as a key in any of the other tables of glyphdata_generated,
+# with the fields of GLYPH_RECORD separated by tabs; an empty field means
+# the name has no entry in that table. So one lookup answers whether a
+# name is a Glyphs name, a production name, or both. The Unicode string
+# comes last so that it may contain any character. DEFAULT_CATEGORIES has
+# the category and sub-category separated by a tab and uses an empty key
+# for None.
+GLYPHDATA_TABLE_PATH = os.path.join(os.path.dirname(__file__), "glyphdata.bin")
+TABLE_MAGIC = b"GDAT"
+TABLE_VERSION = 1
+TABLES = ("GLYPHS", "DEFAULT_CATEGORIES")
+GLYPH_RECORD = ("missing", "category", "subCategory", "production_name",
+                "glyphs_name", "unicode")
+
+
+def _read_offsets(buf, offset, count):
+    offsets = array.array(str("I"))
+    if offsets.itemsize != 4:
+        offsets = array.array(str("L"))
+    data = buf[offset:offset + 4 * count]
+    if hasattr(offsets, "frombytes"):
+        offsets.frombytes(data)
+    else:
+        offsets.fromstring(data)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets
+
+
+class GlyphDataTable(object):
+    """One table of the binary glyph data, looked up by bisecting its keys.
+
+    Only the key and value offsets are read into memory; the keys and values
+    stay in the (memory-mapped) buffer.
+    """
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        count, = struct.unpack_from("<I", buf, offset)
+        self._count = count
+        self._keys = _read_offsets(buf, offset + 4, count + 1)
+        self._values = _read_offsets(buf, offset + 8 + 4 * count, count + 1)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        buf, keys = self._buf, self._keys
+        for index in range(self._count):
+            yield buf[keys[index]:keys[index + 1]].decode("utf-8")
+
+    def find(self, key):
+        """Return the index of `key` in the table, or -1."""
+        key = key.encode("utf-8")
+        buf, keys = self._buf, self._keys
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = buf[keys[mid]:keys[mid + 1]]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def value(self, index):
+        values = self._values
+        return self._buf[values[index]:values[index + 1]].decode("utf-8")
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def get(self, key, default=None):
+        index = self.find(key)
+        if index < 0:
+            return default
+        return self.value(index)
+
+
+class GlyphRecords(GlyphDataTable):
+    """The GLYPHS table, which remembers the record it found last.
+
+    get_glyph asks several tables about the same name in a row; they are
+    all fields of this table, so the name is only looked up once.
+    """
+
+    def __init__(self, buf, offset):
+        super(GlyphRecords, self).__init__(buf, offset)
+        self._last = (None, None)
+
+    def record(self, name):
+        last_name, record = self._last
+        if name != last_name:
+            index = self.find(name)
+            record = None
+            if index >= 0:
+                record = self.value(index).split("\t", len(GLYPH_RECORD) - 1)
+            self._last = (name, record)
+        return record
+
+
+class GlyphRecordField(object):
+    """A dict-like view of one field of the GLYPHS records."""
+
+    def __init__(self, records, *fields):
+        self._records = records
+        self._fields = [GLYPH_RECORD.index(field) for field in fields]
+
+    def get(self, name, default=None):
+        record = self._records.record(name)
+        if record is None or not record[self._fields[0]]:
+            return default
+        if len(self._fields) == 1:
+            return record[self._fields[0]]
+        return tuple(record[field] or None for field in self._fields)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+
+class GlyphData(object):
+    """The binary glyph data, with the tables of glyphdata_generated.
+
+    Has the same attributes as the glyphdata_generated module, so it can
+    be passed as `data` to get_glyph.
+    """
+
+    def __init__(self, buf, path=None):
+        if buf[:4] != TABLE_MAGIC:
+            raise ValueError("Not a glyph data table")
+        version, = struct.unpack_from("<I", buf, 4)
+        if version != TABLE_VERSION:
+            raise ValueError(
+                "Unsupported glyph data table version %d" % version)
+        glyphs, default_categories = struct.unpack_from(
+            "<%dI" % len(TABLES), buf, 8)
+        records = GlyphRecords(buf, glyphs)
+        self.PRODUCTION_NAMES = GlyphRecordField(records, "production_name")
+        self.IRREGULAR_UNICODE_STRINGS = GlyphRecordField(records, "unicode")
+        self.MISSING_UNICODE_STRINGS = GlyphRecordField(records, "missing")
+        self.IRREGULAR_CATEGORIES = GlyphRecordField(
+            records, "category", "subCategory")
+        self.PRODUCTION_NAMES_REVERSED = GlyphRecordField(
+            records, "glyphs_name")
+        # Only a few dozen entries, cheaper as a dict.
+        table = GlyphDataTable(buf, default_categories)
+        self.DEFAULT_CATEGORIES = {}
+        for index, ucat in enumerate(table):
+            category, subCategory = table.value(index).split("\t")
+            self.DEFAULT_CATEGORIES[ucat or None] = (
+                category or None, subCategory or None)
+        self._buf = buf
+        self._path = path
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buf, path)
+
+    def __reduce__(self):
+        # Unpickled in another process by mapping the same file again.
+        if self._path is not None:
+            return GlyphData.from_file, (self._path,)
+        return GlyphData, (self._buf[:],)
+
+
+def write_glyph_data_table(data, out):
+    """Write glyph data as a binary table to the binary file `out`.
+
+    `data` has the PRODUCTION_NAMES, IRREGULAR_UNICODE_STRINGS,
+    MISSING_UNICODE_STRINGS, DEFAULT_CATEGORIES and IRREGULAR_CATEGORIES
+    tables of glyphdata_generated.
+    """
+    # Like the generated Python source, which builds this from the
+    # PRODUCTION_NAMES literal sorted by name.
+    reversed_names = dict(
+        (prodname, name)
+        for name, prodname in sorted(data.PRODUCTION_NAMES.items()))
+    names = (set(data.PRODUCTION_NAMES) | set(reversed_names) |
+             set(data.IRREGULAR_UNICODE_STRINGS) |
+             set(data.MISSING_UNICODE_STRINGS) |
+             set(data.IRREGULAR_CATEGORIES))
+    glyphs = {}
+    for name in names:
+        category, subCategory = data.IRREGULAR_CATEGORIES.get(name, ("", ""))
+        fields = {
+            "missing": "1" if name in data.MISSING_UNICODE_STRINGS else "",
+            "category": category,
+            "subCategory": subCategory or "",
+            "production_name": data.PRODUCTION_NAMES.get(name, ""),
+            "glyphs_name": reversed_names.get(name, ""),
+            "unicode": data.IRREGULAR_UNICODE_STRINGS.get(name, ""),
+        }
+        glyphs[name] = "\t".join(fields[field] for field in GLYPH_RECORD)
+    default_categories = dict(
+        (ucat or "", "\t".join(part or "" for part in category))
+        for ucat, category in data.DEFAULT_CATEGORIES.items())
+    tables = {
+        "GLYPHS": glyphs,
+        "DEFAULT_CATEGORIES": default_categories,
+    }
+
+    offsets, blocks = [], []
+    offset = 8 + 4 * len(TABLES)
+    for name in TABLES:
+        items = sorted((key.encode("utf-8"), value.encode("utf-8"))
+                       for key, value in tables[name].items())
+        count = len(items)
+        position = offset + 4 + 8 * (count + 1)
+        key_offsets, value_offsets = [], []
+        for key, _ in items:
+            key_offsets.append(position)
+            position += len(key)
+        key_offsets.append(position)
+        for _, value in items:
+            value_offsets.append(position)
+            position += len(value)
+        value_offsets.append(position)
+        block = b"".join(
+            [struct.pack("<I", count),
+             struct.pack("<%dI" % (count + 1), *key_offsets),
+             struct.pack("<%dI" % (count + 1), *value_offsets)] +
+            [key for key, _ in items] +
+            [value for _, value in items])
+        offsets.append(offset)
+        blocks.append(block)
+        offset += len(block)
+
+    out.write(TABLE_MAGIC)
+    out.write(struct.pack("<I", TABLE_VERSION))
+    out.write(struct.pack("<%dI" % len(offsets), *offsets))
+    for block in blocks:
+        out.write(block)
+
+
+_glyph_data = None
+
+
+def _default_glyph_data():
+    global _glyph_data
+    if _glyph_data is None:
+        _glyph_data = GlyphData.from_file(GLYPHDATA_TABLE_PATH)
+    return _glyph_data
+
+
+GlyphDataTables = namedtuple("GlyphDataTables", [
+    "PRODUCTION_NAMES",
+    "IRREGULAR_UNICODE_STRINGS",
+    "MISSING_UNICODE_STRINGS",
+    "DEFAULT_CATEGORIES",
+    "IRREGULAR_CATEGORIES",
+])
+
+
+def load_glyph_data(paths, cache_dir=None):
+    """Return the built-in glyph data with custom GlyphData XML files
+    layered over it, to be passed as `data` to get_glyph or to_ufos.
+
+    Like in Glyphs.app, a glyph defined in a custom file replaces the
+    built-in definition of that glyph, and later files win over earlier
+    ones. Each file is compiled once into a binary table, cached in
+    `cache_dir` (by default glyphsLib's user cache directory) under the
+    hash of its content.
+    """
+    if isinstance(paths, basestring):
+        paths = [paths]
+    if cache_dir is None:
+        cache_dir = os.path.join(user_cache_dir(), "glyphdata")
+    layers = [compile_glyph_data(path, cache_dir) for path in paths]
+    return LayeredGlyphData(list(reversed(layers)) + [_default_glyph_data()])
+
+
+def compile_glyph_data(path, cache_dir=None):
+    """Return the GlyphData of one custom GlyphData XML file.
+
+    If `cache_dir` is given, the compiled table is looked up there first
+    and stored there for next time.
+    """
+    with open(path, "rb") as f:
+        xml = f.read()
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, "%s-%d.bin" % (
+            hashlib.sha1(xml).hexdigest(), TABLE_VERSION))
+        if os.path.exists(cache_path):
+            try:
+                return GlyphData.from_file(cache_path)
+            except (ValueError, EnvironmentError) as e:
+                logger.warning(
+                    "Ignoring unreadable cached glyph data %s: %s",
+                    cache_path, e)
+
+    logger.info("Compiling glyph data %s", path)
+    out = io.BytesIO()
+    write_glyph_data_table(parse_glyph_data(xml), out)
+    table = out.getvalue()
+    if cache_path is not None:
+        try:
+            _write_atomically(cache_path, table)
+        except EnvironmentError as e:
+            logger.warning("Could not cache glyph data in %s: %s",
+                           cache_dir, e)
+    return GlyphData(table)
+
+
+def parse_glyph_data(xml):
+    """Return the GlyphDataTables of the content of a GlyphData XML file.
+
+    Unlike the built-in tables, which only have the entries that cannot be
+    inferred, these have every glyph of the file in PRODUCTION_NAMES (which
+    is how LayeredGlyphData knows which glyphs a file defines) and every
+    category and Unicode string that the file gives.
+    """
+    prodnames, unicodes, missing, categories = {}, {}, set(), {}
+    for glyph in etree.fromstring(xml).iter("glyph"):
+        name = glyph.get("name")
+        if not name:
+            raise ValueError("GlyphData entry without a name")
+        prodnames[name] = glyph.get("production") or name
+        unistr = glyph.get("unicode")
+        if unistr:
+            unicodes[name] = unichr(int(unistr, 16))
+        else:
+            missing.add(name)
+        category = glyph.get("category")
+        if category:
+            categories[name] = (category, glyph.get("subCategory") or None)
+    return GlyphDataTables(prodnames, unicodes, missing, {}, categories)
+
+
+def _write_atomically(path, data):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.rename(temp_path, path)
+    except EnvironmentError:
+        os.remove(temp_path)
+        raise
+
+
+class LayeredTable(object):
+    """One table of LayeredGlyphData."""
+
+    def __init__(self, layers, name):
+        self._layers = layers
+        self._name = name
+
+    def _layer(self, glyph_name):
+        for layer in self._layers[:-1]:
+            if layer.PRODUCTION_NAMES.get(glyph_name) is not None:
+                return layer
+        return self._layers[-1]
+
+    def get(self, glyph_name, default=None):
+        if self._name == "PRODUCTION_NAMES_REVERSED":
+            # Keyed by production name; the first layer that has it wins.
+            for layer in self._layers:
+                value = layer.PRODUCTION_NAMES_REVERSED.get(glyph_name)
+                if value is not None:
+                    return value
+            return default
+        table = getattr(self._layer(glyph_name), self._name)
+        return table.get(glyph_name, default)
+
+    def __contains__(self, glyph_name):
+        table = getattr(self._layer(glyph_name), self._name)
+        return glyph_name in table
+
+
+class LayeredGlyphData(object):
+    """Glyph data made of several layers: a glyph is looked up in the first
+    layer that defines it, or else in the last (the built-in data)."""
+
+    def __init__(self, layers):
+        self.layers = layers
+        for name in ("PRODUCTION_NAMES", "PRODUCTION_NAMES_REVERSED",
+                     "IRREGULAR_UNICODE_STRINGS", "MISSING_UNICODE_STRINGS",
+                     "IRREGULAR_CATEGORIES"):
+            setattr(self, name, LayeredTable(layers, name))
+        self.DEFAULT_CATEGORIES = layers[-1].DEFAULT_CATEGORIES
+
+
+# How many names get_glyph remembers; more than the glyphs of most fonts.
+GLYPH_CACHE_SIZE = 8192
+
+_glyph_cache = OrderedDict()
+_glyph_cache_lock = threading.Lock()
+
+
+def get_glyph(name, data=None):
+    """Return the Glyph with the GlyphData properties of the glyph `name`.
+
+    Lookups in the default data are memoized, for the GLYPH_CACHE_SIZE most
+    recently used names.
+    """
+    if data is not None:
+        return _lookup_glyph(name, data)
+    with _glyph_cache_lock:
+        glyph = _glyph_cache.pop(name, None)
+        if glyph is None:
+            glyph = _lookup_glyph(name, _default_glyph_data())
+            if len(_glyph_cache) >= GLYPH_CACHE_SIZE:
+                _glyph_cache.popitem(last=False)
+        _glyph_cache[name] = glyph
+    return glyph
+
+
+def get_glyphs(names, data=None):
+    """Return an OrderedDict with the Glyph of each of `names`, by name."""
+    glyphs = OrderedDict()
+    for name in names:
+        if name not in glyphs:
+            glyphs[name] = get_glyph(name, data)
+    return glyphs
+
+
+def _lookup_glyph(name, data):
+    from fontTools import agl  # Parses the Adobe Glyph List when imported
 
-def get_glyph(name, data=glyphdata_generated):
     prodname = data.PRODUCTION_NAMES.get(name)
     # Some Glyphs files use production names (instead of Glyphs names).
     # We catch this here, so that we can return the same properties as if
@@ -71,7 +523,9 @@ def _get_unicode_category(unistr):
     return unicodedata.ucd_3_2_0.category(first_char)
 
 
-def _get_category(name, unistr, data=glyphdata_generated):
+def _get_category(name, unistr, data=None):
+    if data is None:
+        data = _default_glyph_data()
     cat = data.IRREGULAR_CATEGORIES.get(name)
     if cat is not None:
         return cat
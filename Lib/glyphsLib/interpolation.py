@@ -92,12 +92,16 @@ def interpolate(ufos, master_dir, out_dir, instance_data, round_geometry=True):
     return instance_ufos
 
 
-def build_designspace(masters, master_dir, out_dir, instance_data):
+def build_designspace(masters, master_dir, out_dir, instance_data,
+                      write_masters=True):
     """Just create MutatorMath designspace without generating instances.
 
     Returns the path of the resulting designspace document and a list of
     (instance_path, instance_data) tuples which map instance UFO filenames to
     Glyphs data for that instance.
+
+    Pass write_masters=False if the masters have been written to master_dir
+    already.
     """
     from mutatorMath.ufo.document import DesignSpaceDocumentWriter
 
@@ -105,8 +109,9 @@ def build_designspace(masters, master_dir, out_dir, instance_data):
     assert all(m.info.familyName == base_family for m in masters), \
         'Masters must all have same family'
 
-    for font in masters:
-        write_ufo(font, master_dir)
+    if write_masters:
+        for font in masters:
+            write_ufo(font, master_dir)
 
     # needed so that added masters and instances have correct relative paths
     tmp_path = os.path.join(master_dir, 'tmp.designspace')
@@ -18,7 +18,9 @@ from __future__ import (print_function, division, absolute_import,
 from fontTools.misc.py23 import tounicode, unichr, unicode
 
 from collections import OrderedDict
+from contextlib import contextmanager
 from io import open
+import gc
 import re
 import logging
 import sys
@@ -28,6 +30,24 @@ import glyphsLib
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def gc_paused():
+    """Pause the cyclic garbage collector.
+
+    Parsing only allocates objects that stay alive, so collections
+    triggered by the allocations would scan the growing font over and over
+    without freeing anything.
+    """
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
 class Parser(object):
     """Parses Python dictionaries from Glyphs source files."""
 
@@ -48,7 +68,8 @@ class Parser(object):
         """Do the parsing."""
 
         text = tounicode(text, encoding='utf-8')
-        result, i = self._parse(text, 0)
+        with gc_paused():
+            result, i = self._parse(text, 0)
         if text[i:].strip():
             self._fail('Unexpected trailing content', text, i)
         return result
@@ -60,7 +81,8 @@ class Parser(object):
 
         m = self.start_dict_re.match(text, 0)
         if m:
-            i = self._parse_dict_into_object(res, text, 1)
+            with gc_paused():
+                i = self._parse_dict_into_object(res, text, 1)
         else:
             self._fail('not correct file format', text, i)
         if text[i:].strip():
@@ -93,6 +93,18 @@ class point(object):
     def __len__(self):
         return self.dimension
 
+    def __getstate__(self):
+        # plistValue tells unset values apart by identity with the default
+        state = self.__dict__.copy()
+        if self.value is self.default:
+            del state['value']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'value' not in state:
+            self.value = self.default
+
     @property
     def x(self):
         return self.value[0]
@@ -12,14 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import namedtuple
 import logging
 import os
 import shutil
+import tempfile
 from fontTools.misc.textTools import num2binary
 
 logger = logging.getLogger(__name__)
 
 
+def user_cache_dir():
+    """Return the directory for glyphsLib's caches that persist between runs.
+
+    It is $GLYPHSLIB_CACHE_DIR if set, else glyphsLib in $XDG_CACHE_HOME
+    or ~/.cache.
+    """
+    path = os.environ.get('GLYPHSLIB_CACHE_DIR')
+    if path:
+        return path
+    base = (os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'glyphsLib')
+
+
 def build_ufo_path(out_dir, family_name, style_name):
     """Build string to use as a UFO path."""
 
@@ -29,15 +45,111 @@ def build_ufo_path(out_dir, family_name, style_name):
             style_name.replace(' ', '')))
 
 
-def write_ufo(ufo, out_dir):
-    """Write a UFO."""
+def write_ufo(ufo, out_dir, skip_unchanged=False):
+    """Write a UFO and return its path.
+
+    If skip_unchanged is True, a UFO written before is replaced with
+    update_ufo, so that the files whose content did not change keep their
+    modification times.
+    """
 
     out_path = build_ufo_path(
         out_dir, ufo.info.familyName, ufo.info.styleName)
 
+    if skip_unchanged:
+        stats = update_ufo(ufo, out_path)
+        logger.info('Writing %s: %d files changed, %d unchanged, %d removed'
+                    % (out_path, stats.changed, stats.unchanged,
+                       stats.removed))
+        return out_path
+
     logger.info('Writing %s' % out_path)
     clean_ufo(out_path)
     ufo.save(out_path)
+    return out_path
+
+
+# What update_ufo did to the files of a UFO: the number of files that are
+# new or changed, the number of unchanged files and their total size in
+# bytes, and the number of files that are gone.
+UpdateStats = namedtuple('UpdateStats', [
+    'changed', 'unchanged', 'unchanged_size', 'removed'])
+
+
+def update_ufo(ufo, path):
+    """Write a UFO over the one at path, if any, and return UpdateStats.
+
+    The UFO is saved in a temporary directory next to path first. The
+    files whose content is the same as in the old UFO get the modification
+    times of the old files, then the new UFO directory replaces the old one
+    as a whole, by renaming: the old UFO is left untouched until the new
+    one is complete.
+
+    Afterwards ufo.path is path, but defcon's path setter doesn't update
+    the glyph sets of the layers: open the UFO at path again to save it in
+    place.
+    """
+    path = os.path.abspath(path)
+    parent_dir = os.path.dirname(path)
+    if not os.path.isdir(parent_dir):
+        os.makedirs(parent_dir)
+    temp_dir = tempfile.mkdtemp(dir=parent_dir)
+    try:
+        new_path = os.path.join(temp_dir, os.path.basename(path))
+        old_path = new_path + '.old'
+        ufo.save(new_path)
+        stats = _compare_trees(new_path, path)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        try:
+            os.rename(new_path, path)
+        except OSError:
+            if os.path.exists(old_path):
+                os.rename(old_path, path)
+            raise
+    finally:
+        shutil.rmtree(temp_dir)
+    ufo.path = path
+    return stats
+
+
+def _compare_trees(new_dir, old_dir):
+    """Compare the files in new_dir with those in old_dir, giving the new
+    files that are the same as the old ones their modification times.
+    Return UpdateStats.
+    """
+    changed = unchanged = unchanged_size = 0
+    new_files = set()
+    for new_root, _, file_names in os.walk(new_dir):
+        old_root = os.path.normpath(
+            os.path.join(old_dir, os.path.relpath(new_root, new_dir)))
+        for file_name in file_names:
+            new_file = os.path.join(new_root, file_name)
+            old_file = os.path.join(old_root, file_name)
+            new_files.add(os.path.normcase(old_file))
+            if _same_content(new_file, old_file):
+                old_stat = os.stat(old_file)
+                os.utime(new_file, (old_stat.st_atime, old_stat.st_mtime))
+                unchanged += 1
+                unchanged_size += old_stat.st_size
+            else:
+                changed += 1
+
+    removed = 0
+    for old_root, _, file_names in os.walk(old_dir):
+        for file_name in file_names:
+            if (os.path.normcase(os.path.join(old_root, file_name))
+                    not in new_files):
+                removed += 1
+    return UpdateStats(changed, unchanged, unchanged_size, removed)
+
+
+def _same_content(path, other_path):
+    if (not os.path.isfile(other_path) or
+            os.path.getsize(path) != os.path.getsize(other_path)):
+        return False
+    with open(path, 'rb') as fp, open(other_path, 'rb') as other_fp:
+        return fp.read() == other_fp.read()
 
 
 def clean_ufo(path):
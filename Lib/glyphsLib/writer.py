@@ -23,7 +23,7 @@ from glyphsLib.types import floatToString, needsQuotes, feature_syntax_encode
 import logging
 import datetime
 from collections import OrderedDict
-from fontTools.misc.py23 import unicode, open, BytesIO
+from fontTools.misc.py23 import unicode, open, BytesIO, UnicodeIO
 
 '''
     Usage
@@ -115,6 +115,38 @@ class Writer(object):
             self.file.write(";\n")
         self.file.write("}")
 
+    def writeKerning(self, kerning):
+        """Write a KerningStore like the nested dicts it stands for."""
+        write = self.file.write
+        # Kerning has few distinct keys and values, format each of them once
+        formatted = {}
+
+        def key_text(key):
+            text = formatted.get(key)
+            if text is None:
+                if needsQuotes(key):
+                    text = "\"%s\" = " % key
+                else:
+                    text = "%s = " % key
+                formatted[key] = text
+            return text
+
+        write("{\n")
+        for master_id in kerning:
+            write(key_text(master_id))
+            write("{\n")
+            for left, row in kerning.rows(master_id):
+                write(key_text(left))
+                write("{\n")
+                for right, value in row:
+                    text = formatted.get(value)
+                    if text is None:
+                        text = formatted[value] = floatToString(value, 5)
+                    write("%s%s;\n" % (key_text(right), text))
+                write("};\n")
+            write("};\n")
+        write("}")
+
     def writeValue(self, value, forKey=None, forType=None):
         if isinstance(value, (list, glyphsLib.classes.Proxy)):
             if isinstance(value, glyphsLib.classes.UserDataProxy):
@@ -125,6 +157,8 @@ class Writer(object):
             value = value.plistValue()
             if value is not None:
                 self.file.write(value)
+        elif isinstance(value, glyphsLib.classes.KerningStore):
+            self.writeKerning(value)
         elif isinstance(value, (dict, OrderedDict, glyphsLib.classes.GSBase)):
             self.writeDict(value)
         elif type(value) == float:
@@ -27,7 +27,9 @@ import textwrap
 import xml.etree.ElementTree as etree
 
 from collections import Counter, defaultdict, namedtuple
-from glyphsLib.glyphdata import get_glyph, _get_unicode_category, _get_category
+from glyphsLib.glyphdata import (
+    get_glyph, _get_unicode_category, _get_category,
+    GlyphData as BinaryGlyphData, write_glyph_data_table)
 
 
 # Data tables which we put into the generated Python file.
@@ -246,11 +248,15 @@ def generate_python_source(data, out):
         out.write('\t"%s": %s,\n' % (glyphName, glyphsCat))
     out.write("}\n\n")
 
-    
+
 if __name__ == "__main__":
     outpath = "Lib/glyphsLib/glyphdata_generated.py"
+    tablepath = "Lib/glyphsLib/glyphdata.bin"
     glyphs = fetch_all_glyphs()
     data = build_data(glyphs)
     test_data(glyphs, data)
     with io.open(outpath, "w", encoding="utf-8") as out:
         generate_python_source(data, out)
+    with io.open(tablepath, "wb") as out:
+        write_glyph_data_table(data, out)
+    test_data(glyphs, BinaryGlyphData.from_file(tablepath))
@@ -171,6 +171,7 @@ setup(
     license="Apache Software License 2.0",
     package_dir={"": "Lib"},
     packages=find_packages("Lib"),
+    package_data={"glyphsLib": ["glyphdata.bin"]},
     entry_points={
         "console_scripts": [
             "glyphs2ufo = glyphsLib.__main__:main"
@@ -183,6 +184,10 @@ setup(
         "defcon>=0.3.0",
         "MutatorMath>=2.0.4",
     ],
+    extras_require={
+        # Vectorized GSFont.compute_bounds
+        "numpy": ["numpy"],
+    },
     cmdclass={
         "release": release,
         "bump_version": bump_version,
@@ -18,8 +18,13 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 import collections
+import copy
 import datetime
+import os
+import shutil
+import tempfile
 import unittest
+import weakref
 # unittest.mock is only available for python 3.3+
 try:
     from unittest import mock
@@ -29,14 +34,16 @@ except ImportError:
     import mock
 
 from defcon import Font
+from ufoLib.glifLib import writeGlyphToString
 from fontTools.misc.loggingTools import CapturingLogHandler
 from glyphsLib import builder
 from glyphsLib.classes import (
     GSFont, GSFontMaster, GSInstance, GSCustomParameter, GSGlyph, GSLayer,
-    GSPath, GSNode, GSAnchor, GSComponent, GSAlignmentZone, GSGuideLine)
+    GSPath, GSNode, GSAnchor, GSComponent, GSAlignmentZone, GSGuideLine,
+    GSBackgroundLayer)
 from glyphsLib.types import point
 
-from glyphsLib.builder import to_ufos
+from glyphsLib.builder import builders, to_ufos
 from glyphsLib.builder.paths import to_ufo_draw_paths
 from glyphsLib.builder.custom_params import (set_custom_params,
                                              set_default_params)
@@ -534,6 +541,62 @@ class ToUfosTest(unittest.TestCase):
         # due to conflict with (a, kern2.V, 100)
         self.assertEqual(ufo.kerning['A', 'v'], -100)
 
+    def test_kerning_lookup(self):
+        """Test that GSFont.kerning_lookup gives the kerning of the UFOs."""
+
+        font = generate_minimal_font()
+        for glyph_name in ('A', 'a', 'V', 'v', 'T'):
+            glyph = add_glyph(font, glyph_name)
+            if glyph_name != 'T':
+                glyph.rightKerningGroup = glyph_name.upper()
+                glyph.leftKerningGroup = glyph_name.upper()
+        master_id = font.masters[0].id
+        font.kerning = {
+            master_id: collections.OrderedDict((
+                ('@MMK_L_A', collections.OrderedDict((
+                    ('@MMK_R_V', -250),
+                    ('v', -100),
+                    ('T', -80),
+                ))),
+                ('a', collections.OrderedDict((
+                    ('@MMK_R_V', 100),
+                ))),
+                ('V', collections.OrderedDict((
+                    ('@MMK_R_A', -50),
+                    ('a', -40),
+                ))),
+                ('@MMK_L_V', collections.OrderedDict((
+                    ('a', -30),
+                ))),
+            ))}
+        ufo = to_ufos(font)[0]
+
+        def ufo_kerning(left, right):
+            keys_left, keys_right = [left], [right]
+            for name, members in ufo.groups.items():
+                if name.startswith('public.kern1.') and left in members:
+                    keys_left.append(name)
+                if name.startswith('public.kern2.') and right in members:
+                    keys_right.append(name)
+            for left_key in keys_left:
+                for right_key in keys_right:
+                    if (left_key, right_key) in ufo.kerning:
+                        return ufo.kerning[left_key, right_key]
+            return 0
+
+        lookup = font.kerning_lookup(master_id)
+        names = [glyph.name for glyph in font.glyphs]
+        pairs = [(left, right) for left in names for right in names]
+        self.assertEqual(lookup.values(pairs),
+                         [ufo_kerning(left, right) for left, right in pairs])
+        self.assertEqual(lookup.value('a', 'v'), 100)
+        self.assertEqual(lookup.value('A', 'v'), -100)
+        self.assertEqual(lookup.string_values(['T', 'A', 'V', 'a']),
+                         [0, -250, -40])
+        font.compact_kerning()
+        self.assertEqual(font.kerning_lookup(master_id).values(pairs),
+                         lookup.values(pairs))
+
     def test_propagate_anchors(self):
         """Test anchor propagation for some relatively complicated cases."""
 
@@ -723,6 +786,311 @@ class ToUfosTest(unittest.TestCase):
         self.assertIn('[foo], # Liga', features)
         self.assertIn('[bar baz], # Mark', features)
 
+    def test_glyph_infos_resolved_once(self):
+        font = generate_minimal_font()
+        bold = GSFontMaster()
+        bold.id = 'bold'
+        font.masters.append(bold)
+        for glyph_name in ('A', 'fi', 'eeMatra-gurmukhi'):
+            glyph = add_glyph(font, glyph_name)
+            layer = GSLayer()
+            layer.layerId = layer.associatedMasterId = bold.id
+            layer.width = 0
+            glyph.layers.append(layer)
+        add_anchor(font, 'fi', 'top', 400, 1000)
+
+        from glyphsLib import glyphdata
+        with patch.object(glyphdata, 'get_glyph',
+                          wraps=glyphdata.get_glyph) as get_glyph:
+            ufos = to_ufos(font)
+        # Once per glyph, not once per glyph and master and again for GDEF
+        self.assertEqual(get_glyph.call_count, 3)
+        for ufo in ufos:
+            self.assertIn('[fi], # Liga', ufo.features.text)
+            self.assertIn('[eeMatra-gurmukhi], # Mark', ufo.features.text)
+
+    def test_custom_glyph_data(self):
+        font = generate_minimal_font()
+        add_glyph(font, 'foo')
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'GlyphData.xml')
+            with open(path, 'wb') as f:
+                f.write(b'<glyphData><glyph name="foo" production="uniE000" '
+                        b'category="Mark" subCategory="Nonspacing"/>'
+                        b'</glyphData>')
+            with patch.dict(os.environ, {'GLYPHSLIB_CACHE_DIR': tempdir}):
+                ufo = to_ufos(font, glyph_data=[path])[0]
+        finally:
+            shutil.rmtree(tempdir)
+        self.assertEqual(ufo.lib[PUBLIC_PREFIX + 'postscriptNames'],
+                         {'foo': 'uniE000'})
+        self.assertIn('[foo], # Mark', ufo.features.text)
+
+    def test_iter_masters(self):
+        """Test that the masters built one at a time are the same as the
+        masters built at once, and that they can be freed as we go.
+        """
+
+        font = generate_minimal_font()
+        bold = GSFontMaster()
+        bold.id = 'bold'
+        font.masters.append(bold)
+        for glyph_name in ('A', 'V'):
+            glyph = add_glyph(font, glyph_name)
+            glyph.leftKerningGroup = glyph.rightKerningGroup = glyph_name
+            layer = GSLayer()
+            layer.layerId = layer.associatedMasterId = bold.id
+            layer.width = 600
+            glyph.layers.append(layer)
+        add_anchor(font, 'A', 'top', 300, 700)
+        font.kerning = {
+            font.masters[0].id: {'@MMK_L_A': {'@MMK_R_V': -50}},
+            bold.id: {'@MMK_L_A': {'@MMK_R_V': -80}},
+        }
+
+        ufos = to_ufos(font)
+        masters, instance_data = to_ufos(font, include_instances=True,
+                                         lazy=True)
+        self.assertIsInstance(instance_data, dict)
+        self.assertNotIsInstance(masters, list)
+        refs = []
+        for expected, ufo in zip(ufos, masters):
+            self.assertEqual(sorted(ufo.keys()), sorted(expected.keys()))
+            self.assertEqual(ufo['A'].width, expected['A'].width)
+            self.assertEqual(ufo.lib[PUBLIC_PREFIX + 'glyphOrder'],
+                             expected.lib[PUBLIC_PREFIX + 'glyphOrder'])
+            self.assertEqual(dict(ufo.groups), dict(expected.groups))
+            self.assertEqual(dict(ufo.kerning), dict(expected.kerning))
+            self.assertEqual(ufo.features.text, expected.features.text)
+            refs.append(weakref.ref(ufo))
+            del ufo
+        self.assertEqual(len(refs), 2)
+        self.assertEqual(
+            list(ufos[1].kerning.items()),
+            [(('public.kern1.A', 'public.kern2.V'), -80)])
+        self.assertIsNone(refs[0]())
+
+    def test_masters_in_parallel(self):
+        """Test that masters built and written in worker processes are the
+        same as the ones built in this process.
+        """
+
+        font = generate_minimal_font()
+        bold = GSFontMaster()
+        bold.id = 'bold'
+        bold.weight = 'Bold'
+        font.masters.append(bold)
+        for glyph_name in ('A', 'V'):
+            glyph = add_glyph(font, glyph_name)
+            layer = GSLayer()
+            layer.layerId = layer.associatedMasterId = bold.id
+            layer.width = 600
+            glyph.layers.append(layer)
+        add_anchor(font, 'A', 'top', 300, 700)
+
+        def contents(ufo):
+            return (sorted((glyph.name, glyph.width,
+                            [(a.name, a.x, a.y) for a in glyph.anchors])
+                           for glyph in ufo),
+                    dict(ufo.lib), ufo.features.text, ufo.info.styleName)
+
+        expected = [contents(ufo) for ufo in to_ufos(font)]
+        # The processes need a master_dir to write the masters to
+        with self.assertRaises(ValueError):
+            to_ufos(font, workers=2)
+        with self.assertRaises(ValueError):
+            list(to_ufos(font, lazy=True, workers=2))
+        with self.assertRaises(ValueError):
+            to_ufos(font, incremental=True)
+        master_dir = tempfile.mkdtemp()
+        try:
+            ufos = to_ufos(font, workers=2, master_dir=master_dir)
+            self.assertEqual([contents(ufo) for ufo in ufos], expected)
+            self.assertEqual(
+                sorted(os.listdir(master_dir)),
+                sorted(os.path.basename(ufo.path) for ufo in ufos))
+        finally:
+            shutil.rmtree(master_dir)
+
+    def test_glyphs_in_parallel(self):
+        """Test that masters whose glyphs are built in worker processes are
+        the same as the ones built in this process.
+        """
+
+        font = generate_minimal_font()
+        for glyph_name in ('a', 'acutecomb', 'aacute', 'b', 'c'):
+            add_glyph(font, glyph_name)
+        font.glyphs['a'].unicode = '0061'
+        font.glyphs['c'].production = 'c.prod'
+        add_anchor(font, 'a', 'top', 250, 500)
+        add_anchor(font, 'acutecomb', '_top', 100, 500)
+        add_component(font, 'aacute', 'a', (1, 0, 0, 1, 0, 0))
+        add_component(font, 'aacute', 'acutecomb', (1, 0, 0, 1, 150, 0))
+        sublayer = GSLayer()
+        sublayer.associatedMasterId = font.masters[0].id
+        sublayer.width = 300
+        sublayer.name = 'SubLayer'
+        font.glyphs['b'].layers.append(sublayer)
+
+        def contents(ufo):
+            return ([layer.name for layer in ufo.layers],
+                    sorted((layer.name, glyph.name, writeGlyphToString(
+                        glyph.name, glyph, glyph.drawPoints))
+                           for layer in ufo.layers for glyph in layer),
+                    dict(ufo.lib), ufo.features.text)
+
+        expected = [contents(ufo) for ufo in to_ufos(font)]
+        self.assertIn(('top', 250, 500),
+                      [(a.name, a.x, a.y)
+                       for a in to_ufos(font)[0]['aacute'].anchors])
+        # Several chunks, and one for the glyphs of the sublayer
+        with patch.object(builders, 'GLYPH_CHUNK_SIZE', 2):
+            self.assertEqual(
+                [contents(ufo) for ufo in to_ufos(font, glyph_workers=2)],
+                expected)
+        with self.assertRaises(ValueError):
+            to_ufos(font, workers=2, glyph_workers=2, master_dir='.')
+
+    def test_streaming_masters(self):
+        """Test that masters written glyph by glyph are the same files as
+        masters built in memory and saved.
+        """
+
+        font = generate_minimal_font()
+        for glyph_name in ('a', 'acutecomb', 'aacute', 'b', 'c'):
+            add_glyph(font, glyph_name)
+        font.glyphs['a'].unicode = '0061'
+        font.glyphs['a'].note = 'Note'
+        font.glyphs['c'].production = 'c.prod'
+        add_anchor(font, 'a', 'top', 250, 500)
+        add_anchor(font, 'acutecomb', '_top', 100, 500)
+        add_component(font, 'aacute', 'a', (1, 0, 0, 1, 0, 0))
+        add_component(font, 'aacute', 'acutecomb', (1, 0, 0, 1, 150, 0))
+        layer = font.glyphs['a'].layers[0]
+        path = GSPath()
+        for x, y in ((0, 0), (300, 0), (300, 700)):
+            path.nodes.append(GSNode(position=(x, y), nodetype='line'))
+        path.closed = True
+        layer.paths.append(path)
+        layer.background = GSBackgroundLayer()
+        layer.background.paths.append(copy.deepcopy(path))
+        guide = GSGuideLine()
+        guide.position = point(value=10, value2=20)
+        guide.angle = 90
+        layer.guides.append(guide)
+        sublayer = GSLayer()
+        sublayer.associatedMasterId = font.masters[0].id
+        sublayer.width = 300
+        sublayer.name = 'SubLayer'
+        font.glyphs['b'].layers.append(sublayer)
+
+        def contents(ufo):
+            result = {}
+            for root, _, file_names in os.walk(ufo.path):
+                for file_name in file_names:
+                    file_path = os.path.join(root, file_name)
+                    with open(file_path, 'rb') as fp:
+                        result[os.path.relpath(file_path, ufo.path)] = \
+                            fp.read()
+            return result
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            expected = contents(
+                to_ufos(font, master_dir=os.path.join(tempdir, 'saved'))[0])
+            self.assertIn(os.path.join('glyphs.public.background', 'a.glif'),
+                          expected)
+            self.assertIn(os.path.join('glyphs.S_ubL_ayer', 'b.glif'),
+                          expected)
+            ufo = to_ufos(font, master_dir=os.path.join(tempdir, 'streamed'),
+                          streaming=True)[0]
+            self.assertEqual(contents(ufo), expected)
+            self.assertIn(('top', 250, 500),
+                          [(a.name, a.x, a.y) for a in ufo['aacute'].anchors])
+        finally:
+            shutil.rmtree(tempdir)
+        with self.assertRaises(ValueError):
+            to_ufos(font, streaming=True)
+        with self.assertRaises(ValueError):
+            to_ufos(font, master_dir='.', streaming=True, incremental=True)
+        with self.assertRaises(ValueError):
+            to_ufos(font, master_dir='.', streaming=True, glyph_workers=2)
+
+    def test_incremental_masters(self):
+        """Test that incremental builds only write the glyphs that changed,
+        and give the same masters as full builds.
+        """
+
+        font = generate_minimal_font()
+        for glyph_name in ('a', 'acutecomb', 'aacute', 'b', 'c'):
+            add_glyph(font, glyph_name)
+        add_anchor(font, 'a', 'top', 250, 500)
+        add_anchor(font, 'acutecomb', '_top', 100, 500)
+        add_component(font, 'aacute', 'a', (1, 0, 0, 1, 0, 0))
+        add_component(font, 'aacute', 'acutecomb', (1, 0, 0, 1, 150, 0))
+
+        def contents(ufo):
+            return (sorted((glyph.name, glyph.width,
+                            [(a.name, a.x, a.y) for a in glyph.anchors])
+                           for glyph in ufo),
+                    dict(ufo.lib), ufo.features.text, ufo.info.styleName)
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            master_dir = os.path.join(tempdir, 'master_ufo')
+            ufo = to_ufos(font, master_dir=master_dir, incremental=True)[0]
+            glyphs_dir = os.path.join(ufo.path, 'glyphs')
+            for file_name in os.listdir(glyphs_dir):
+                os.utime(os.path.join(glyphs_dir, file_name), (0, 0))
+
+            font.glyphs[0].layers[0].anchors[0].position = (300, 500)
+            del font.glyphs[3]
+            ufo = to_ufos(font, master_dir=master_dir, incremental=True)[0]
+            expected = to_ufos(font)[0]
+            self.assertEqual(contents(ufo), contents(expected))
+            self.assertIn(('top', 300, 500),
+                          [(a.name, a.x, a.y) for a in ufo['aacute'].anchors])
+            self.assertEqual(
+                sorted(name for name in os.listdir(glyphs_dir)
+                       if name.endswith('.glif') and os.path.getmtime(
+                           os.path.join(glyphs_dir, name)) != 0),
+                ['a.glif', 'aacute.glif'])
+            self.assertNotIn('b', ufo)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_incremental_after_full_build(self):
+        """Test that an incremental build doesn't trust the glyphs of the
+        last incremental build once a full build wrote the UFO since.
+        """
+
+        font = generate_minimal_font()
+        path = GSPath()
+        path.nodes = [
+            GSNode(position=(0, 0), nodetype='line'),
+            GSNode(position=(300, 700), nodetype='line'),
+            GSNode(position=(600, 0), nodetype='line'),
+        ]
+        path.closed = True
+        add_glyph(font, 'A').layers[0].paths.append(path)
+        add_glyph(font, 'B')
+
+        def points(ufo):
+            return [(point.x, point.y) for point in ufo['A'][0]]
+
+        master_dir = tempfile.mkdtemp()
+        try:
+            to_ufos(font, master_dir=master_dir, incremental=True)
+            path.nodes[1].position = (300, 800)
+            to_ufos(font, master_dir=master_dir)
+            path.nodes[1].position = (300, 700)
+            ufo = to_ufos(font, master_dir=master_dir, incremental=True)[0]
+            self.assertIn((300, 700), points(ufo))
+            self.assertEqual(points(ufo), points(to_ufos(font)[0]))
+        finally:
+            shutil.rmtree(master_dir)
+
     def test_set_blue_values(self):
         """Test that blue values are set correctly from alignment zones."""
 
@@ -778,6 +1146,19 @@ class ToUfosTest(unittest.TestCase):
         self.assertIn(name, instances)
         self.assertEqual(instances[name], value)
 
+    def test_master_attributes_built_once_per_master(self):
+        font = generate_minimal_font()
+        font.customParameters['glyphOrder'] = ['A']
+        font.customParameters['Variation Font Origin'] = 'Light'
+        with patch.object(builder.UFOBuilder, 'to_ufo_master_attributes',
+                          autospec=True,
+                          side_effect=builder.UFOBuilder
+                          .to_ufo_master_attributes) as build:
+            ufos, instances = to_ufos(font, include_instances=True)
+        self.assertEqual(build.call_count, len(font.masters))
+        self.assertEqual(ufos[0].lib[PUBLIC_PREFIX + 'glyphOrder'], ['A'])
+        self.assertEqual(instances['Variation Font Origin'], 'Light')
+
     def test_family_name_none(self):
         font = generate_minimal_font()
         instances_list = [
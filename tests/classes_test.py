@@ -22,16 +22,34 @@ import os
 import datetime
 import unittest
 import copy
+import pickle
+import subprocess
+import sys
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+from collections import OrderedDict
 from fontTools.misc.py23 import unicode
+from fontTools.misc.loggingTools import CapturingLogHandler
 
 from glyphsLib.classes import (
     GSFont, GSFontMaster, GSInstance, GSCustomParameter, GSGlyph, GSLayer,
     GSAnchor, GSComponent, GSAlignmentZone, GSClass, GSFeature, GSAnnotation,
-    GSFeaturePrefix, GSGuideLine, GSHint, GSNode, GSSmartComponentAxis,
-    LayerComponentsProxy, LayerGuideLinesProxy,
+    GSFeaturePrefix, GSGuideLine, GSHint, GSNode, GSPath,
+    GSSmartComponentAxis, LayerComponentsProxy, LayerGuideLinesProxy,
+    KerningStore, measure_paths,
     STEM, TEXT, ARROW, CIRCLE, PLUS, MINUS
 )
+from glyphsLib import classes
 from glyphsLib.types import point, transform, rect, size
+from glyphsLib.parser import loads
+from glyphsLib.writer import dumps
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 TESTFILE_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -120,6 +138,32 @@ class GlyphLayersTest(unittest.TestCase):
         self.assertIsNone(layer)
 
 
+class GSBaseTest(unittest.TestCase):
+    def test_defaults(self):
+        layer, other = GSLayer(), GSLayer()
+        # Plain defaults are not stored on the instance until needed
+        self.assertNotIn("color", layer.__dict__)
+        self.assertNotIn("width", layer.__dict__)
+        self.assertEqual(layer.width, 0)
+        self.assertIsNone(layer.leftMetricsKey)
+        self.assertIsNot(layer.color, other.color)
+        self.assertIn("color", layer.__dict__)
+        layer.width = 500
+        self.assertEqual(other.width, 0)
+        # Properties still get their defaults on every instance
+        self.assertEqual(GSComponent().name, "")
+        self.assertEqual(GSGlyph().name, None)
+        self.assertEqual(len(layer.guides), 0)
+
+    def test_defaults_of_subclasses(self):
+        # Defaults inherited from GSFeature are not set on every instance
+        feature_class = GSClass()
+        self.assertNotIn("automatic", feature_class.__dict__)
+        self.assertNotIn("notes", feature_class.__dict__)
+        self.assertFalse(feature_class.automatic)
+        self.assertEqual(feature_class.code, "")
+
+
 class GSFontTest(unittest.TestCase):
     def test_init(self):
         font = GSFont()
@@ -146,6 +190,45 @@ class GSFontTest(unittest.TestCase):
         font.customParameters['Filter'] = 'AddExtremes'
         self.assertEqual(font.customParameters['Filter'], 'AddExtremes')
 
+    def test_duplicate_custom_parameters(self):
+        font = GSFont()
+        first = GSCustomParameter('Filter', 'RemoveOverlap')
+        second = GSCustomParameter('Filter', 'AddExtremes')
+        font.customParameters.extend([first, second])
+        # Like Glyphs.app, the first parameter with a given name wins
+        self.assertEqual(font.customParameters['Filter'], 'RemoveOverlap')
+        font.customParameters['Filter'] = 'RoundCoordinates'
+        self.assertEqual(first.value, 'RoundCoordinates')
+        self.assertEqual(second.value, 'AddExtremes')
+        self.assertIn('Filter', font.customParameters)
+        # Renaming a parameter is picked up by the name lookup
+        first.name = 'Other'
+        self.assertEqual(font.customParameters['Filter'], 'AddExtremes')
+        self.assertEqual(font.customParameters['Other'], 'RoundCoordinates')
+        second.name = 'Other'
+        self.assertIsNone(font.customParameters['Filter'])
+        self.assertNotIn('Filter', font.customParameters)
+        # Deleting by name removes all parameters with that name
+        del font.customParameters['Other']
+        self.assertEqual(len(font.customParameters), 0)
+        self.assertIsNone(font.customParameters['Other'])
+
+    def test_features_by_name(self):
+        font = GSFont()
+        liga1 = GSFeature('liga', 'sub f i by fi;')
+        liga2 = GSFeature('liga', 'sub f l by fl;')
+        kern = GSFeature('kern', '')
+        font.features = [liga1, kern, liga2]
+        self.assertEqual(font.features['liga'], liga1)
+        self.assertEqual(font.features['kern'], kern)
+        self.assertEqual(liga1.parent, font)
+        with self.assertRaises(KeyError):
+            font.features['calt']
+        kern.name = 'calt'
+        self.assertEqual(font.features['calt'], kern)
+        del font.features['liga']
+        self.assertEqual(list(font.features), [kern])
+
 
 class GSObjectsTestCase(unittest.TestCase):
 
@@ -206,6 +289,420 @@ class GSFontFromFileTest(GSObjectsTestCase):
     def setUp(self):
         super(GSFontFromFileTest, self).setUp()
 
+    def test_compute_bounds(self):
+        reference = GSFont(TESTFILE_PATH)
+        for master in self.font.masters:
+            bounds = self.font.compute_bounds(master.id)
+            self.assertEqual(list(bounds), [g.name for g in self.font.glyphs])
+            for name, value in bounds.items():
+                expected = reference.glyphs[name].layers[master.id].bounds
+                if expected is None:
+                    self.assertIsNone(value)
+                    continue
+                self.assertAlmostEqual(value.origin.x, expected.origin.x)
+                self.assertAlmostEqual(value.origin.y, expected.origin.y)
+                self.assertAlmostEqual(value.size.width, expected.size.width)
+                self.assertAlmostEqual(value.size.height,
+                                       expected.size.height)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_measure_paths(self):
+        paths = [path for glyph in self.font.glyphs
+                 for layer in glyph.layers for path in layer.paths]
+        path = GSPath()
+        path.nodes = [GSNode((0, 0)), GSNode((-100, 200), GSNode.OFFCURVE),
+                      GSNode((200, 200), GSNode.OFFCURVE),
+                      GSNode((100, 0), GSNode.CURVE)]
+        paths.append(path)
+        measure_paths(paths)
+        for path in paths:
+            self.assertIsNotNone(path._bounds)
+            for value, expected in zip(path._bounds, path._compute_bounds()):
+                self.assertAlmostEqual(value, expected)
+        self.assertAlmostEqual(path.bounds.origin.x, -20.7107, places=4)
+        self.assertAlmostEqual(path.bounds.size.width, 141.4214, places=4)
+
+    def test_clone(self):
+        font = self.font
+        for share_geometry in (True, False):
+            clone = font.clone(share_geometry=share_geometry)
+            self.assertEqual(dumps(clone), dumps(font))
+            glyph = clone.glyphs["a"]
+            layer = glyph.layers[0]
+            path = layer.paths[0]
+            node = path.nodes[0]
+            self.assertIsNot(glyph, font.glyphs["a"])
+            self.assertIs(glyph.parent, clone)
+            self.assertIs(layer.parent, glyph)
+            self.assertIs(path.parent, layer)
+            self.assertIs(node.parent, path)
+            original = font.glyphs["a"].layers[0].paths[0].nodes[0]
+            if share_geometry:
+                self.assertIs(node.position, original.position)
+            else:
+                self.assertIsNot(node.position, original.position)
+            position = original.position
+            for path in layer.paths:
+                for node in path.nodes:
+                    node.position = point(node.position.x + 10,
+                                          node.position.y)
+            self.assertIs(original.position, position)
+            self.assertEqual(layer.bounds.origin.x,
+                             font.glyphs["a"].layers[0].bounds.origin.x + 10)
+
+    def test_pickle_in_new_process(self):
+        # As done for worker processes that don't fork, see to_ufos
+        script = ("import pickle, sys\n"
+                  "from glyphsLib.writer import dumps\n"
+                  "font = pickle.loads(sys.stdin.buffer.read()"
+                  " if hasattr(sys.stdin, 'buffer') else sys.stdin.read())\n"
+                  "sys.stdout.write(dumps(font))\n")
+        process = subprocess.Popen(
+            [sys.executable, "-c", script], stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE)
+        output, _ = process.communicate(pickle.dumps(self.font, 2))
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(output.decode("utf-8"), dumps(self.font))
+
+    def test_changes_since(self):
+        font = self.font
+        master_id = font.masters[0].id
+        token = font.track_changes()
+        try:
+            self.assertFalse(font.changes_since(token))
+            layer = font.glyphs["a"].layers[master_id]
+            layer.paths[0].nodes[0].position = point(1, 2)
+            font.glyphs["h"].layers[master_id].width = 700
+            font.glyphs["A"].layers[master_id].anchors["top"].position = \
+                point(1, 1)
+            font.glyphs["n"].name = "n.alt"
+            font.setKerningForPair(master_id, "a", "n", -10)
+            font.masters[1].xHeight = 500
+            font.features["aalt"].code = "feature locl;"
+            font.customParameters["note"] = "changed"
+            changes = font.changes_since(token)
+            self.assertEqual(changes.glyphs, {"a", "h", "A", "n", "n.alt"})
+            self.assertEqual(changes.layers, {
+                ("a", master_id), ("h", master_id), ("A", master_id)})
+            self.assertEqual(changes.kerning, {(master_id, "a", "n")})
+            self.assertEqual(changes.masters, {font.masters[1].id})
+            self.assertEqual(changes.features, {"aalt"})
+            self.assertEqual(changes.font, {"customParameters"})
+
+            del font.glyphs[0]
+            font.masters[2].customParameters["underlinePosition"] = -100
+            later = font.changes_since(changes.token)
+            self.assertEqual(later.glyphs, {"A"})
+            self.assertEqual(later.masters, {font.masters[2].id})
+            self.assertEqual(len(font.changes_since(token).glyphs), 5)
+        finally:
+            font.stop_tracking_changes()
+        self.assertIs(type(font.glyphs["a"].layers[0].paths[0]), GSPath)
+        self.assertRaises(ValueError, font.changes_since, token)
+
+    def test_changes_since_compact_kerning(self):
+        font = self.font
+        master_id = font.masters[0].id
+        kerning = font.compact_kerning()
+        token = font.track_changes()
+        try:
+            kerning[master_id].setdefault("a", {})["n"] = -10
+            kerning[master_id].setdefault("x", {})["y"] = 20
+            del kerning[master_id]["x"]["y"]
+            self.assertEqual(font.changes_since(token).kerning, {
+                (master_id, "a", "n"), (master_id, "x", "y")})
+        finally:
+            font.stop_tracking_changes()
+
+    def test_tracking_is_per_font(self):
+        font, other = self.font, GSFont(TESTFILE_PATH)
+        token = font.track_changes()
+        try:
+            anchor = font.glyphs["A"].layers[0].anchors["top"]
+            self.assertIsInstance(anchor, GSAnchor)
+            self.assertIsNot(type(anchor), GSAnchor)
+            self.assertEqual(type(anchor).__name__, "GSAnchor")
+            # Objects of other fonts keep the plain __setattr__
+            other_anchor = other.glyphs["A"].layers[0].anchors["top"]
+            self.assertIs(type(other_anchor), GSAnchor)
+            self.assertIs(type(other_anchor).__setattr__,
+                          object.__setattr__)
+            # Copies do not track their changes
+            for copied in (font.clone(), copy.deepcopy(font),
+                           pickle.loads(pickle.dumps(font, 2))):
+                self.assertIs(type(copied), GSFont)
+                self.assertIs(
+                    type(copied.glyphs["A"].layers[0].anchors["top"]),
+                    GSAnchor)
+
+            # Objects added to the font track their changes
+            glyph = GSGlyph("new")
+            font.glyphs.append(glyph)
+            layer = GSLayer()
+            layer.paths.append(GSPath())
+            glyph.layers.append(layer)
+            node = GSNode(point(1, 2))
+            layer.paths[0].nodes.append(node)
+            self.assertIsNot(type(node), GSNode)
+            token = font.changes_since(token).token
+            node.type = "curve"
+            self.assertEqual(font.changes_since(token).glyphs, {"new"})
+        finally:
+            font.stop_tracking_changes()
+        self.assertIs(type(anchor), GSAnchor)
+        self.assertIs(type(node), GSNode)
+
+    def test_content_hash(self):
+        font = self.font
+        try:
+            digest = font.content_hash()
+            # Hashing does not turn change tracking on by itself
+            self.assertRaises(ValueError, font.changes_since, 0)
+            self.assertEqual(GSFont(TESTFILE_PATH).content_hash(), digest)
+            self.assertEqual(font.clone().content_hash(), digest)
+            self.assertEqual(loads(dumps(font)).content_hash(), digest)
+
+            font.glyphs["a"].layers[0].width += 10
+            self.assertNotEqual(font.content_hash(), digest)
+            font.glyphs["a"].layers[0].width -= 10
+            self.assertEqual(font.content_hash(), digest)
+
+            # Digests are memoized
+            glyph, other = font.glyphs["a"], font.glyphs["n"]
+            layer = glyph.layers[0]
+            glyph_digest = glyph.content_hash()
+            layer_digest = layer.content_hash()
+            other_digest = other.content_hash()
+            self.assertEqual(copy.deepcopy(layer).content_hash(),
+                             layer_digest)
+
+            node = layer.paths[0].nodes[0]
+            node.position = (node.position.x, node.position.y)
+            self.assertEqual(layer.content_hash(), layer_digest)
+            node.position = point(node.position[0] + 1, node.position[1])
+            self.assertNotEqual(layer.content_hash(), layer_digest)
+            self.assertNotEqual(glyph.content_hash(), glyph_digest)
+            self.assertNotEqual(font.content_hash(), digest)
+            self.assertEqual(other.content_hash(), other_digest)
+            self.assertEqual(glyph.layers[1].content_hash(),
+                             GSFont(TESTFILE_PATH).glyphs["a"].layers[1]
+                             .content_hash())
+
+            other.layers[0].width += 10
+            self.assertNotEqual(other.content_hash(), other_digest)
+            other.layers[0].width -= 10
+            self.assertEqual(other.content_hash(), other_digest)
+            other.lastChange = datetime.datetime(2017, 1, 1)
+            self.assertEqual(other.content_hash(), other_digest)
+
+            with mock.patch.object(classes.ContentEncoder,
+                                   "digest") as encode:
+                self.assertEqual(other.content_hash(), other_digest)
+            self.assertFalse(encode.called)
+
+            # Changes made after stop_tracking_changes are not missed either
+            font.stop_tracking_changes()
+            self.assertIs(type(glyph), GSGlyph)
+            other.layers[0].width += 10
+            self.assertNotEqual(other.content_hash(), other_digest)
+        finally:
+            font.stop_tracking_changes()
+
+    def test_kerning_for_pair(self):
+        font = self.font
+        master_id = font.masters[0].id
+        self.assertIsNone(font.kerningForPair(master_id, "a", "a"))
+        font.setKerningForPair(master_id, "a", "a", -20)
+        self.assertEqual(font.kerningForPair(master_id, "a", "a"), -20)
+        self.assertEqual(font.kerning[master_id]["a"]["a"], -20)
+        font.removeKerningForPair(master_id, "a", "a")
+        self.assertIsNone(font.kerningForPair(master_id, "a", "a"))
+        self.assertNotIn("a", font.kerning[master_id])
+
+        GSFont().setKerningForPair(master_id, "a", "a", -20)
+        self.assertEqual(dict(GSFont().kerning), {})
+
+    def test_compact_kerning(self):
+        font = self.font
+        master_id = font.masters[0].id
+        kerning = copy.deepcopy(font.kerning)
+        text = dumps(font)
+        digest = font.content_hash()
+        font.stop_tracking_changes()
+
+        store = font.compact_kerning()
+        self.assertIsInstance(store, KerningStore)
+        self.assertIs(font.kerning, store)
+        self.assertEqual(store, kerning)
+        self.assertEqual(list(store[master_id]), list(kerning[master_id]))
+        self.assertEqual(dumps(font), text)
+        self.assertEqual(font.content_hash(), digest)
+        font.stop_tracking_changes()
+        self.assertEqual(
+            [pair[:3] for pair in store.pairs()],
+            [(m, left, right) for m in kerning for left in kerning[m]
+             for right in kerning[m][left]])
+
+        self.assertEqual(font.kerningForPair(master_id, "@MMK_L_A",
+                                             "@MMK_R_J"), -30)
+        font.kerning[master_id]["@MMK_L_A"]["@MMK_R_J"] = -31
+        self.assertEqual(store.value(master_id, "@MMK_L_A", "@MMK_R_J"),
+                         -31)
+        font.setKerningForPair(master_id, "@MMK_L_A", "a", 10)
+        self.assertEqual(list(store[master_id]["@MMK_L_A"])[-1], "a")
+        self.assertEqual(store[master_id]["@MMK_L_A"].items()[-1],
+                         ("a", 10))
+        font.removeKerningForPair(master_id, "@MMK_L_A", "a")
+        self.assertIsNone(font.kerningForPair(master_id, "@MMK_L_A", "a"))
+        del store[master_id]["@MMK_L_B"]
+        self.assertNotIn("@MMK_L_B", store[master_id])
+        store[master_id].setdefault("a", {})["n"] = 5
+        self.assertEqual(dict(store[master_id]["a"]), {"n": 5})
+        self.assertEqual(list(store[master_id])[-1], "a")
+        for left in list(store[master_id]):
+            del store[master_id][left]
+        self.assertEqual(len(store[master_id]), 0)
+
+        font = loads(text)
+        font.compact_kerning()
+        self.assertIsInstance(font.clone().kerning, KerningStore)
+        self.assertIsInstance(font.subset(["A"]).kerning, KerningStore)
+
+    def test_subset(self):
+        font = self.font
+        master_id = font.masters[0].id
+        font.setKerningForPair(master_id, "@MMK_L_A", "@MMK_R_a", -10)
+        font.setKerningForPair(master_id, "a", "n", 5)
+        font.customParameters["glyphOrder"] = [
+            glyph.name for glyph in font.glyphs]
+
+        subset = font.subset(["adieresis", "A", "missing"])
+        self.assertEqual([glyph.name for glyph in subset.glyphs],
+                         ["A", "a", "adieresis", "dieresis"])
+        self.assertEqual(subset.customParameters["glyphOrder"],
+                         ["A", "a", "adieresis", "dieresis"])
+        self.assertEqual(dict(subset.kerning[master_id]),
+                         {"@MMK_L_A": {"@MMK_R_a": -10}})
+        self.assertEqual([(c.name, c.code) for c in subset.classes],
+                         [("c2sc_source", "A"), ("smcp_source", "a")])
+        for glyph in subset.glyphs:
+            self.assertIs(glyph.parent, subset)
+        self.assertEqual(subset.glyphs["a"].content_hash(),
+                         font.glyphs["a"].content_hash())
+        self.assertEqual(len(font.glyphs), 11)
+        self.assertEqual(font.kerningForPair(master_id, "a", "n"), 5)
+        font.stop_tracking_changes()
+
+        subset = font.subset(["adieresis"], closure=False)
+        self.assertEqual([glyph.name for glyph in subset.glyphs],
+                         ["adieresis"])
+        self.assertEqual(loads(dumps(subset)).content_hash(),
+                         subset.content_hash())
+        subset.stop_tracking_changes()
+
+    def test_subset_class_references(self):
+        font = self.font
+        # Classes that refer to classes after them
+        font.classes.insert(0, GSClass("outer", "@inner"))
+        font.classes.insert(0, GSClass("chain", "A @outer"))
+        font.classes.append(GSClass("inner", "n"))
+        subset = font.subset(["A"])
+        self.assertEqual([(c.name, c.code) for c in subset.classes],
+                         [("chain", "A"), ("c2sc_source", "A")])
+
+    def test_subset_feature_code(self):
+        font = self.font
+        font.classes.append(GSClass("range", "A-Z a"))
+        font.classes.append(GSClass("commented", "A n # not n"))
+        font.features.append(GSFeature("liga", "sub a n by A;"))
+        with CapturingLogHandler(classes.logger, "WARNING") as captor:
+            subset = font.subset(["A", "a"])
+        self.assertEqual(subset.classes["range"].code, "A-Z a")
+        self.assertEqual(subset.classes["commented"].code, "A n # not n")
+        messages = " | ".join(
+            record.getMessage() for record in captor.records)
+        self.assertIn("Class 'range' is not a plain list", messages)
+        self.assertIn("Class 'commented' is not a plain list", messages)
+        self.assertIn("GSFeature 'liga' uses n, which is not in", messages)
+        self.assertIn("GSFeature 'smcp' uses @smcp_target,", messages)
+        self.assertNotIn("'aalt'", messages)
+
+    def test_merge(self):
+        font = self.font.subset(["A", "Adieresis"])
+        other = self.font.subset(["n", "a"])
+        # Give the masters of the other font new IDs, the names stay
+        master_ids = [master.id for master in other.masters]
+        new_ids = dict((master.id, master.name) for master in other.masters)
+        for master in other.masters:
+            master.id = new_ids[master.id]
+        for glyph in other.glyphs:
+            for layer in glyph._layers.values():
+                layer.layerId = new_ids.get(layer.layerId, layer.layerId)
+                layer.associatedMasterId = new_ids[layer.associatedMasterId]
+            glyph._layers = OrderedDict(
+                (layer.layerId, layer) for layer in glyph._layers.values())
+        other.setKerningForPair(other.masters[0].id, "a", "n", 5)
+
+        with self.assertRaises(ValueError):
+            font.merge([other], on_conflict="skip")
+        with self.assertRaises(ValueError):
+            font.merge([other, self.font.subset(["n"])])
+        self.assertEqual(len(font.glyphs), 3)
+
+        font.merge([other])
+        self.assertEqual(
+            [glyph.name for glyph in font.glyphs],
+            ["A", "Adieresis", "dieresis", "a", "n", "_part.shoulder",
+             "_part.stem"])
+        n = font.glyphs["n"]
+        self.assertIs(n.parent, font)
+        self.assertEqual([layer.layerId for layer in n.layers][:3],
+                         master_ids)
+        self.assertEqual(n.layers[master_ids[0]].width,
+                         self.font.glyphs["n"].layers[master_ids[0]].width)
+        self.assertEqual(font.kerningForPair(master_ids[0], "a", "n"), 5)
+        self.assertEqual([c.name for c in font.classes],
+                         ["c2sc_source", "smcp_source"])
+        self.assertIsNot(font.glyphs["a"], other.glyphs["a"])
+        self.assertEqual(other.glyphs["a"].layers[0].layerId,
+                         other.masters[0].id)
+
+        other.glyphs["n"].layers[0].width = 1
+        font.merge([other], on_conflict="keep")
+        self.assertNotEqual(n.layers[0].width, 1)
+        font.merge([other], on_conflict="replace", copy=False)
+        self.assertIs(font.glyphs["n"], other.glyphs["n"])
+        self.assertIs(font.glyphs["n"].parent, font)
+        self.assertEqual(font.glyphs["n"].layers[0].width, 1)
+        self.assertEqual(len(font.glyphs), 7)
+
+    def test_merge_append(self):
+        font = self.font.subset(["A"])
+        other = self.font.subset(["n"])
+        font.features.append(GSFeature("locl", "sub A by A;"))
+        other.features.append(GSFeature("locl", "sub n by n;"))
+        font.classes.append(GSClass("extra", "A"))
+        other.classes.append(GSClass("extra", "A n"))
+        aalt = font.features["aalt"].code
+
+        font.merge([other], on_conflict="append")
+        self.assertEqual(font.features["locl"].code,
+                         "sub A by A;\nsub n by n;")
+        self.assertEqual(font.classes["extra"].code, "A n")
+        self.assertEqual(font.features["aalt"].code, aalt)
+        self.assertEqual(len(font.features), len(self.font.features) + 1)
+        # Glyphs are not appended
+        with self.assertRaises(ValueError):
+            font.merge([self.font.subset(["A"])], on_conflict="append")
+
+    def test_deepcopy_proxy(self):
+        layers = copy.deepcopy(self.font.glyphs["a"].layers)
+        self.assertEqual(len(layers), len(self.font.glyphs["a"].layers))
+        self.assertIsInstance(layers, list)
+        for copied, layer in zip(layers, self.font.glyphs["a"].layers):
+            self.assertIsNot(copied, layer)
+            self.assertEqual(copied.layerId, layer.layerId)
+
     def test_masters(self):
         font = self.font
         amount = len(font.masters)
@@ -294,13 +791,13 @@ class GSFontFromFileTest(GSObjectsTestCase):
         font.features = []
         amount = len(font.features)
         font.features.append(GSFeature('liga', 'sub f i by fi;'))
-        # TODO
-        # self.assertIsNotNone(font.features['liga'].__repr__())
+        self.assertIsNotNone(font.features['liga'].__repr__())
         self.assertEqual(len(font.features), 1)
-        # TODO
-        # self.assertIn('<GSFeature "liga">', str(font.features))
-        # self.assertIn('sub f i by fi;', font.features['liga'].code)
-        # del(font.features['liga'])
+        self.assertIn('<GSFeature "liga">', str(font.features))
+        self.assertIn('sub f i by fi;', font.features['liga'].code)
+        del(font.features['liga'])
+        self.assertEqual(len(font.features), 0)
+        font.features.append(GSFeature('liga', 'sub f i by fi;'))
         del font.features[-1]
         newFeature1 = GSFeature('liga', 'sub f i by fi;')
         newFeature2 = GSFeature('liga', 'sub f l by fl;')
@@ -926,6 +1423,17 @@ class GSLayerFromFileTest(GSObjectsTestCase):
     #     layer = self.layer
     #     self.assertInteger(layer.color)
 
+    def test_proxies_are_cached(self):
+        layer = self.layer
+        self.assertIs(layer.paths, layer.paths)
+        self.assertIs(layer.anchors, layer.anchors)
+        self.assertIs(self.glyph.layers, self.glyph.layers)
+        copied = copy.copy(layer)
+        self.assertIsNot(copied.paths, layer.paths)
+        copied.paths = []
+        self.assertEqual(len(copied.paths), 0)
+        self.assertNotEqual(len(layer.paths), 0)
+
     def test_components(self):
         glyph = self.font.glyphs["adieresis"]
         layer = glyph.layers[0]
@@ -1088,6 +1596,23 @@ class GSLayerFromFileTest(GSObjectsTestCase):
         layer.anchors.remove(layer.anchors['testPosition1'])
         self.assertEqual(amount, len(layer.anchors))
 
+    def test_anchors_unique_names(self):
+        layer = self.layer
+        amount = len(layer.anchors)
+        top = layer.anchors['top']
+        newTop = GSAnchor('top', point(1, 2))
+        layer.anchors.append(newTop)
+        self.assertEqual(amount, len(layer.anchors))
+        self.assertEqual(layer.anchors['top'], newTop)
+        self.assertEqual(newTop.parent, layer)
+        newTop.name = 'top_1'
+        self.assertIsNone(layer.anchors['top'])
+        self.assertEqual(layer.anchors['top_1'], newTop)
+        newTop.name = 'top'
+        layer.anchors['top'] = top
+        self.assertIs(layer.anchors['top'], top)
+        self.assertEqual(amount, len(layer.anchors))
+
     # TODO layer.paths
 
     # TODO
@@ -1224,6 +1749,22 @@ class GSComponentFromFileTest(GSObjectsTestCase):
         self.assertEqual(bounds.size.width, 289)
         self.assertEqual(bounds.size.height, 490)
 
+    def test_applyTransformation(self):
+        component = GSComponent("a", offset=(10, 20))
+        self.assertEqual(component.applyTransformation(100, 50), (110, 70))
+        component.transform = transform(0, 1, -1, 0, 10, 20)
+        self.assertEqual(component.applyTransformation(100, 50), (-40, 120))
+        # Skewed by 0.5 horizontally
+        component.transform = transform(1, 0, 0.5, 2, 0, 0)
+        self.assertEqual(component.applyTransformation(100, 50), (125, 100))
+
+    def test_bounds_outside_font(self):
+        layer = GSLayer()
+        component = GSComponent("a")
+        layer.components.append(component)
+        self.assertIsNone(component.bounds)
+        self.assertIsNone(GSComponent("a").bounds)
+
     def test_moreBounds(self):
         self.component.scale = 1.1
         bounds = self.component.bounds
@@ -1232,6 +1773,73 @@ class GSComponentFromFileTest(GSObjectsTestCase):
         self.assertEqual(round(bounds.size.width * 10), round(317.9 * 10))
         self.assertEqual(round(bounds.size.height * 10), round(539 * 10))
 
+    def test_bounds_follow_changes(self):
+        self.assertEqual(self.layer.bounds.size.width, 289)
+        self.component.position = (100, 0)
+        self.assertEqual(self.component.bounds.origin.x, 180)
+        self.assertEqual(self.layer.bounds.size.width, 342)
+        # Other components still use the default transform
+        self.assertEqual(GSComponent("a").transform.value, [1, 0, 0, 1, 0, 0])
+        # Editing the referenced glyph changes this layer too
+        path = self.component.layer.paths[0]
+        path.nodes[0].position = point(-100, 147)
+        self.assertEqual(self.layer.bounds.origin.x, 0)
+
+    def test_rotated_bounds(self):
+        self.component.transform = transform(0, 1, -1, 0, 0, 0)
+        bounds = self.component.bounds
+        self.assertAlmostEqual(bounds.origin.x, -480)
+        self.assertAlmostEqual(bounds.origin.y, 80)
+        self.assertAlmostEqual(bounds.size.width, 490)
+        self.assertAlmostEqual(bounds.size.height, 289)
+
+    def test_nested_bounds(self):
+        glyph = GSGlyph("adieresis.alt")
+        self.font.glyphs.append(glyph)
+        layer = GSLayer()
+        layer.layerId = layer.associatedMasterId = self.layer.layerId
+        glyph.layers.append(layer)
+        layer.components.append(GSComponent("adieresis", offset=(10, 20)))
+        bounds = layer.bounds
+        self.assertEqual((bounds.origin.x, bounds.origin.y), (90, 10))
+        self.assertEqual(bounds.size.height, 661)
+        # Nested components follow changes of the base glyph
+        path = self.font.glyphs["a"].layers[0].paths[0]
+        path.nodes[0].position = point(-100, 147)
+        self.assertEqual(layer.bounds.origin.x, -90)
+        # and of glyph names
+        self.font.glyphs["adieresis"].name = "adieresis.old"
+        self.assertIsNone(layer.bounds)
+        master_bounds = self.font._bounds_cache().master_bounds(
+            self.layer.layerId)
+        self.assertIsNone(master_bounds["adieresis.alt"])
+        self.assertEqual(master_bounds["adieresis.old"][0], -100)
+
+    def test_bounds_invalidated_per_layer(self):
+        cache = self.font._bounds_cache()
+        n_layer = self.font.glyphs["n"].layers[0]
+        n_bounds = n_layer.bounds
+        self.assertIsNotNone(self.layer.bounds)
+        # Editing "a" drops the bounds of "a" and "adieresis" only
+        a_layer = self.font.glyphs["a"].layers[0]
+        a_layer.width += 10
+        a_layer.paths[0].nodes[0].position = point(-100, 147)
+        self.assertIn(id(n_layer), cache.bounds)
+        self.assertNotIn(id(a_layer), cache.bounds)
+        self.assertNotIn(id(self.layer), cache.bounds)
+        self.assertEqual(self.layer.bounds.origin.x, -100)
+        self.assertEqual(n_layer.bounds.value, n_bounds.value)
+
+        # Moving nodes in place is only seen after invalidate_bounds
+        position = a_layer.paths[0].nodes[0].position
+        position.value[0] = -200
+        self.assertEqual(self.layer.bounds.origin.x, -100)
+        a_layer.invalidate_bounds()
+        self.assertEqual(self.layer.bounds.origin.x, -200)
+        position.value[0] = -300
+        a_layer.paths[0].invalidate_bounds()
+        self.assertEqual(a_layer.bounds.origin.x, -300)
+
     # def test_automaticAlignment(self):
     #     self.assertBool(self.component.automaticAlignment)
 
@@ -1346,6 +1954,25 @@ class GSPathFromFileTest(GSObjectsTestCase):
     def test_direction(self):
         self.assertEqual(self.path.direction, -1)
 
+    def test_direction_of_drawn_paths(self):
+        square = [(0, 0), (100, 0), (100, 100), (0, 100)]
+        for points, direction in ((square, -1), (square[::-1], 1)):
+            path = GSPath()
+            for position in points:
+                path.nodes.append(GSNode(position))
+            self.assertEqual(path.direction, direction)
+            path.reverse()
+            self.assertEqual(path.direction, -direction)
+
+    def test_direction_of_all_paths(self):
+        for glyph in self.font.glyphs:
+            for layer in glyph.layers:
+                for path in layer.paths:
+                    direction = path.direction
+                    self.assertIn(direction, (-1, 1))
+                    path.reverse()
+                    self.assertEqual(path.direction, -direction)
+
     def test_segments(self):
         oldSegments = self.path.segments
         self.assertEqual(len(self.path.segments), 20)
@@ -1360,6 +1987,20 @@ class GSPathFromFileTest(GSObjectsTestCase):
         self.assertEqual(bounds.size.width, 289)
         self.assertEqual(bounds.size.height, 490)
 
+    def test_bounds_follow_node_changes(self):
+        path = self.path
+        self.assertIs(path.segments, path.segments)
+        segments = path.segments
+        path.nodes[0].position = point(1000, 1000)
+        self.assertIsNot(path.segments, segments)
+        bounds = path.bounds
+        self.assertEqual(bounds.origin.x + bounds.size.width, 1000)
+        self.assertEqual(bounds.origin.y + bounds.size.height, 1000)
+        self.assertEqual(self.layer.bounds.size.height, 1010)
+        del path.nodes[0]
+        self.assertEqual(path.bounds.size.height, 490)
+        self.assertEqual(self.layer.bounds.size.height, 490)
+
 class GSNodeFromFileTest(GSObjectsTestCase):
 
     def setUp(self):
@@ -1387,6 +2028,24 @@ class GSNodeFromFileTest(GSObjectsTestCase):
         self.assertEqual(self.path.nodes[0].index, 0)
         self.assertEqual(self.path.nodes[-1].index, 43)
 
+    def test_index_follows_changes(self):
+        nodes = self.path.nodes
+        last = nodes[-1]
+        self.assertEqual(last.index, 43)
+        newNode = GSNode(point("{20, 20}"))
+        nodes.insert(0, newNode)
+        self.assertEqual(newNode.index, 0)
+        self.assertEqual(last.index, 44)
+        self.assertEqual(newNode.prevNode, last)
+        self.assertEqual(last.nextNode, newNode)
+        nodes.remove(newNode)
+        self.assertEqual(last.index, 43)
+        # Changes to the underlying list are picked up as well
+        self.path._nodes.reverse()
+        self.assertEqual(last.index, 0)
+        with self.assertRaises(ValueError):
+            nodes.index(newNode)
+
     def test_nextNode(self):
         self.assertEqual(type(self.path.nodes[-1].nextNode), GSNode)
         self.assertEqual(self.path.nodes[-1].nextNode, self.path.nodes[0])
@@ -1395,6 +2054,32 @@ class GSNodeFromFileTest(GSObjectsTestCase):
         self.assertEqual(type(self.path.nodes[0].prevNode), GSNode)
         self.assertEqual(self.path.nodes[0].prevNode, self.path.nodes[-1])
 
+    def test_neighbors_of_all_nodes(self):
+        for glyph in self.font.glyphs:
+            for layer in glyph.layers:
+                for path in layer.paths:
+                    nodes = list(path.nodes)
+                    for index, node in enumerate(nodes):
+                        self.assertEqual(node.index, index)
+                        self.assertIs(node.nextNode,
+                                      nodes[(index + 1) % len(nodes)])
+                        self.assertIs(node.prevNode, nodes[index - 1])
+
+    def test_neighbors_follow_changes(self):
+        nodes = self.path.nodes
+        first, second = nodes[0], nodes[1]
+        del nodes[1]
+        self.assertIs(first.nextNode, nodes[1])
+        self.assertIs(nodes[1].prevNode, first)
+        nodes.insert(1, second)
+        self.assertIs(first.nextNode, second)
+        self.assertIs(second.nextNode.prevNode, second)
+        last = nodes[-1]
+        nodes.append(GSNode((0, 0)))
+        self.assertIs(last.nextNode, nodes[-1])
+        self.assertIs(nodes[-1].nextNode, first)
+        self.assertIs(first.prevNode, nodes[-1])
+
     def test_name(self):
         self.assertEqual(self.node.name, 'Hello')
 
@@ -0,0 +1,106 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (
+    print_function, division, absolute_import, unicode_literals)
+
+import os
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+import glyphsLib
+from glyphsLib.classes import GSFont, GSGlyph, ContentEncoder
+from glyphsLib.fontdiff import diff, Difference
+from glyphsLib.types import point
+
+TESTFILE_PATH = os.path.join(
+    os.path.dirname(__file__), 'data', 'GlyphsUnitTestSans.glyphs')
+
+
+class DiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.old = GSFont(TESTFILE_PATH)
+        self.new = GSFont(TESTFILE_PATH)
+
+    def test_identical(self):
+        self.assertEqual(diff(self.old, self.new), [])
+        self.assertEqual(diff(self.old, self.new.clone()), [])
+        self.assertIs(glyphsLib.diff, diff)
+        self.assertIs(glyphsLib.diff_fonts, diff)
+        self.assertEqual(glyphsLib.diff(self.old, self.new), [])
+
+    def test_glyph_changes(self):
+        layer = self.new.glyphs['a'].layers[0]
+        layer_path = ('glyphs', 'a', 'layers', layer.layerId)
+        node = layer.paths[0].nodes[0]
+        old_x = node.position.x
+        node.position = point(old_x + 5, node.position.y)
+        layer.width += 10
+        anchor = layer.anchors['top']
+        anchor.position = point(anchor.position.x, anchor.position.y + 1)
+
+        differences = diff(self.old, self.new)
+        paths = [d.path for d in differences]
+        self.assertIn(layer_path + ('width',), paths)
+        self.assertIn(layer_path + ('anchors', 'top', 'position'), paths)
+        self.assertIn(layer_path + ('paths', 0, 'nodes'), paths)
+        self.assertEqual(len(differences), 3)
+        self.assertEqual(differences.glyphs_changed, ['a'])
+        self.assertEqual(differences.glyphs_added, [])
+
+        nodes = [d for d in differences if d.path[-1] == 'nodes'][0]
+        self.assertEqual(nodes.old[0][0], old_x)
+        self.assertEqual(nodes.new[0][0], old_x + 5)
+
+    def test_added_and_removed_glyphs(self):
+        del self.new.glyphs[self.new.glyphs.index(self.new.glyphs['n'])]
+        glyph = GSGlyph('b')
+        self.new.glyphs.append(glyph)
+        differences = diff(self.old, self.new)
+        self.assertEqual(differences.glyphs_added, ['b'])
+        self.assertEqual(differences.glyphs_removed, ['n'])
+        self.assertEqual(differences.glyphs_changed, [])
+        self.assertIn(Difference(('glyphs', 'b'), None, glyph), differences)
+
+    def test_font_changes(self):
+        master_id = self.new.masters[0].id
+        self.new.setKerningForPair(master_id, 'a', 'n', -30)
+        self.new.masters[0].xHeight += 1
+        self.new.familyName = 'Other'
+        paths = [d.path for d in diff(self.old, self.new)]
+        self.assertIn(('kerning', master_id, 'a', 'n'), paths)
+        self.assertIn(('masters', master_id, 'xHeight'), paths)
+        self.assertIn(('familyName',), paths)
+        self.assertEqual(len(paths), 3)
+
+    def test_memoized_digests(self):
+        self.assertEqual(diff(self.old, self.new), [])
+        self.new.glyphs['n'].layers[0].width += 1
+        with mock.patch.object(ContentEncoder, 'digest', autospec=True,
+                               side_effect=ContentEncoder.digest) as encode:
+            self.assertEqual(diff(self.old, self.new).glyphs_changed, ['n'])
+        # Only the changed glyph and its changed layer are hashed again
+        self.assertEqual(encode.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
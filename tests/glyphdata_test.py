@@ -16,8 +16,27 @@
 
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
-from glyphsLib.glyphdata import get_glyph
+import os
+import shutil
+import tempfile
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from glyphsLib import glyphdata, glyphdata_generated
+from glyphsLib.glyphdata import (
+    get_glyph, get_glyphs, load_glyph_data, GlyphData, GLYPHDATA_TABLE_PATH)
+
+CUSTOM_GLYPH_DATA = """<?xml version="1.0" encoding="UTF-8"?>
+<glyphData format="1">
+	<glyph name="eacute" unicode="E000" category="Symbol" subCategory="Other"/>
+	<glyph name="foo" production="uniE001" unicode="E001" category="Mark"
+	       subCategory="Nonspacing"/>
+	<glyph name="bar"/>
+</glyphData>
+"""
 
 
 class GlyphDataTest(unittest.TestCase):
@@ -72,6 +91,75 @@ class GlyphDataTest(unittest.TestCase):
                          ("uni07F0", "uni07F0"))
         self.assertEqual((u.unicode, g.unicode), ("\u07F0", "\u07F0"))
 
+    def test_get_glyphs(self):
+        glyphs = get_glyphs(["fi", "A", "fi", "uni1EAE"])
+        self.assertEqual(list(glyphs), ["fi", "A", "uni1EAE"])
+        self.assertEqual(glyphs["A"], get_glyph("A"))
+        self.assertEqual(glyphs["uni1EAE"].name, "Abreveacute")
+
+    def test_memoized(self):
+        self.assertIs(get_glyph("eacute"), get_glyph("eacute"))
+        data = GlyphData.from_file(GLYPHDATA_TABLE_PATH)
+        self.assertIsNot(get_glyph("eacute", data=data), get_glyph("eacute"))
+        self.assertEqual(get_glyph("eacute", data=data), get_glyph("eacute"))
+
+    def test_custom_glyph_data(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, "GlyphData.xml")
+            with open(path, "wb") as f:
+                f.write(CUSTOM_GLYPH_DATA.encode("utf-8"))
+            later = os.path.join(tempdir, "GlyphData2.xml")
+            with open(later, "wb") as f:
+                f.write(b'<glyphData><glyph name="bar" category="Letter"/>'
+                        b'</glyphData>')
+            cache_dir = os.path.join(tempdir, "cache")
+            data = load_glyph_data([path, later], cache_dir=cache_dir)
+
+            self.assertEqual(get_glyph("eacute", data),
+                             ("eacute", "eacute", "\ue000", "Symbol", "Other"))
+            self.assertEqual(get_glyph("foo", data),
+                             ("foo", "uniE001", "\ue001", "Mark",
+                              "Nonspacing"))
+            self.assertEqual(get_glyph("uniE001", data).name, "foo")
+            self.assertEqual(get_glyph("bar", data),
+                             ("bar", "bar", None, "Letter", None))
+            # Glyphs that the files do not define come from the built-in data
+            self.assertEqual(get_glyph("Abreveacute", data),
+                             get_glyph("Abreveacute"))
+            self.assertEqual(get_glyph("fi.alt", data), get_glyph("fi.alt"))
+            self.assertEqual(get_glyph("eacute").category, "Letter")
+
+            # The second time, the files are not parsed again
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            with mock.patch.object(glyphdata, "parse_glyph_data") as parse:
+                data = load_glyph_data([path, later], cache_dir=cache_dir)
+                self.assertEqual(get_glyph("foo", data).category, "Mark")
+            self.assertFalse(parse.called)
+        finally:
+            shutil.rmtree(tempdir)
+
+    def test_binary_table(self):
+        # The binary table must hold the same data as the generated module.
+        data = GlyphData.from_file(GLYPHDATA_TABLE_PATH)
+        module = glyphdata_generated
+        self.assertEqual(data.DEFAULT_CATEGORIES, module.DEFAULT_CATEGORIES)
+        names = (set(module.PRODUCTION_NAMES) |
+                 set(module.PRODUCTION_NAMES_REVERSED) |
+                 set(module.IRREGULAR_UNICODE_STRINGS) |
+                 set(module.MISSING_UNICODE_STRINGS) |
+                 set(module.IRREGULAR_CATEGORIES))
+        for name in sorted(names) + ["a", "a.sc", "nonexistent"]:
+            self.assertEqual(get_glyph(name, data=data),
+                             get_glyph(name, data=module))
+            for table in ("PRODUCTION_NAMES", "PRODUCTION_NAMES_REVERSED",
+                          "IRREGULAR_UNICODE_STRINGS",
+                          "IRREGULAR_CATEGORIES"):
+                self.assertEqual(getattr(data, table).get(name),
+                                 getattr(module, table).get(name))
+            self.assertEqual(name in data.MISSING_UNICODE_STRINGS,
+                             name in module.MISSING_UNICODE_STRINGS)
+
 
 if __name__ == "__main__":
     unittest.main()
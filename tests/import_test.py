@@ -0,0 +1,74 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import subprocess
+import sys
+import unittest
+
+import glyphsLib
+
+from test_helpers import import_time
+
+# The time `import glyphsLib` may take, as a fraction of the time that
+# `import glyphsLib.builder` takes in the same conditions (best of 3 runs
+# each). It is about half, with or without compiled bytecode; importing
+# the builder right away would make it more than 1. Being relative, the
+# budget holds on slow or busy machines too.
+IMPORT_TIME_BUDGET = 0.75
+
+# Modules that `import glyphsLib` must not import.
+LAZY_MODULES = ('defcon', 'mutatorMath', 'fontTools.agl', 'fontTools.feaLib',
+                'glyphsLib.builder', 'glyphsLib.glyphdata',
+                'glyphsLib.interpolation')
+
+
+@unittest.skipIf(sys.version_info < (3, 7),
+                 'module __getattr__ and -X importtime need Python 3.7')
+class ImportTest(unittest.TestCase):
+
+    def test_heavy_modules_not_imported(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c',
+             'import sys, glyphsLib; print(" ".join(sys.modules))'],
+            universal_newlines=True)
+        modules = set(output.split())
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_lazy_attributes(self):
+        from glyphsLib import builder, interpolation
+        self.assertIs(glyphsLib.to_ufos, builder.to_ufos)
+        self.assertIs(glyphsLib.interpolate, interpolation.interpolate)
+        self.assertIs(glyphsLib.build_designspace,
+                      interpolation.build_designspace)
+        with self.assertRaises(AttributeError):
+            glyphsLib.no_such_attribute
+
+    def test_import_time_budget(self):
+        times = {'glyphsLib': [], 'glyphsLib.builder': []}
+        for _ in range(3):
+            for module, seconds in times.items():
+                seconds.append(import_time(module))
+        self.assertLess(min(times['glyphsLib']),
+                        IMPORT_TIME_BUDGET * min(times['glyphsLib.builder']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,498 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmarks for hot paths of glyphsLib.
+
+Not collected by pytest. Run all benchmarks with
+
+    python tests/run_benchmarks.py
+
+or only some of them with `python tests/run_benchmarks.py proxies ...`.
+Pass `--file path/to/Font.glyphs` to benchmark on a real-world source
+instead of the unit test font.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import argparse
+import copy
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections import OrderedDict
+
+import glyphsLib
+from glyphsLib import classes
+import glyphsLib.writer
+from glyphsLib.builder import to_ufos
+from test_helpers import import_time
+
+TESTFILE_PATH = os.path.join(
+    os.path.dirname(__file__), 'data', 'GlyphsUnitTestSans.glyphs')
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def load_font(path):
+    with open(path, 'r') as fp:
+        return glyphsLib.load(fp)
+
+
+def report(label, seconds, number):
+    print('  %-40s %10.3f ms' % (label, seconds * 1000.0 / number))
+
+
+@benchmark('load')
+def bench_load(path, number):
+    """Parsing time and allocations of a whole .glyphs file."""
+    with open(path, 'r') as fp:
+        text = fp.read()
+    report('glyphsLib.loads',
+           timeit.timeit(lambda: glyphsLib.loads(text), number=number),
+           number)
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+    tracemalloc.start()
+    font = glyphsLib.loads(text)
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in
+                 tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    print('  %-40s %10.1f MB' % ('memory held by the font', current / 1e6))
+    print('  %-40s %10.1f MB' % ('peak memory while parsing', peak / 1e6))
+    print('  %-40s %10d' % ('live allocations', blocks))
+    del font
+
+
+@benchmark('proxies')
+def bench_proxies(path, number):
+    """Attribute access overhead of proxies during a full to_ufos run."""
+    font = load_font(path)
+
+    counts = {'reads': 0, 'created': 0}
+    cached_get = classes.ProxyProperty.__get__
+    original_init = classes.Proxy.__init__
+
+    def counting_get(self, owner, owner_class=None):
+        if owner is not None:
+            counts['reads'] += 1
+        return cached_get(self, owner, owner_class)
+
+    def counting_init(self, owner):
+        counts['created'] += 1
+        original_init(self, owner)
+
+    def uncached_get(self, owner, owner_class=None):
+        if owner is None:
+            return self
+        return self.proxy_class(owner)
+
+    classes.ProxyProperty.__get__ = counting_get
+    classes.Proxy.__init__ = counting_init
+    try:
+        to_ufos(load_font(path))
+    finally:
+        classes.ProxyProperty.__get__ = cached_get
+        classes.Proxy.__init__ = original_init
+    print('  proxy attribute reads per to_ufos: %d, proxies created: %d' %
+          (counts['reads'], counts['created']))
+
+    report('to_ufos, cached proxies',
+           timeit.timeit(lambda: to_ufos(font), number=number), number)
+    classes.ProxyProperty.__get__ = uncached_get
+    try:
+        report('to_ufos, one proxy per access',
+               timeit.timeit(lambda: to_ufos(font), number=number), number)
+    finally:
+        classes.ProxyProperty.__get__ = cached_get
+
+
+def make_circle_path(segment_count):
+    """Return a closed GSPath approximating a circle with cubic segments."""
+    path = classes.GSPath()
+    nodes = []
+    for i in range(segment_count):
+        for step, node_type in ((0.25, 'offcurve'), (0.75, 'offcurve'),
+                                (1.0, 'curve')):
+            angle = 2 * math.pi * (i + step) / segment_count
+            nodes.append(classes.GSNode(
+                (1000 * math.cos(angle), 1000 * math.sin(angle)), node_type))
+    path.nodes = nodes
+    return path
+
+
+@benchmark('nodes')
+def bench_nodes(path, number):
+    """Node navigation, direction, segments and hints on huge contours."""
+    for segment_count in (1000, 4000):
+        layer = classes.GSLayer()
+        contour = make_circle_path(segment_count)
+        layer.paths.append(contour)
+        nodes = list(contour.nodes)
+        hints = []
+        for node in nodes[::10]:
+            hint = classes.GSHint()
+            hint.originNode = node
+            hints.append(hint)
+        layer.hints = hints
+        print('  contour with %d nodes' % len(nodes))
+        report('GSPath.direction',
+               timeit.timeit(lambda: contour.direction, number=number),
+               number)
+        report('GSPath.segments',
+               timeit.timeit(lambda: contour.segments, number=number),
+               number)
+        report('GSNode.nextNode for all nodes',
+               timeit.timeit(lambda: [n.nextNode for n in nodes],
+                             number=number), number)
+        report('GSHint.origin for %d hints' % len(hints),
+               timeit.timeit(lambda: [h.origin for h in hints],
+                             number=number), number)
+
+
+@benchmark('bounds')
+def bench_bounds(path, number):
+    """Bounds of every layer, from scratch and from the caches."""
+    font = load_font(path)
+    layers = [layer for glyph in font.glyphs for layer in glyph.layers]
+
+    def all_bounds():
+        return [layer.bounds for layer in layers]
+
+    def all_bounds_after_edit():
+        for layer in layers:
+            for contour in layer.paths:
+                contour._geometry_changed()
+        return all_bounds()
+
+    report('all layer bounds, cold',
+           timeit.timeit(all_bounds_after_edit, number=number), number)
+    report('all layer bounds, cached',
+           timeit.timeit(all_bounds, number=number), number)
+
+    def master_bounds_after_edit(master_id):
+        font._geometry_changed()
+        return font._bounds_cache().master_bounds(master_id)
+
+    for master in font.masters:
+        report('master_bounds for %s' % master.name,
+               timeit.timeit(lambda: master_bounds_after_edit(master.id),
+                             number=number), number)
+
+
+@benchmark('compute_bounds')
+def bench_compute_bounds(path, number):
+    """Bounds of whole masters from scratch, path by path and vectorized."""
+    font = load_font(path)
+    paths = [contour for glyph in font.glyphs for layer in glyph.layers
+             for contour in layer.paths]
+    print('  %d paths in %d glyphs' % (len(paths), len(font.glyphs)))
+
+    def forget_bounds():
+        for contour in paths:
+            contour._geometry_changed()
+
+    def master_bounds():
+        forget_bounds()
+        for master in font.masters:
+            font._bounds_cache().master_bounds(master.id)
+
+    def compute_bounds():
+        forget_bounds()
+        for master in font.masters:
+            font.compute_bounds(master.id)
+
+    report('master_bounds, all masters',
+           timeit.timeit(master_bounds, number=number), number)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print('  NumPy is not installed, compute_bounds is not vectorized')
+    report('compute_bounds, all masters',
+           timeit.timeit(compute_bounds, number=number), number)
+
+
+@benchmark('clone')
+def bench_clone(path, number):
+    """Copying a whole font, with GSFont.clone and copy.deepcopy."""
+    font = load_font(path)
+    report('GSFont.clone',
+           timeit.timeit(lambda: font.clone(), number=number), number)
+    report('GSFont.clone(share_geometry=False)',
+           timeit.timeit(lambda: font.clone(share_geometry=False),
+                         number=number), number)
+    report('copy.deepcopy',
+           timeit.timeit(lambda: copy.deepcopy(font), number=number), number)
+
+
+@benchmark('content_hash')
+def bench_content_hash(path, number):
+    """Content digests of a whole font, from scratch and memoized."""
+    font = load_font(path)
+
+    def cold():
+        font._digestCache = None
+        return font.content_hash()
+
+    try:
+        report('GSFont.content_hash, cold',
+               timeit.timeit(cold, number=number), number)
+        report('GSFont.content_hash, memoized',
+               timeit.timeit(font.content_hash, number=number), number)
+        layer = font.glyphs[0].layers[0]
+
+        def after_edit():
+            layer.width += 1
+            return font.content_hash()
+
+        report('GSFont.content_hash, after editing a layer',
+               timeit.timeit(after_edit, number=number), number)
+    finally:
+        font.stop_tracking_changes()
+
+
+@benchmark('diff')
+def bench_diff(path, number):
+    """Diffing two copies of a font that differ in one glyph."""
+    font, other = load_font(path), load_font(path)
+    layer = other.glyphs[len(other.glyphs) // 2].layers[0]
+    layer.width += 1
+
+    def cold():
+        font._digestCache = other._digestCache = None
+        return glyphsLib.diff(font, other)
+
+    try:
+        report('glyphsLib.diff, cold',
+               timeit.timeit(cold, number=number), number)
+        glyphsLib.diff(font, other)
+        report('glyphsLib.diff, memoized digests',
+               timeit.timeit(lambda: glyphsLib.diff(font, other),
+                             number=number), number)
+    finally:
+        font.stop_tracking_changes()
+        other.stop_tracking_changes()
+
+
+@benchmark('merge')
+def bench_merge(path, number):
+    """Merging a font that was split into five subsets back together."""
+    font = load_font(path)
+    names = [glyph.name for glyph in font.glyphs]
+
+    def merge(copy):
+        parts = [font.subset(names[i::5], closure=False) for i in range(5)]
+        start = timeit.default_timer()
+        parts[0].merge(parts[1:], copy=copy)
+        return timeit.default_timer() - start
+
+    report('GSFont.merge',
+           sum(merge(True) for _ in range(number)), number)
+    report('GSFont.merge(copy=False)',
+           sum(merge(False) for _ in range(number)), number)
+
+
+def make_kerning(font, pair_count):
+    """Return nested kerning dicts with `pair_count` pairs per master."""
+    kerning = OrderedDict()
+    for master in font.masters:
+        master_kerning = kerning[master.id] = OrderedDict()
+        for i in range(pair_count):
+            row = master_kerning.setdefault('@MMK_L_%d' % (i // 100),
+                                            OrderedDict())
+            row['@MMK_R_%d' % (i % 100 + i // 5000)] = float(-(i % 90))
+    return kerning
+
+
+@benchmark('kerning')
+def bench_kerning(path, number):
+    """Memory and walking time of nested kerning dicts and a KerningStore."""
+    font = load_font(path)
+    font.kerning = make_kerning(font, 50000)
+    print('  %d masters with 50000 pairs each' % len(font.masters))
+    writer = glyphsLib.writer.Writer(glyphsLib.writer.UnicodeIO())
+
+    def walk():
+        return sum(1 for _ in classes.kerning_pairs(font.kerning))
+
+    def walk_rows():
+        return sum(len(row.items()) for master_kerning in
+                   font.kerning.values() for row in master_kerning.values())
+
+    def measure(label):
+        report('%s, all pairs' % label,
+               timeit.timeit(walk, number=number), number)
+        report('%s, row by row' % label,
+               timeit.timeit(walk_rows, number=number), number)
+        report('%s, writing' % label,
+               timeit.timeit(lambda: writer.writeValue(font.kerning),
+                             number=number), number)
+        master_id = font.masters[0].id
+        report('%s, kerningForPair x 1000' % label,
+               timeit.timeit(lambda: [font.kerningForPair(
+                   master_id, '@MMK_L_%d' % (i % 500), '@MMK_R_7')
+                   for i in range(1000)], number=number), number)
+
+    measure('nested dicts')
+    font.compact_kerning()
+    measure('KerningStore')
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+    for label, factory in (('nested dicts', lambda: make_kerning(font,
+                                                                 50000)),
+                           ('KerningStore', lambda: classes.KerningStore(
+                               make_kerning(font, 50000)))):
+        tracemalloc.start()
+        kerning = factory()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('  %-40s %10.1f MB' % ('memory of the ' + label, current / 1e6))
+        del kerning
+
+
+@benchmark('masters')
+def bench_masters(path, number):
+    """to_ufos writing the masters, built in one or more processes"""
+    font = load_font(path)
+    logging.disable(logging.WARNING)
+    counts = sorted(set([1, 2, multiprocessing.cpu_count()]))
+    report('to_ufos()', timeit.timeit(lambda: to_ufos(font), number=number),
+           number)
+    master_dir = tempfile.mkdtemp()
+    try:
+        for workers in counts:
+            report('to_ufos(workers=%d, master_dir=...)' % workers,
+                   timeit.timeit(
+                       lambda: to_ufos(font, workers=workers,
+                                       master_dir=master_dir),
+                       number=number),
+                   number)
+    finally:
+        shutil.rmtree(master_dir)
+        logging.disable(logging.NOTSET)
+    print('  %-40s %10d' % ('masters', len(font.masters)))
+    print('  %-40s %10d' % ('CPUs', multiprocessing.cpu_count()))
+
+
+@benchmark('glyph_chunks')
+def bench_glyph_chunks(path, number):
+    """to_ufos with the glyphs of each master built in one or more processes
+    and merged into its UFO"""
+    font = load_font(path)
+    logging.disable(logging.WARNING)
+    counts = sorted(set([2, multiprocessing.cpu_count()]))
+    try:
+        report('to_ufos()', timeit.timeit(lambda: to_ufos(font),
+                                          number=number), number)
+        for glyph_workers in counts:
+            report('to_ufos(glyph_workers=%d)' % glyph_workers,
+                   timeit.timeit(
+                       lambda: to_ufos(font, glyph_workers=glyph_workers),
+                       number=number),
+                   number)
+    finally:
+        logging.disable(logging.NOTSET)
+    print('  %-40s %10d' % ('glyphs', len(font.glyphs)))
+    print('  %-40s %10d' % ('CPUs', multiprocessing.cpu_count()))
+
+
+@benchmark('master_memory')
+def bench_master_memory(path, number):
+    """to_ufos writing the masters, with each master built in memory and
+    saved, or streamed to its UFO glyph by glyph, and the peak memory of
+    each"""
+    try:
+        import tracemalloc
+    except ImportError:
+        print('  needs tracemalloc (Python 3.4+)')
+        return
+    font = load_font(path)
+    logging.disable(logging.WARNING)
+    master_dir = tempfile.mkdtemp()
+    try:
+        for streaming in (False, True):
+            label = 'to_ufos(master_dir=..., streaming=%s)' % streaming
+            report(label, timeit.timeit(
+                lambda: to_ufos(font, master_dir=master_dir,
+                                streaming=streaming),
+                number=number), number)
+            tracemalloc.start()
+            try:
+                # The UFOs returned load their glyphs on demand: the peak
+                # is that of building and writing them
+                to_ufos(font, master_dir=master_dir, streaming=streaming)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            print('  %-40s %10.1f MB' % ('peak memory', peak / 1e6))
+    finally:
+        shutil.rmtree(master_dir)
+        logging.disable(logging.NOTSET)
+    print('  %-40s %10d' % ('glyphs', len(font.glyphs)))
+
+
+@benchmark('startup')
+def bench_startup(path, number):
+    """import glyphsLib in a fresh interpreter"""
+    if sys.version_info < (3, 7):
+        print('  needs python -X importtime (Python 3.7+)')
+        return
+    for module in ('glyphsLib', 'glyphsLib.builder'):
+        seconds = min(import_time(module) for _ in range(number))
+        report('import %s, best of %d' % (module, number), seconds, 1)
+    modules = subprocess.check_output(
+        [sys.executable, '-c',
+         'import sys, glyphsLib; print(len(sys.modules))'],
+        universal_newlines=True)
+    print('  %-40s %10s' % ('modules loaded by import glyphsLib',
+                            modules.strip()))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='benchmarks to run: %s' % ', '.join(BENCHMARKS))
+    parser.add_argument('--file', default=TESTFILE_PATH,
+                        help='.glyphs file to run the benchmarks on')
+    parser.add_argument('-n', '--number', type=int, default=10,
+                        help='number of runs per timing')
+    options = parser.parse_args(args)
+    logging.getLogger('glyphsLib').setLevel(logging.ERROR)
+    for name in options.names or BENCHMARKS:
+        print('%s: %s' % (name, BENCHMARKS[name].__doc__))
+        BENCHMARKS[name](options.file, options.number)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
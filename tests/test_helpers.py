@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import difflib
+import subprocess
 import sys
 from textwrap import dedent
 
@@ -35,6 +36,21 @@ def write_to_lines(glyphs_object):
     return string.getvalue().splitlines()
 
 
+def import_time(module):
+    """Return the seconds that importing `module`, with everything it
+    imports, takes in a fresh interpreter, as reported by
+    `python -X importtime` (Python 3.7+).
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.STDOUT, universal_newlines=True)
+    for line in output.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise ValueError('No import time reported for %s' % module)
+
+
 class AssertLinesEqual(object):
     def assertLinesEqual(self, expected, actual, message):
         if actual != expected:
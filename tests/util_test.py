@@ -0,0 +1,140 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from defcon import Font
+
+from glyphsLib import util
+from glyphsLib.util import UpdateStats, update_ufo, write_ufo
+
+
+class WriteUfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def build_ufo(self, glyph_names, layer_glyph_names=()):
+        ufo = Font()
+        ufo.info.familyName = 'Test Family'
+        ufo.info.styleName = 'Regular'
+        for glyph_name in glyph_names:
+            ufo.newGlyph(glyph_name).width = 500
+        if layer_glyph_names:
+            layer = ufo.newLayer('public.background')
+            for glyph_name in layer_glyph_names:
+                layer.newGlyph(glyph_name)
+        return ufo
+
+    def test_write_ufo(self):
+        path = write_ufo(self.build_ufo(['a', 'b'], ['b']), self.out_dir)
+        self.assertEqual(path,
+                         os.path.join(self.out_dir, 'TestFamily-Regular.ufo'))
+        set_mtimes(path, 0)
+
+        # Written afresh, without the files of the last UFO
+        ufo = self.build_ufo(['a'])
+        with mock.patch.object(util.logger, 'info') as info:
+            self.assertEqual(write_ufo(ufo, self.out_dir), path)
+        info.assert_called_once_with('Writing %s' % path)
+        self.assertEqual(mtimes(path), {})
+        self.assertFalse(
+            os.path.exists(os.path.join(path, 'glyphs', 'b.glif')))
+        self.assertEqual(sorted(Font(path).keys()), ['a'])
+        self.assertEqual(ufo.path, path)
+
+    def test_write_unchanged_files_only(self):
+        path = write_ufo(self.build_ufo(['a', 'b', 'c'], ['b']), self.out_dir,
+                         skip_unchanged=True)
+        self.assertEqual(path,
+                         os.path.join(self.out_dir, 'TestFamily-Regular.ufo'))
+        set_mtimes(path, 0)
+
+        ufo = self.build_ufo(['a', 'c', 'd'])
+        ufo['c'].width = 600
+        with mock.patch.object(util.logger, 'info') as info:
+            self.assertEqual(
+                write_ufo(ufo, self.out_dir, skip_unchanged=True), path)
+        info.assert_called_once_with(
+            'Writing %s: 5 files changed, 4 unchanged, 4 removed' % path)
+
+        unchanged = mtimes(path)
+        self.assertEqual(
+            sorted(unchanged),
+            ['fontinfo.plist', 'glyphs/a.glif', 'glyphs/layerinfo.plist',
+             'metainfo.plist'])
+        self.assertFalse(
+            os.path.exists(os.path.join(path, 'glyphs', 'b.glif')))
+        self.assertFalse(
+            os.path.exists(os.path.join(path, 'glyphs.public.background')))
+        # The temporary directory is gone
+        self.assertEqual(os.listdir(self.out_dir), ['TestFamily-Regular.ufo'])
+
+        written = Font(path)
+        self.assertEqual(sorted(written.keys()), ['a', 'c', 'd'])
+        self.assertEqual(written['c'].width, 600)
+        self.assertEqual([layer.name for layer in written.layers],
+                         ['public.default'])
+        self.assertEqual(ufo.path, path)
+
+        ufo = self.build_ufo(['a', 'c', 'd'])
+        ufo['c'].width = 600
+        self.assertEqual(
+            update_ufo(ufo, path),
+            UpdateStats(changed=0, unchanged=9,
+                        unchanged_size=sum(
+                            os.path.getsize(os.path.join(root, name))
+                            for root, _, names in os.walk(path)
+                            for name in names),
+                        removed=0))
+
+
+def set_mtimes(path, mtime):
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            os.utime(os.path.join(root, file_name), (mtime, mtime))
+
+
+def mtimes(path):
+    """Return the size of the files in a UFO with a zero modification time,
+    by path relative to the UFO.
+    """
+    result = {}
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            if os.path.getmtime(file_path) == 0:
+                result[os.path.relpath(file_path, path).replace(
+                    os.sep, '/')] = os.path.getsize(file_path)
+    return result
+
+
+if __name__ == '__main__':
+    unittest.main()